@@ -0,0 +1,361 @@
+"""
+Benchmark harness for main.py.
+
+Generates synthetic Deepr projects (a settings.json tree with N nodes up to
+depth D, M .ahk files per folder, a mix of is_include / is_path / Active
+values and a few unknown folders), then runs main.build() against them and
+reports its BuildResult.timings, so the phases timed are the ones users run.
+Everything runs headless: dialogs are stubbed, the final script is not
+launched, and builds are non-interactive (unknown folders are left as they are).
+
+It also holds the start-up budget check: 'import main' is measured with
+'python -X importtime' in a fresh interpreter, and the check fails if it
+exceeds the budget or if a GUI module (tkinter) is loaded at import time.
+tests/test_startup.py runs the same check with the default budget.
+
+Usage:
+    python benchmark.py [--nodes 100 1000 10000] [--depth 6] [--files 3]
+                        [--include-ratio 0.8] [--path-ratio 0.9] [--active-ratio 0.3]
+                        [--unknown 10] [--repeat 3] [--seed 1] [--json report.json]
+                        [--keep] [--log]
+    python benchmark.py --startup-budget [150] [--repeat 3]
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import subprocess
+import logging
+import argparse
+import tempfile
+import tracemalloc
+
+# main.py sits next to this file
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import main
+
+BENCH_PATHFILE = "paths.ahk"
+BENCH_INCLUDE_OUTPUT = ".includes.ahk"
+BENCH_ROOT_NAME = "Bench"
+# Contexts used for the "Active" key ("Windows" means global)
+BENCH_CONTEXTS = ["Windows"] + [f"ahk_exe App{i}.exe" for i in range(5)]
+# Every generated file and folder gets this age, so the build cache
+# does not consider them too recent to be trusted
+BENCH_MTIME_AGE_SECONDS = 3600
+
+# Modules that must never be loaded by 'import main' (see check_startup_budget)
+STARTUP_FORBIDDEN_MODULES = {"tkinter", "_tkinter"}
+# Default budget of 'import main' in ms (--startup-budget, tests/test_startup.py)
+STARTUP_BUDGET_MS = 150
+
+# Phases of main.build(), in execution order (columns of the report)
+PHASES = (
+    "ahk_parse", "cache_check", "settings_load", "sync", "compile", "create_structure", "unknown_scan",
+    "post_build", "ahk_index", "include_generation", "hotkey_check", "cache_save", "launch",
+)
+# Caches written next to settings.json, removed before a cold build
+BENCH_CACHE_FILES = (main.BUILD_CACHE_FILE, main.AHK_INDEX_FILE, main.BUNDLE_CACHE_FILE)
+
+# =================================================================
+# HEADLESS STUBS
+# =================================================================
+
+def stub_user_interface():
+    """
+    Replaces the main.py user interface hooks: no Tk dialog, no launch.
+    """
+    def show_error_dialog(title, message):
+        logging.error(f"[dialog stubbed] {title}: {message}")
+
+    def ask_yes_no_dialog(title, message):
+        logging.info(f"[dialog stubbed] {title}: answered Yes")
+        return True
+
+    def launch_file(path):
+        logging.info(f"[launch stubbed] {path}")
+
+    main.show_error_dialog = show_error_dialog
+    main.ask_yes_no_dialog = ask_yes_no_dialog
+    main.launch_file = launch_file
+
+# =================================================================
+# SYNTHETIC PROJECT GENERATOR
+# =================================================================
+
+def generate_project(root, node_count, depth, files_per_folder, include_ratio,
+                     path_ratio, active_ratio, unknown_count, rng):
+    """
+    Writes a synthetic project under 'root': folders, .ahk files,
+    .config/settings.json and paths.ahk.
+
+    Returns:
+        dict: Counts of generated nodes, folders and files.
+    """
+    structure = [{
+        "type": main.json_keyConfig,
+        "name": ".config",
+        "is_include": "false",
+    }]
+
+    # Nodes that can still receive children: (children list, relative path, level)
+    open_parents = [(structure, "", 0)]
+    folders = []
+
+    for index in range(node_count):
+        parent_children, parent_path, level = rng.choice(open_parents)
+
+        node = {
+            "type": f"N{index}",
+            "is_include": "true" if rng.random() < include_ratio else "false",
+            "is_path": "true" if rng.random() < path_ratio else "false",
+        }
+        if rng.random() < active_ratio:
+            node["Active"] = rng.choice(BENCH_CONTEXTS)
+
+        parent_children.append(node)
+        node_path = os.path.join(parent_path, node["type"])
+        folders.append(node_path)
+
+        if level + 1 < depth:
+            node["children"] = []
+            open_parents.append((node["children"], node_path, level + 1))
+
+    # Drop the empty "children" lists left on leaves
+    pending = list(structure)
+    while pending:
+        node = pending.pop()
+        if "children" in node:
+            if node["children"]:
+                pending.extend(node["children"])
+            else:
+                del node["children"]
+
+    # Folders on disk, each with its .ahk files
+    os.makedirs(os.path.join(root, ".config"), exist_ok=True)
+    for folder in folders:
+        folder_path = os.path.join(root, folder)
+        os.makedirs(folder_path, exist_ok=True)
+        for file_index in range(files_per_folder):
+            with open(os.path.join(folder_path, f"Script{file_index}.ahk"), 'w', encoding='utf-8') as f:
+                f.write(f"; {folder} #{file_index}\n^!F{file_index % 12 + 1}::MsgBox \"{folder}\"\n")
+
+    # Unknown folders, placed under random generated folders
+    for unknown_index in range(unknown_count):
+        parent = rng.choice(folders) if folders else ""
+        os.makedirs(os.path.join(root, parent, f"Unknown{unknown_index}"), exist_ok=True)
+
+    settings = {"RootName": BENCH_ROOT_NAME, "structure": structure}
+    with open(os.path.join(root, ".config", main.SETTINGS_FILE), 'w', encoding='utf-8') as f:
+        json.dump(settings, f, indent=4)
+
+    with open(os.path.join(root, BENCH_PATHFILE), 'w', encoding='utf-8') as f:
+        f.write(
+            f'{main.AHK_VAR_SETTINGS} := ".config\\{main.SETTINGS_FILE}"\n'
+            f'{main.AHK_VAR_FINAL_SCRIPT} := "{BENCH_ROOT_NAME}.ahk"'
+        )
+
+    # Age every entry so the listing cache can trust their mtimes
+    past = time.time() - BENCH_MTIME_AGE_SECONDS
+    for dir_path, _dirs, files in os.walk(root):
+        for name in files:
+            os.utime(os.path.join(dir_path, name), (past, past))
+        os.utime(dir_path, (past, past))
+
+    return {
+        "nodes": node_count,
+        "folders": len(folders),
+        "ahk_files": len(folders) * files_per_folder,
+        "unknown_folders": unknown_count,
+    }
+
+# =================================================================
+# BUILD RUNNER
+# =================================================================
+
+def run_build(project_root, build_cache=None):
+    """
+    Runs main.build() once against project_root, without prompt nor launch.
+
+    Returns:
+        BuildResult: its 'timings' hold {phase: wall ms}.
+    """
+    options = main.BuildOptions(interactive=False, launch=False, build_cache=build_cache)
+    return main.build(project_root, BENCH_PATHFILE, BENCH_INCLUDE_OUTPUT, options)
+
+def clear_build_caches(project_root):
+    for name in BENCH_CACHE_FILES:
+        try:
+            os.remove(os.path.join(project_root, ".config", name))
+        except FileNotFoundError:
+            pass
+
+def benchmark_size(project_root, repeat):
+    """
+    Cold build (no cache on disk), 'repeat' warm builds (best time per phase
+    kept) and one traced cold build for the peak memory.
+    A warm build regenerates everything as after a settings.json edit: the
+    build cache is handed over with its fingerprint cleared, so only its
+    folder listings are reused, with the AHK index and bundle cache.
+    When the project has no unknown folder, an unchanged rebuild (cache hit)
+    is timed too and returned as 'hit' (None otherwise).
+    """
+    clear_build_caches(project_root)
+    cold = run_build(project_root).timings
+
+    warm = {}
+    for _ in range(repeat):
+        build_cache = main.load_build_cache(main.get_build_cache_path(os.path.join(project_root, ".config", main.SETTINGS_FILE)))
+        if build_cache:
+            build_cache = dict(build_cache, fingerprint=None)
+        for phase, wall_ms in run_build(project_root, build_cache).timings.items():
+            warm[phase] = min(wall_ms, warm.get(phase, wall_ms))
+
+    # Folders written by the previous build are too recent to be trusted
+    # (BUILD_CACHE_RACY_SECONDS): the cache only hits once they are settled
+    hit = None
+    for _ in range(3):
+        result = run_build(project_root)
+        if result.cache_hit:
+            hit = result.timings
+            break
+        time.sleep(main.BUILD_CACHE_RACY_SECONDS)
+
+    clear_build_caches(project_root)
+    tracemalloc.start()
+    run_build(project_root)
+    _current, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return cold, warm, hit, peak_bytes
+
+# =================================================================
+# START-UP BUDGET
+# =================================================================
+
+def measure_import_time():
+    """
+    Runs 'import main' in a fresh interpreter with -X importtime.
+
+    Returns:
+        tuple: (cumulative microseconds for main, {top-level module: cumulative us},
+                set of every imported module name)
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True, check=True,
+    )
+
+    main_us = None
+    top_level = {}
+    imported = set()
+    # Lines look like: "import time:   self [us] |  cumulative | imported package"
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        module = name.strip()
+        imported.add(module)
+        if module == "main":
+            main_us = int(cumulative_us)
+        elif name.startswith("  ") and not name.startswith("    "):
+            # Direct imports of main are indented by two spaces
+            top_level[module] = int(cumulative_us)
+
+    return main_us, top_level, imported
+
+def check_startup_budget(budget_ms, repeat):
+    """
+    Fails (returns False) if 'import main' takes more than budget_ms
+    (best of 'repeat' runs) or loads a forbidden GUI module.
+    """
+    runs = [measure_import_time() for _ in range(max(1, repeat))]
+    main_us, top_level, imported = min(runs, key=lambda run: run[0])
+    import_ms = main_us / 1000
+
+    print(f"'import main': {import_ms:.1f} ms (budget {budget_ms:.1f} ms, best of {len(runs)})")
+    for module, cumulative_us in sorted(top_level.items(), key=lambda item: -item[1])[:5]:
+        print(f"  {module:<20} {cumulative_us / 1000:>8.1f} ms")
+
+    ok = True
+    forbidden = sorted(m for m in imported if m.split(".")[0] in STARTUP_FORBIDDEN_MODULES)
+    if forbidden:
+        print(f"FAIL: GUI modules loaded at import time: {', '.join(forbidden)}")
+        ok = False
+    if import_ms > budget_ms:
+        print(f"FAIL: start-up budget exceeded by {import_ms - budget_ms:.1f} ms")
+        ok = False
+    if ok:
+        print("OK: start-up budget respected.")
+    return ok
+
+# =================================================================
+# REPORT
+# =================================================================
+
+def print_row(label, counts, timings, peak_bytes=None):
+    cells = " ".join(f"{timings.get(phase, 0.0):>10.1f}" for phase in PHASES)
+    peak = f"{peak_bytes / 1024:>10.0f}" if peak_bytes is not None else f"{'':>10}"
+    print(f"{counts['nodes']:>8} {counts['ahk_files']:>8} {label:<5} {cells} {sum(timings.values()):>10.1f} {peak}")
+
+def main_benchmark():
+    parser = argparse.ArgumentParser(description="Times the main.build() phases on synthetic projects.")
+    parser.add_argument("--nodes", type=int, nargs="+", default=[100, 1000, 10000], help="Node counts to benchmark (e.g. 100 1000 100000).")
+    parser.add_argument("--depth", type=int, default=6, help="Maximum depth of the settings tree.")
+    parser.add_argument("--files", type=int, default=3, help=".ahk files per folder.")
+    parser.add_argument("--include-ratio", type=float, default=0.8, help="Share of nodes with is_include = true.")
+    parser.add_argument("--path-ratio", type=float, default=0.9, help="Share of nodes with is_path = true.")
+    parser.add_argument("--active-ratio", type=float, default=0.3, help="Share of nodes with an Active context.")
+    parser.add_argument("--unknown", type=int, default=10, help="Unknown folders added on disk.")
+    parser.add_argument("--repeat", type=int, default=3, help="Warm runs per size (best time kept).")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for the generator.")
+    parser.add_argument("--json", help="Also write the results to this JSON file.")
+    parser.add_argument("--keep", action="store_true", help="Keep the generated projects.")
+    parser.add_argument("--log", action="store_true", help="Keep main.py logging (slow, very verbose).")
+    parser.add_argument("--startup-budget", type=float, nargs="?", const=STARTUP_BUDGET_MS, metavar="MS",
+                        help=f"Only check the 'import main' time against this budget (default {STARTUP_BUDGET_MS} ms).")
+    args = parser.parse_args()
+
+    if args.startup_budget is not None:
+        sys.exit(0 if check_startup_budget(args.startup_budget, args.repeat) else 1)
+
+    if args.log:
+        main.setup_logging(False)
+    else:
+        logging.disable(logging.CRITICAL)
+
+    stub_user_interface()
+
+    print(f"{'nodes':>8} {'files':>8} {'run':<5} " + " ".join(f"{phase[:10]:>10}" for phase in PHASES)
+          + f" {'total ms':>10} {'peak KiB':>10}")
+
+    results = []
+    for node_count in args.nodes:
+        project_root = tempfile.mkdtemp(prefix=f"deepr_bench_{node_count}_")
+        try:
+            counts = generate_project(
+                project_root, node_count, args.depth, args.files, args.include_ratio,
+                args.path_ratio, args.active_ratio, args.unknown, random.Random(args.seed)
+            )
+            cold, warm, hit, peak_bytes = benchmark_size(project_root, args.repeat)
+        finally:
+            if args.keep:
+                print(f"Project kept at: {project_root}")
+            else:
+                shutil.rmtree(project_root, ignore_errors=True)
+
+        print_row("cold", counts, cold)
+        print_row("warm", counts, warm, peak_bytes)
+        if hit is not None:
+            print_row("hit", counts, hit)
+        results.append({**counts, "cold_ms": cold, "warm_ms": warm, "hit_ms": hit, "peak_bytes": peak_bytes})
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({"script_version": main.SCRIPT_VERSION, "results": results}, f, indent=4)
+        print(f"Results written to {args.json}")
+
+if __name__ == "__main__":
+    main_benchmark()
@@ -3,45 +3,124 @@ import sys
 import json
 import logging
 import shutil 
-import argparse
-import configparser
+import errno
+import filecmp
 import re
 import subprocess
+import hashlib
+import time
+import select
+import struct
+import threading
+from collections import namedtuple, deque
+from functools import partial
 from datetime import datetime
-from tkinter import (
-    Tk, messagebox
-)
+# tkinter is imported lazily by the dialog hooks below: it is slow to load
+# and unavailable on headless machines, and most builds never show a dialog.
 
 # --- CONFIGURATION ---
 SETTINGS_FILE = "settings.json"
 LOG_FILE = "mainpy.log"
+PROFILE_FILE = "mainpy_profile.json"
+# Per-node scan statistics written with --scan-report, and how many of the
+# slowest directories to list in it
+SCAN_REPORT_FILE = "mainpy_scan_report.json"
+SCAN_REPORT_SLOWEST_DIRS = 10
 SCRIPT_VERSION = "7.0"
-# Name of the AHK configuration file to generate
-PATHFILE = None
-INCLUDE_OUTPUT = None
 
 # AHK local variable name to use for the settings.json location
 AHK_VAR_SETTINGS = "path_settings"
 AHK_VAR_PYTHON_CMD = "cmd_python"
+AHK_VAR_PYTHON_VERSION = "cmd_python_version"
+# Modification time of the interpreter (FileGetTime format): the launcher
+# re-probes for Python when the recorded interpreter was moved or updated
+AHK_VAR_PYTHON_STAMP = "cmd_python_stamp"
 AHK_VAR_FINAL_SCRIPT = "StartFinalScript"
 # The 'type' of item in settings.json to search for to find the config path
 json_keyConfig = "Configuration"
 
+# Incremental build cache, stored next to settings.json in the config directory
+BUILD_CACHE_FILE = ".build_cache.json"
+BUILD_CACHE_VERSION = 2
+# Directories modified less than this many seconds before the cache is saved
+# are not trusted (coarse mtime resolution on FAT volumes and network shares)
+BUILD_CACHE_RACY_SECONDS = 2
+# State handed to the build relaunched in a new console (main.py build ... --resume <file>),
+# stored in the config directory
+BUILD_CHECKPOINT_FILE = ".build_checkpoint.json"
+BUILD_CHECKPOINT_VERSION = 2
+
+# Folder added to settings.json: sub-folders scanned at most this deep and this
+# many nodes (larger trees can be added as a "collapsed" node instead)
+ADD_FOLDER_MAX_DEPTH = 8
+ADD_FOLDER_MAX_NODES = 200
+
+# Move of unknown folders: copy chunk size and progress report interval (seconds)
+# when the destination is on another volume (on the same volume, folders are renamed)
+MOVE_COPY_CHUNK_SIZE = 1024 * 1024
+MOVE_PROGRESS_INTERVAL = 0.5
+
+# Watch mode: quiet period after the last change before regenerating, and
+# interval between two scans when inotify is not available (seconds)
+WATCH_DEBOUNCE_SECONDS = 0.3
+WATCH_POLL_INTERVAL = 1.0
+
+# Standard directories never descended into when scanning the project tree
+SCAN_IGNORE_DIRS = {'.git', 'venv', '.venv', '__pycache__', '.vscode'}
+# More folders to skip: gitignore-style rules in this file (project root) and in
+# the 'ignore' list of settings.json (a reserved key, not written to A_Path)
+IGNORE_FILE = ".deeprignore"
+SETTINGS_IGNORE_KEY = "ignore"
+
+# Include file format, set by the 'include_mode' key of settings.json: one #include
+# per module ("includes", default), or every module inlined in one file ("bundle")
+SETTINGS_INCLUDE_MODE_KEY = "include_mode"
+INCLUDE_MODES = ("includes", "bundle")
+BUNDLE_CACHE_FILE = ".bundle_cache.json"
+BUNDLE_CACHE_VERSION = 1
+
+# Header line of the generated include file holding the SHA-1 of its content,
+# compared before the file is swapped in (see write_digested_output)
+OUTPUT_DIGEST_PREFIX = "; Deepr-Digest: "
+OUTPUT_DIGEST_MAX_LINES = 5
+
+# Symbol index of the included .ahk files ('parser' mode), in the config directory
+AHK_INDEX_FILE = ".ahk_index.json"
+AHK_INDEX_VERSION = 3
+
+# A_Path format, set by the 'path_mode' key of settings.json: a chain of PathNode
+# classes resolved at runtime ("classes", default), or every path written as a
+# literal anchored on A_ScriptDir ("literal"). 'path_map': "true" also emits
+# A_Path.ByName, a flat Map from dotted name (e.g. "Library.AHK.Core") to path.
+SETTINGS_PATH_MODE_KEY = "path_mode"
+PATH_MODES = ("classes", "literal")
+SETTINGS_PATH_MAP_KEY = "path_map"
+AHK_PATH_MAP_NAME = "ByName"
+
+# Top-level keys of settings.json that configure the build (not written to A_Path)
+SETTINGS_RESERVED_KEYS = ("structure", "RootName", SETTINGS_IGNORE_KEY, SETTINGS_INCLUDE_MODE_KEY,
+                          SETTINGS_PATH_MODE_KEY, SETTINGS_PATH_MAP_KEY)
+
+# Build server ('serve' mode): largest request or reply accepted (bytes)
+BUILD_SERVER_MAX_MESSAGE = 16 * 1024 * 1024
 
 
 # The return code to indicate an error to the AHK script
 EXIT_CODE_ERROR = 1
 
 # --- LOGGING SETUP ---
-def setup_logging(enable_file_log=False):
+def setup_logging(enable_file_log=False, console_level=logging.DEBUG):
     """
     Initializes the logging system. StreamHandler (console) is always active.
     FileHandler (.log) is added only if enable_file_log is True.
+    console_level lets long-running modes (watch) keep the console quiet.
     """
        
     # The StreamHandler is always active for console display
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setLevel(console_level)
     handlers = [
-        logging.StreamHandler(sys.stdout)
+        console_handler
     ]
     
     if enable_file_log:
@@ -56,6 +135,55 @@ def setup_logging(enable_file_log=False):
         handlers=handlers
     )
 
+# --- USER INTERFACE HOOKS ---
+# Every dialog and the final script launch go through these three functions,
+# so headless callers (benchmarks, build agents) can replace them.
+
+def _open_hidden_tk_root():
+    """
+    Imports tkinter on first use and returns (hidden Tk root, messagebox module),
+    or (None, None) when no GUI is available (headless machine, no tkinter).
+    """
+    try:
+        from tkinter import Tk, messagebox
+        root = Tk()
+    except Exception as e:
+        logging.warning(f"GUI unavailable, dialog not shown: {e}")
+        return None, None
+    root.withdraw() # Hide the main window
+    return root, messagebox
+
+def show_error_dialog(title, message):
+    """
+    Displays an error message box. The main Tk window is hidden to avoid
+    showing an empty window.
+    """
+    root, messagebox = _open_hidden_tk_root()
+    if root is None:
+        logging.error(f"{title}: {message}")
+        return
+    messagebox.showerror(title, message)
+    root.destroy()
+
+def ask_yes_no_dialog(title, message):
+    """
+    Displays a Yes/No message box and returns the answer as a bool.
+    Without a GUI, the answer is No (the cautious choice in every caller).
+    """
+    root, messagebox = _open_hidden_tk_root()
+    if root is None:
+        logging.warning(f"{title}: no GUI to ask the question, answering No.")
+        return False
+    response = messagebox.askyesno(title, message)
+    root.destroy()
+    return response
+
+def launch_file(path):
+    """
+    Opens a file with its associated program (AutoHotkey for .ahk files).
+    """
+    os.startfile(path)
+
 def exit_script(code=0):
     """
     Closes the script with the specified exit code.
@@ -67,26 +195,28 @@ def exit_script(code=0):
         logging.error(f"Operation finished with error. Exit code: {code}")
         
         # Display a message box ONLY to inform the user of a FATAL ERROR.
-        # The main Tk window is hidden to avoid showing an empty window.
-        root = Tk()
-        root.withdraw() # Hide the main window
-        
-        messagebox.showerror("Fatal Error", f"A critical error occurred (see {LOG_FILE}). The process is terminated.")
-        
-        root.destroy()
+        show_error_dialog("Fatal Error", f"A critical error occurred (see {LOG_FILE}). The process is terminated.")
 
     for handler in logging.root.handlers:
         handler.flush()
 
     sys.exit(code)
 
+class BuildError(Exception):
+    """
+    Fatal error of a build step (details are logged where it is raised).
+    build() lets it propagate: the CLI exits with EXIT_CODE_ERROR, an
+    in-process caller decides for itself.
+    """
+
 # =================================================================
 # INTEGRATED AHK PARSER
 # =================================================================
 def retrieve_ahk_variables(ahk_filepath):
     """
     Reads an AutoHotkey file (v2 variable declaration style) and attempts
-    to extract 'path_settings' and 'StartFinalScript' variables.
+    to extract 'path_settings' and 'StartFinalScript' variables, plus the
+    recorded Python interpreter ('cmd_python', its version and stamp) when present.
 
     Args:
         ahk_filepath (str): The path to the AHK file to read.
@@ -104,6 +234,7 @@ def retrieve_ahk_variables(ahk_filepath):
     logging.info(f"--- Starting AHK Parse of {os.path.basename(ahk_filepath)} ---")
     
     try:
+        count_fs_call('open')
         with open(ahk_filepath, 'r', encoding='utf-8') as f:
             content = f.read()
     except FileNotFoundError:
@@ -119,11 +250,13 @@ def retrieve_ahk_variables(ahk_filepath):
     # Second pass: Variable resolution
     # We only focus on the specific variables we need
     vars_to_resolve = [AHK_VAR_SETTINGS, AHK_VAR_FINAL_SCRIPT]
+    # Written since the interpreter is recorded; older files do not have them
+    optional_vars = [AHK_VAR_PYTHON_CMD, AHK_VAR_PYTHON_VERSION, AHK_VAR_PYTHON_STAMP]
     
     # Build a reference map for resolution
     definitions_map = {name: value.strip() for name, value in raw_definitions}
 
-    for name in vars_to_resolve:
+    for name in vars_to_resolve + optional_vars:
         if name in definitions_map:
             value_expression = definitions_map[name]
             
@@ -139,7 +272,7 @@ def retrieve_ahk_variables(ahk_filepath):
             
             resolved_vars[name] = final_value
             logging.info(f"Resolved variable: {name} = '{final_value}' (Raw expression: {value_expression})")
-        else:
+        elif name in vars_to_resolve:
             logging.warning(f"Variable '{name}' not found in the AHK file.")
             
     logging.info(f"--- Finished AHK Parse ---")
@@ -165,8 +298,9 @@ def read_ahk_variables(pathfile_path):
         logging.error(f"AHK variables '{AHK_VAR_SETTINGS}' or '{AHK_VAR_FINAL_SCRIPT}' are missing or invalid in '{pathfile_path}'.")
         return None
     
-    # Replace forward slashes with correct OS separators, just in case
-    settings_path = settings_path.replace('/', os.sep)
+    # Replace both slash styles with correct OS separators (paths.ahk is written
+    # with backslashes, which must still resolve when main.py runs on Linux)
+    settings_path = settings_path.replace('/', os.sep).replace('\\', os.sep)
     
     logging.info(f"Settings path (from AHK): {settings_path}")
     logging.info(f"Final Script path (from AHK): {StartAHKScriptOutput}")
@@ -191,6 +325,7 @@ def load_settings_json(settings_json_path):
         return None
 
     try:
+        count_fs_call('open')
         with open(settings_abs_path, 'r', encoding='utf-8') as f:
             json_data = json.load(f)
         
@@ -204,6 +339,826 @@ def load_settings_json(settings_json_path):
         logging.error(f"Error reading settings.json file: {e}")
         return None
 
+class SettingsStore:
+    """
+    settings.json as modified by one build: the data is changed in memory,
+    marked dirty, and written once by flush() instead of after every change.
+    """
+    __slots__ = ('data', 'path', 'dirty')
+
+    def __init__(self, data, path, dirty=False):
+        self.data = data
+        self.path = os.path.abspath(path)
+        self.dirty = dirty
+
+    def mark_dirty(self):
+        self.dirty = True
+
+    def flush(self, changed_outputs=None):
+        """
+        Writes the data if it was modified. The file is written to a temporary
+        file, synced and renamed over settings.json, so it is never left half
+        written. Nothing is written when the content on disk is already the same.
+
+        Returns:
+            bool: True if settings.json was written.
+
+        Raises:
+            OSError: if it could not be written (the file on disk is unchanged).
+        """
+        if not self.dirty:
+            return False
+        content = json.dumps(self.data, indent=4)
+        digest = hashlib.sha1(content.encode('utf-8')).digest()
+        try:
+            count_fs_call('open')
+            with open(self.path, 'r', encoding='utf-8') as f:
+                disk_digest = hashlib.sha1(f.read().encode('utf-8')).digest()
+        except (OSError, ValueError):
+            disk_digest = None
+        self.dirty = False
+        if digest == disk_digest:
+            logging.info(f"'{self.path}' is already up-to-date. Skipping write.")
+            return False
+
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            count_fs_call('open')
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+            count_fs_call('replace')
+            os.replace(temp_path, self.path)
+        except OSError:
+            self.dirty = True
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+        logging.info(f"'{self.path}' saved successfully.")
+        if changed_outputs is not None:
+            changed_outputs.append(self.path)
+        return True
+
+# =================================================================
+# FILESYSTEM SNAPSHOT
+# =================================================================
+
+class DirListing:
+    """
+    The content of a single directory, as returned by one os.scandir call.
+    'dirs' and 'files' keep the order of the filesystem. When restored from
+    the build cache, 'files' only holds the .ahk files.
+    'mtime_ns' is the directory mtime read just before it was listed.
+    """
+    __slots__ = ('dirs', 'files', 'mtime_ns', '_kinds')
+
+    def __init__(self, dirs, files, mtime_ns=None):
+        self.dirs = dirs
+        self.files = files
+        self.mtime_ns = mtime_ns
+        # normcase(name) -> True for folders, False for files
+        self._kinds = {os.path.normcase(name): False for name in files}
+        self._kinds.update((os.path.normcase(name), True) for name in dirs)
+
+    def has(self, name):
+        return os.path.normcase(name) in self._kinds
+
+    def has_dir(self, name):
+        return self._kinds.get(os.path.normcase(name), False)
+
+    def add_dir(self, name):
+        if not self.has(name):
+            self.dirs.append(name)
+            self._kinds[os.path.normcase(name)] = True
+
+class FsSnapshot:
+    """
+    In-memory view of the project tree shared by every phase of main_build.
+    Each directory is listed at most once (lazily, on first query), and
+    existence checks are answered from the parent's listing, so a build
+    issues one stat + os.scandir per visited directory and no per-node stat.
+
+    'listing_cache' is the "dirs" table of a previous build cache:
+    {relative path: [mtime_ns, dirs, ahk_files]}. A directory whose mtime
+    did not change is restored from it instead of being listed again.
+
+    All paths are relative to 'root' (e.g. "Library/AHK" or "./Library/AHK").
+    """
+
+    def __init__(self, root, listing_cache=None):
+        self.root = root
+        self._listings = {} # normalized relative path -> DirListing or None
+        self._listing_cache = listing_cache or {}
+        self.listed_count = 0 # Directories read with os.scandir
+        self.reused_count = 0 # Directories restored from the listing cache
+        self.list_ms = {} # Normalized relative path -> ms spent in stat + os.scandir
+
+    @staticmethod
+    def _key(rel_path):
+        return os.path.normcase(os.path.normpath(rel_path))
+
+    def listing(self, rel_path):
+        """
+        Returns the DirListing of rel_path, or None if it is not a readable directory.
+        """
+        key = self._key(rel_path)
+        if key in self._listings:
+            return self._listings[key]
+
+        result = None
+        dirs, files = [], []
+        full_path = os.path.join(self.root, rel_path)
+        started = time.perf_counter()
+        try:
+            count_fs_call('stat')
+            mtime_ns = os.stat(full_path).st_mtime_ns
+            cached = self._listing_cache.get(key)
+            if cached and cached[0] is not None and cached[0] == mtime_ns:
+                # Unchanged since the last build: no need to list it again
+                result = DirListing(list(cached[1]), list(cached[2]), mtime_ns)
+                self.reused_count += 1
+            else:
+                count_fs_call('scandir')
+                with os.scandir(full_path) as entries:
+                    for entry in entries:
+                        try:
+                            is_dir = entry.is_dir()
+                        except OSError:
+                            is_dir = False
+                        (dirs if is_dir else files).append(entry.name)
+                result = DirListing(dirs, files, mtime_ns)
+                self.listed_count += 1
+                self.list_ms[key] = (time.perf_counter() - started) * 1000
+        except (FileNotFoundError, NotADirectoryError):
+            pass
+        except OSError as e:
+            logging.warning(f"Could not list directory '{rel_path}': {e}")
+
+        self._listings[key] = result
+        return result
+
+    def peek(self, rel_path):
+        """Returns the DirListing of rel_path if it was already queried, without listing it."""
+        return self._listings.get(self._key(rel_path))
+
+    def _split(self, rel_path):
+        rel_path = os.path.normpath(rel_path)
+        if rel_path == os.curdir:
+            return None, None
+        parent, name = os.path.split(rel_path)
+        return (parent or os.curdir), name
+
+    def exists(self, rel_path):
+        parent, name = self._split(rel_path)
+        if name is None:
+            return True
+        parent_listing = self.listing(parent)
+        return parent_listing is not None and parent_listing.has(name)
+
+    def is_dir(self, rel_path):
+        parent, name = self._split(rel_path)
+        if name is None:
+            return True
+        parent_listing = self.listing(parent)
+        return parent_listing is not None and parent_listing.has_dir(name)
+
+    def ahk_files(self, rel_path):
+        """
+        Returns the names of the .ahk files directly inside rel_path (no recursion).
+        """
+        dir_listing = self.listing(rel_path)
+        if dir_listing is None:
+            return []
+        return [name for name in dir_listing.files if name.lower().endswith(".ahk")]
+
+    def mark_created(self, rel_path):
+        """
+        Records a folder created by the build itself, without listing it again.
+        Its mtime stays unknown, so it is never restored from the listing cache.
+        """
+        self._listings[self._key(rel_path)] = DirListing([], [])
+        parent, name = self._split(rel_path)
+        if name is not None:
+            parent_listing = self._listings.get(self._key(parent))
+            if parent_listing is not None:
+                parent_listing.add_dir(name)
+                parent_listing.mtime_ns = None
+
+    def invalidate(self, rel_path):
+        """
+        Forgets rel_path, all its descendants and its parent, so they are
+        listed again on next query (used after folders are moved on disk).
+        """
+        key = self._key(rel_path)
+        if key == os.curdir:
+            self._listings.clear()
+            return
+        prefix = key + os.sep
+        for cached in [k for k in self._listings if k == key or k.startswith(prefix)]:
+            del self._listings[cached]
+        parent, name = self._split(rel_path)
+        if name is not None:
+            self._listings.pop(self._key(parent), None)
+
+    def listed_items(self):
+        """
+        Yields (relative path, DirListing) for every directory that exists.
+        """
+        for key, dir_listing in self._listings.items():
+            if dir_listing is not None:
+                yield key, dir_listing
+
+    def export_listings(self):
+        """
+        Returns the listings in the 'listing_cache' format accepted by __init__:
+        {relative path: [mtime_ns, dirs, ahk_files]}. Directories modified too
+        recently to be trusted get a None mtime (always listed again).
+        """
+        limit_ns = racy_limit_ns()
+        exported = {}
+        for rel_path, dir_listing in self.listed_items():
+            mtime_ns = dir_listing.mtime_ns
+            if mtime_ns is not None and mtime_ns >= limit_ns:
+                mtime_ns = None
+            ahk_files = [name for name in dir_listing.files if name.lower().endswith(".ahk")]
+            exported[rel_path] = [mtime_ns, dir_listing.dirs, ahk_files]
+        return exported
+
+# =================================================================
+# IGNORE RULES
+# =================================================================
+
+def _ignore_glob_to_regex(glob):
+    """
+    Translates one gitignore glob to a regular expression matched against a
+    '/'-separated path: '*' and '?' stop at '/', '**/' matches any number
+    of folders (including none), a trailing '**' matches everything below.
+    """
+    out = []
+    i, n = 0, len(glob)
+    while i < n:
+        c = glob[i]
+        if c == '*':
+            if glob.startswith('**/', i):
+                out.append('(?:.*/)?')
+                i += 3
+                continue
+            if glob.startswith('**', i):
+                out.append('.*')
+                i += 2
+                continue
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[' and glob.find(']', i + 2) != -1:
+            end = glob.find(']', i + 2)
+            body = glob[i + 1:end]
+            if body.startswith('!'):
+                body = '^' + body[1:]
+            out.append('[' + body.replace('\\', '\\\\') + ']')
+            i = end + 1
+            continue
+        elif c == '\\' and i + 1 < n:
+            out.append(re.escape(glob[i + 1]))
+            i += 2
+            continue
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return ''.join(out)
+
+class IgnoreMatcher:
+    """
+    Gitignore-style folder rules compiled once for every scanner of a build:
+    the standard folders (SCAN_IGNORE_DIRS), then the project's IGNORE_FILE,
+    then the 'ignore' list of settings.json. Scanners call is_ignored_dir()
+    before descending into a folder, so a match prunes its whole subtree;
+    'pruned' counts the folders skipped that way.
+
+    Syntax: blank lines and '#' comments, '!' to re-include (the last
+    matching rule wins), '*', '?', '[...]' and '**'. A rule with a leading
+    or inner '/' is matched against the path from the project root, any
+    other rule against the folder name at any depth. Only folders are
+    matched, so a trailing '/' makes no difference.
+    """
+
+    def __init__(self, patterns=()):
+        self.pruned = 0
+        self._fold = str.lower if os.path.normcase('A') == 'a' else str
+        self._rules = [] # (negate, anchored, compiled regex), in file order
+        self._names = set() # Literal folder names (fast path)
+        name_globs, path_globs = [], []
+        self._has_negation = False
+
+        for pattern in patterns:
+            pattern = pattern.strip()
+            if not pattern or pattern.startswith('#'):
+                continue
+            negate = pattern.startswith('!')
+            if negate:
+                pattern = pattern[1:]
+                self._has_negation = True
+            elif pattern.startswith(('\\#', '\\!')):
+                pattern = pattern[1:]
+            pattern = self._fold(pattern.rstrip('/'))
+            anchored = '/' in pattern
+            pattern = pattern.lstrip('/')
+            if not pattern:
+                continue
+
+            regex = _ignore_glob_to_regex(pattern)
+            self._rules.append((negate, anchored, re.compile(regex)))
+            if negate:
+                continue
+            if anchored:
+                path_globs.append(regex)
+            elif re.escape(pattern) == regex:
+                self._names.add(pattern)
+            else:
+                name_globs.append(regex)
+
+        # Without '!' rules the order does not matter: one set and two regexes
+        self._name_regex = re.compile('|'.join(name_globs)) if name_globs else None
+        self._path_regex = re.compile('|'.join(path_globs)) if path_globs else None
+
+    def is_ignored_dir(self, rel_path):
+        """
+        True if the folder rel_path (relative to the project root) is ignored.
+        """
+        path = os.path.normpath(rel_path).replace(os.sep, '/')
+        if path == os.curdir:
+            return False
+        path = self._fold(path)
+        name = path.rsplit('/', 1)[-1]
+
+        if self._has_negation:
+            ignored = False
+            for negate, anchored, regex in self._rules:
+                if regex.fullmatch(path if anchored else name):
+                    ignored = not negate
+        else:
+            ignored = (
+                name in self._names
+                or (self._name_regex is not None and self._name_regex.fullmatch(name) is not None)
+                or (self._path_regex is not None and self._path_regex.fullmatch(path) is not None)
+            )
+        if ignored:
+            self.pruned += 1
+        return ignored
+
+def load_ignore_matcher(project_root, settings=None):
+    """
+    Compiles the standard ignored folders, the project's IGNORE_FILE and
+    the 'ignore' list of settings.json (in that order) into an IgnoreMatcher.
+    """
+    patterns = [f"{name}/" for name in sorted(SCAN_IGNORE_DIRS)]
+
+    ignore_path = os.path.join(project_root, IGNORE_FILE)
+    try:
+        with open(ignore_path, 'r', encoding='utf-8-sig') as f:
+            patterns.extend(f.read().splitlines())
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        logging.warning(f"Could not read '{ignore_path}': {e}")
+
+    settings_patterns = (settings or {}).get(SETTINGS_IGNORE_KEY, [])
+    if isinstance(settings_patterns, str):
+        settings_patterns = [settings_patterns]
+    if not isinstance(settings_patterns, list) or not all(isinstance(p, str) for p in settings_patterns):
+        logging.warning(f"'{SETTINGS_IGNORE_KEY}' in {SETTINGS_FILE} must be a list of patterns. Ignored.")
+        settings_patterns = []
+    patterns.extend(settings_patterns)
+
+    return IgnoreMatcher(patterns)
+
+# =================================================================
+# INCREMENTAL BUILD CACHE
+# =================================================================
+
+def get_build_cache_path(settings_json_path):
+    """
+    The build cache lives next to settings.json (i.e. in the config directory).
+    """
+    return os.path.join(os.path.dirname(os.path.abspath(settings_json_path)), BUILD_CACHE_FILE)
+
+def compute_build_fingerprint(settings_json_path, pathfile_path, include_output):
+    """
+    Hashes every input of the build that is not a directory listing:
+    settings.json, the PATHFILE, IGNORE_FILE, the output names and main.py itself.
+
+    Returns:
+        str or None: The hex digest, or None if an input could not be read.
+    """
+    hasher = hashlib.sha256()
+    hasher.update(f"{BUILD_CACHE_VERSION}|{SCRIPT_VERSION}|{include_output}|".encode('utf-8'))
+    try:
+        count_fs_call('stat')
+        script_stat = os.stat(os.path.abspath(__file__))
+        hasher.update(f"{script_stat.st_mtime_ns}:{script_stat.st_size}|".encode('utf-8'))
+        for input_path in (settings_json_path, pathfile_path):
+            count_fs_call('open')
+            with open(input_path, 'rb') as f:
+                hasher.update(f.read())
+            hasher.update(b'\0')
+        try:
+            count_fs_call('open')
+            with open(os.path.join(os.path.dirname(os.path.abspath(pathfile_path)), IGNORE_FILE), 'rb') as f:
+                hasher.update(f.read())
+        except FileNotFoundError:
+            hasher.update(b'-')
+    except OSError as e:
+        logging.debug(f"Build fingerprint unavailable: {e}")
+        return None
+    return hasher.hexdigest()
+
+def _stat_signature(path):
+    """Returns [mtime_ns, size] for path, or None if it cannot be stat'ed."""
+    count_fs_call('stat')
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+def racy_limit_ns():
+    """
+    mtimes at or after the returned time (ns) are not trusted: an entry
+    modified that recently could change again within the same mtime. The
+    caches save such entries without mtime, so they are checked again.
+    """
+    return time.time_ns() - BUILD_CACHE_RACY_SECONDS * 1_000_000_000
+
+class SignatureCache:
+    """
+    Per-file cache persisted as JSON: {key: [mtime_ns, size, sha1, payload]}.
+    A file whose mtime/size did not change is not read again; a file read
+    again with the same content hash keeps its cached payload. Shared by the
+    AHK index (payload: symbols) and the bundle cache (payload: module text).
+    """
+    label = "cache" # Name used in the log messages
+
+    def __init__(self, cache_path, version, section):
+        self.cache_path = cache_path
+        self._version = version
+        self._section = section
+        self._entries = {}
+        try:
+            count_fs_call('open')
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+            if isinstance(cache, dict) and cache.get("version") == version:
+                self._entries = cache.get(section, {})
+        except (OSError, ValueError):
+            pass
+        self._used = {} # Entries of this run, in lookup order
+        self.read_count = 0
+        self.reused_count = 0
+        self.changed_count = 0
+
+    def lookup(self, key, full_path, make_payload):
+        """
+        Returns the entry of full_path for this run, stored under 'key'.
+        make_payload(data) is only called when the content hash changed.
+
+        Raises:
+            OSError: if full_path has to be read and cannot be.
+        """
+        entry = self._used.get(key)
+        if entry is not None:
+            return entry
+        signature = _stat_signature(full_path)
+        cached = self._entries.get(key)
+        if signature and cached and cached[0] is not None and cached[:2] == signature:
+            entry = cached
+            self.reused_count += 1
+        else:
+            count_fs_call('open')
+            with open(full_path, 'rb') as f:
+                data = f.read()
+            self.read_count += 1
+            digest = hashlib.sha1(data).hexdigest()
+            if cached and cached[2] == digest:
+                payload = cached[3]
+            else:
+                payload = make_payload(data)
+                self.changed_count += 1
+            mtime_ns, size = signature if signature else (None, None)
+            entry = [mtime_ns, size, digest, payload]
+        self._used[key] = entry
+        return entry
+
+    def save(self):
+        """
+        Writes the entries of this run (files no longer used are dropped).
+        Entries modified too recently to be trusted are saved without mtime.
+        """
+        limit_ns = racy_limit_ns()
+        entries = {}
+        for key, (mtime_ns, size, digest, payload) in self._used.items():
+            if mtime_ns is not None and mtime_ns >= limit_ns:
+                mtime_ns = None
+            entries[key] = [mtime_ns, size, digest, payload]
+        if entries == self._entries:
+            return
+        try:
+            count_fs_call('open')
+            with open(self.cache_path, 'w', encoding='utf-8') as f:
+                json.dump({"version": self._version, self._section: entries}, f)
+        except OSError as e:
+            logging.warning(f"Could not write {self.label} '{self.cache_path}': {e}")
+
+def load_build_cache(cache_path):
+    """
+    Reads the build cache file. Returns None if it is missing, unreadable
+    or written by another cache format version.
+    """
+    try:
+        count_fs_call('open')
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(cache, dict) or cache.get("version") != BUILD_CACHE_VERSION:
+        return None
+    return cache
+
+def check_build_cache(cache, settings_json_path, pathfile_path, include_output, project_root):
+    """
+    Decides whether the previous build is still valid: same fingerprint,
+    same mtime for every scanned directory and same mtime/size for both
+    outputs. Only stat calls are issued, no directory is listed.
+
+    Returns:
+        str or None: The cached config relative path if nothing changed, else None.
+    """
+    if not cache:
+        logging.info("No usable build cache found. Running a full build.")
+        return None
+
+    fingerprint = compute_build_fingerprint(settings_json_path, pathfile_path, include_output)
+    if not fingerprint or fingerprint != cache.get("fingerprint"):
+        logging.info("Build cache is stale (settings or configuration changed).")
+        return None
+
+    for output_path, signature in cache.get("outputs", {}).items():
+        if signature is None or _stat_signature(output_path) != signature:
+            logging.info(f"Build cache is stale (output changed: {output_path}).")
+            return None
+
+    for rel_path, (mtime_ns, _dirs, _ahk_files) in cache.get("dirs", {}).items():
+        signature = _stat_signature(os.path.join(project_root, rel_path))
+        if mtime_ns is None or signature is None or signature[0] != mtime_ns:
+            logging.info(f"Build cache is stale (folder changed: {rel_path}).")
+            return None
+
+    # Modules read by the build (AHK index, bundled modules): their #include
+    # lines, hotkeys and inlined content are part of the output
+    for input_path, signature in cache.get("inputs", {}).items():
+        if signature is None or _stat_signature(input_path) != signature:
+            logging.info(f"Build cache is stale (module changed: {input_path}).")
+            return None
+
+    return cache.get("config_path")
+
+def save_build_cache(settings_json_path, pathfile_path, include_output, include_file_path, config_path, snapshot, inputs=None):
+    """
+    Records the inputs of a successful build so the next one can be skipped,
+    together with the listing of every directory (sub-folders and .ahk files)
+    keyed by the mtime it had when it was listed, and the mtime/size of the
+    modules the build read ('inputs': AhkIndex.inputs and the bundled modules,
+    see generate_INCLUDE_OUTPUT). Folder mtimes do not change when a file is
+    saved in place, so these are checked one by one.
+    The cache file is created first and then rewritten in place, so writing
+    it does not change the mtime of the config directory it sits in.
+
+    Returns:
+        dict or None: The saved cache, or None if it could not be written.
+    """
+    cache_path = get_build_cache_path(settings_json_path)
+    try:
+        # Make sure the file exists BEFORE the directory mtimes are recorded
+        open(cache_path, 'a', encoding='utf-8').close()
+    except OSError as e:
+        logging.warning(f"Could not create build cache '{cache_path}': {e}")
+        return None
+
+    dirs = snapshot.export_listings()
+
+    # A module modified too recently could change again within the same mtime
+    limit_ns = racy_limit_ns()
+    inputs = {
+        path: (signature if signature and signature[0] < limit_ns else None)
+        for path, signature in (inputs or {}).items()
+    }
+
+    cache = {
+        "version": BUILD_CACHE_VERSION,
+        "fingerprint": compute_build_fingerprint(settings_json_path, pathfile_path, include_output),
+        "config_path": config_path,
+        "outputs": {
+            os.path.abspath(pathfile_path): _stat_signature(pathfile_path),
+            os.path.abspath(include_file_path): _stat_signature(include_file_path),
+        },
+        "dirs": dirs,
+        "inputs": inputs,
+    }
+
+    try:
+        count_fs_call('open')
+        with open(cache_path, 'r+', encoding='utf-8') as f:
+            json.dump(cache, f)
+            f.truncate()
+        logging.info(f"Build cache saved ({len(dirs)} folders, {snapshot.listed_count} listed, {snapshot.reused_count} reused): {cache_path}")
+    except OSError as e:
+        logging.warning(f"Could not write build cache '{cache_path}': {e}")
+        return None
+    return cache
+
+def save_build_checkpoint(checkpoint_path, state, snapshot):
+    """
+    Writes the state of a build stopped at the unknown-folder prompt (see
+    _finish_build), so the build relaunched in a new console resumes there
+    instead of parsing, syncing and scanning the project again. The folder
+    listings of 'snapshot' are saved with it, in the build cache format, and
+    the current mtime of every listed folder, so a changed folder invalidates
+    it. Like the build cache, the file is created first and then rewritten in
+    place, so writing it does not change the mtime of its own folder.
+
+    Returns:
+        bool: True if the checkpoint was written.
+    """
+    checkpoint = dict(state)
+    checkpoint["version"] = BUILD_CHECKPOINT_VERSION
+    checkpoint["settings_signature"] = _stat_signature(state["settings_path"])
+    checkpoint["dirs"] = snapshot.export_listings()
+    try:
+        open(checkpoint_path, 'a', encoding='utf-8').close()
+        # Unlike "dirs" (listings reused by the resumed build), every listed
+        # folder is checked: the unknown folders were found in these listings
+        checkpoint["dir_mtimes"] = {
+            rel_path: (_stat_signature(os.path.join(state["project_root"], rel_path)) or [None])[0]
+            for rel_path, _dir_listing in snapshot.listed_items()
+        }
+        with open(checkpoint_path, 'r+', encoding='utf-8') as f:
+            json.dump(checkpoint, f)
+            f.truncate()
+    except OSError as e:
+        logging.warning(f"Could not write build checkpoint '{checkpoint_path}': {e}")
+        return False
+    logging.info(f"Build checkpoint saved ({len(state['unknown_folders'])} unknown folders): {checkpoint_path}")
+    return True
+
+def load_build_checkpoint(checkpoint_path, project_root):
+    """
+    Reads a checkpoint written by save_build_checkpoint and deletes it once
+    checked (it is only valid once). Returns None if it is unreadable, written by another
+    checkpoint format version or for another project, or if settings.json or
+    a listed folder changed since it was written: the build then starts from
+    the beginning.
+    """
+    checkpoint_path = os.path.join(project_root, checkpoint_path)
+    try:
+        with open(checkpoint_path, 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+    except (OSError, ValueError) as e:
+        logging.warning(f"Could not read build checkpoint '{checkpoint_path}': {e}")
+        return None
+
+    try:
+        if not isinstance(checkpoint, dict) or checkpoint.get("version") != BUILD_CHECKPOINT_VERSION:
+            logging.warning(f"Build checkpoint '{checkpoint_path}' has an unknown format.")
+            return None
+        if os.path.normcase(checkpoint.get("project_root") or "") != os.path.normcase(project_root):
+            logging.warning(f"Build checkpoint '{checkpoint_path}' belongs to another project: {checkpoint.get('project_root')}")
+            return None
+        if _stat_signature(checkpoint.get("settings_path") or "") != checkpoint.get("settings_signature"):
+            logging.warning(f"'{SETTINGS_FILE}' changed since the build checkpoint was written.")
+            return None
+        # Checked before the checkpoint is deleted, which changes its folder mtime
+        for rel_path, mtime_ns in checkpoint.get("dir_mtimes", {}).items():
+            signature = _stat_signature(os.path.join(project_root, rel_path))
+            if signature is None or signature[0] != mtime_ns:
+                logging.warning(f"Folder '{rel_path}' changed since the build checkpoint was written.")
+                return None
+        return checkpoint
+    finally:
+        try:
+            os.remove(checkpoint_path)
+        except OSError as e:
+            logging.warning(f"Could not delete build checkpoint '{checkpoint_path}': {e}")
+
+# =================================================================
+# BUILD PROFILING
+# =================================================================
+
+# Profiler of the build running in this thread (see count_fs_call)
+_PROFILE_STATE = threading.local()
+
+def count_fs_call(name, count=1):
+    """
+    Counts a filesystem call for the --profile report of the build running
+    in this thread. Called at main.py's own I/O points (FsSnapshot, the
+    caches, the settings and output writers): other threads and library
+    I/O are never counted, and nothing is done when no build is profiled.
+    """
+    profiler = getattr(_PROFILE_STATE, 'profiler', None)
+    if profiler is not None:
+        profiler.count(name, count)
+
+class PhaseProfiler:
+    """
+    Records the wall time of each build phase (returned by build() in
+    BuildResult.timings) and, when enabled with --profile, the number of
+    filesystem calls and the JSON report. Calls are reported by
+    count_fs_call, so a disabled profiler only costs one perf_counter
+    call per phase boundary.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.phases = [] # [name, started, wall_ms, {call: count}]
+        self._current = None
+        self._previous = None
+        self._started = None
+
+    def count(self, name, count=1):
+        if self._current is not None:
+            calls = self._current[3]
+            calls[name] = calls.get(name, 0) + count
+
+    def start(self):
+        self._started = time.perf_counter()
+        if self.enabled:
+            # Nested builds (a build started by a build) restore the outer profiler
+            self._previous = getattr(_PROFILE_STATE, 'profiler', None)
+            _PROFILE_STATE.profiler = self
+
+    def begin(self, name):
+        """Ends the current phase (if any) and starts a new one."""
+        self.end()
+        self._current = [name, time.perf_counter(), 0.0, {}]
+
+    def end(self):
+        if self._current is None:
+            return
+        self._current[2] = (time.perf_counter() - self._current[1]) * 1000
+        self.phases.append(self._current)
+        self._current = None
+
+    def stop(self):
+        """Ends the last phase and stops counting the calls of this thread."""
+        self.end()
+        if self.enabled and getattr(_PROFILE_STATE, 'profiler', None) is self:
+            _PROFILE_STATE.profiler = self._previous
+            self._previous = None
+
+    def report(self, report_path, **extra):
+        """
+        Stops profiling, writes the JSON report and prints a one-line summary.
+        """
+        self.stop()
+        if not self.enabled:
+            return
+        total_ms = (time.perf_counter() - self._started) * 1000
+
+        report = {
+            "script_version": SCRIPT_VERSION,
+            "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "total_ms": round(total_ms, 3),
+            "phases": [
+                {
+                    "name": name,
+                    "wall_ms": round(wall_ms, 3),
+                    # main.py's own call sites (count_fs_call), not OS syscalls
+                    "mainpy_fs_calls": sum(calls.values()),
+                    "mainpy_fs_calls_by_kind": dict(sorted(calls.items())),
+                }
+                for name, _started, wall_ms, calls in self.phases
+            ],
+        }
+        report.update(extra)
+
+        try:
+            with open(report_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=4)
+        except OSError as e:
+            logging.warning(f"Could not write profile report '{report_path}': {e}")
+
+        summary = " | ".join(
+            f"{phase['name']} {phase['wall_ms']:.1f}ms/{phase['mainpy_fs_calls']}" for phase in report["phases"]
+        )
+        print(f"Profile: total {total_ms:.1f}ms | {summary} (ms/main.py fs calls) -> {report_path}")
+
+    def timings(self):
+        """
+        Returns {phase name: wall ms} for the finished phases.
+        """
+        return {name: wall_ms for name, _started, wall_ms, _calls in self.phases}
+
 def find_config_dir_path(settings, json_keyConfig_name):
     """
     Searches for the configuration directory path (relative to CWD) within the 
@@ -221,35 +1176,13 @@ def find_config_dir_path(settings, json_keyConfig_name):
                 return None 
     return None
 
-def get_expected_paths(structure, base_path="."):
+def get_expected_paths(tree):
     """
-    Generates a list of expected folder paths from the JSON structure.
-    Uses 'name' as the folder name if present, otherwise 'type', and reconstructs 
-    the path recursively.
+    Returns the expected folder paths (relative to the project root) of the
+    compiled settings tree, parents before children. Every node with a folder
+    name is expected, whatever its 'is_include' status.
     """
-    expected_paths = []
-    for item in structure:
-        # Use the new validation function
-        include_status = is_valid_include_setting(item)
-        if include_status == 'ERROR':
-            raise ValueError(f"Validation Error: 'is_include' key must be 'true' or 'false' (current: {item.get('is_include')}) in element: {item.get('type')}.")
-        
-        # If 'is_include' is 'false', we do not include the path.
-        if include_status is False:
-            # We include the path, but we will NOT include its AHK includes later.
-            pass # Continue to check children as they might be "true"
-        
-        item_folder_name = get_folder_name(item)
-        
-        # The folder must always be checked/created if it has a valid folder name.
-        if item_folder_name:
-            current_path = os.path.join(base_path, item_folder_name)
-            expected_paths.append(current_path)
-            if item.get('children'):
-                # Recursion, regardless of the parent's 'is_include' status
-                expected_paths.extend(get_expected_paths(item['children'], current_path))
-                
-    return expected_paths
+    return [node.rel_path for node in tree.walk() if node.rel_path]
 
 def compare_structure(expected_paths, is_initial_run):
     """
@@ -268,15 +1201,12 @@ def compare_structure(expected_paths, is_initial_run):
 
         if not is_initial_run:
             # Only ask for confirmation if it's not a forced initial run
-            root = Tk()
-            root.withdraw()
             msg = (
                 f"WARNING: {len(missing_folders)} folders from the expected structure are missing.\n\n"
                 f"Do you want the script to create them now?\n"
                 f"(Cancel will stop the script)."
             )
-            response = messagebox.askyesno("Structure Check", msg)
-            root.destroy()
+            response = ask_yes_no_dialog("Structure Check", msg)
 
             if not response:
                 logging.info("Structure creation cancelled by user.")
@@ -284,79 +1214,71 @@ def compare_structure(expected_paths, is_initial_run):
     
     return missing_folders
 
-def create_structure(settings):
+def create_structure(tree, snapshot=None):
     """
-    Creates folders based on the structure defined in settings.json.
+    Creates folders based on the compiled settings tree.
     Creation is unconditional regarding 'is_include', as the folder
-    must exist for the structure.
+    must exist for the structure. Existing folders are verified against
+    the shared FsSnapshot, so os.makedirs only runs for missing ones.
     """
     logging.info("Starting folder structure creation...")
-    
-    def recursive_create(structure, base_path="."):
-        for item in structure:
-            # 1. Key validation, but no action here.
-            # The validation error is raised in get_expected_paths, which main_build intercepts.
-            include_status = is_valid_include_setting(item)
-            
-            # If status is ERROR, do nothing for creation/recursion
-            # as the process will stop in main_build shortly.
-            if include_status == 'ERROR':
-                continue
-                
-            item_folder_name = get_folder_name(item)
-            
-            if item_folder_name:
-                folder_path = os.path.join(base_path, item_folder_name)
-                try:
-                    # 2. Folder creation/verification (ALWAYS DONE)
-                    os.makedirs(folder_path, exist_ok=True)
-                    logging.info(f"Folder created/verified: {folder_path}")
-                except Exception as e:
-                    logging.error(f"Error creating folder {folder_path}: {e}")
-                    raise # Rethrow the error to the main function
-                
-                # 3. Recursion (ALWAYS DONE)
-                if item.get('children'):
-                    recursive_create(item['children'], folder_path)
+    if snapshot is None:
+        snapshot = FsSnapshot(tree.root)
 
-    try:
-        recursive_create(settings.get('structure', []))
-        logging.info("Folder structure creation finished.")
-    except Exception:
-        # Ensure the script stops on a folder creation error
-        exit_script(EXIT_CODE_ERROR)
+    # Parents are visited before their children
+    for node in tree.walk():
+        if not node.rel_path:
+            continue
+        try:
+            if snapshot.is_dir(node.rel_path):
+                logging.debug(f"Folder verified: {node.rel_path}")
+            else:
+                count_fs_call('makedirs')
+                os.makedirs(node.abs_path, exist_ok=True)
+                snapshot.mark_created(node.rel_path)
+                logging.info(f"Folder created: {node.rel_path}")
+        except Exception as e:
+            logging.error(f"Error creating folder {node.rel_path}: {e}")
+            # Ensure the build stops on a folder creation error
+            raise BuildError(f"Error creating folder {node.rel_path}: {e}") from e
+    logging.info("Folder structure creation finished.")
 
-def remove_missing_entries(structure_list, base_path="."):
+def remove_missing_entries(structure_list, base_path=".", snapshot=None):
     """
-    Recursively scans the structure_list. If a folder defined in the list
-    does not exist on the disk, it is removed from the list.
+    Scans the structure_list and its children (TreeWalk, no recursion). If
+    a folder defined in the list does not exist on the disk, it is removed
+    from the list.
     
     Returns:
         bool: True if modifications were made, False otherwise.
     """
+    if snapshot is None:
+        snapshot = FsSnapshot(os.getcwd())
+
+    def backwards(items):
+        # Iterate backwards to allow safe deletion from the list while looping
+        return ((items, i) for i in range(len(items) - 1, -1, -1))
+
     modified = False
-    # Iterate backwards to allow safe deletion from the list while looping
-    for i in range(len(structure_list) - 1, -1, -1):
-        item = structure_list[i]
+    walk = TreeWalk(backwards(structure_list), base_path)
+    for (items, i), parent_path in walk:
+        item = items[i]
         
         item_folder_name = get_folder_name(item)
         if not item_folder_name:
             continue
 
-        current_path = os.path.join(base_path, item_folder_name)
+        current_path = os.path.join(parent_path, item_folder_name)
         
         # Check existence
-        if not os.path.exists(current_path):
+        if not snapshot.exists(current_path):
             # FOLDER MISSING: Remove from JSON structure silently
             logging.info(f"Sync: Folder '{current_path}' not found on disk. Removing from settings.")
-            del structure_list[i]
+            del items[i]
             modified = True
-        else:
-            # FOLDER EXISTS: Check children recursively
-            if item.get('children'):
-                # If children are modified, bubble up the True flag
-                if remove_missing_entries(item['children'], current_path):
-                    modified = True
+        elif item.get('children'):
+            # FOLDER EXISTS: Check its children before its previous siblings
+            walk.descend(backwards(item['children']), current_path)
                     
     return modified
 
@@ -367,18 +1289,40 @@ def clean_ahk_path(path_to_clean):
     """
     return path_to_clean.replace(os.sep, "\\\\")
 
-def post_build_actions(source_path, json_data, is_initial_run, StartAHKScriptOutput):
+def get_python_interpreter_info():
+    """
+    Describes the interpreter running this script, recorded in paths.ahk so the
+    launcher can reuse it instead of probing 'python', 'py' and 'python3'.
+
+    Returns:
+        tuple or None: (absolute path, version, mtime stamp as YYYYMMDDHHMISS)
+        or None when the interpreter path is unknown (embedded Python).
+    """
+    executable = sys.executable
+    if not executable or not os.path.isfile(executable):
+        return None
+    version = ".".join(str(part) for part in sys.version_info[:3])
+    try:
+        # Same format and local time as AHK's FileGetTime(path, "M")
+        stamp = time.strftime("%Y%m%d%H%M%S", time.localtime(os.path.getmtime(executable)))
+    except OSError:
+        return None
+    return os.path.abspath(executable), version, stamp
+
+def post_build_actions(source_path, json_data, is_initial_run, StartAHKScriptOutput, project_root, pathfile, changed_outputs=None):
     """
     Handles final actions: moves settings.json on initial run and writes the
-    root 'paths.ahk' file with a relative path to settings.json for portability.
+    root 'paths.ahk' file (pathfile) with a relative path to settings.json
+    for portability, and the Python interpreter that ran the build.
+    Written files are appended to 'changed_outputs'.
     """
     # 1. Find the config directory path
     config_relative_path = find_config_dir_path(json_data, json_keyConfig)
     if not config_relative_path:
         logging.error(f"Could not find the configuration directory path ('type': '{json_keyConfig}') in settings.json during post-build.")
-        exit_script(EXIT_CODE_ERROR)
+        raise BuildError(f"Configuration folder ('type': '{json_keyConfig}') not found in settings.json.")
 
-    config_absolute_path = os.path.join(os.getcwd(), config_relative_path)
+    config_absolute_path = os.path.join(project_root, config_relative_path)
     
     # 2. Define the destination for settings.json
     json_destination_path = os.path.join(config_absolute_path, SETTINGS_FILE)
@@ -388,15 +1332,17 @@ def post_build_actions(source_path, json_data, is_initial_run, StartAHKScriptOut
         try:
             shutil.move(source_path, json_destination_path)
             logging.info(f"Successfully moved '{os.path.basename(source_path)}' to '{config_relative_path}'.")
+            if changed_outputs is not None:
+                changed_outputs.append(json_destination_path)
         except Exception as e:
             logging.error(f"Error moving '{os.path.basename(source_path)}' to '{config_relative_path}': {e}")
-            exit_script(EXIT_CODE_ERROR)
+            raise BuildError(f"Could not move settings.json to '{config_relative_path}': {e}") from e
     
     # 4. Write the PATHFILE (e.g., paths.ahk) to the ROOT directory
-    pathfile_output_path = os.path.join(os.getcwd(), PATHFILE)
+    pathfile_output_path = os.path.join(project_root, pathfile)
     
     # Create a relative path for settings.json from the project root for AHK
-    settings_path_for_ahk = os.path.relpath(json_destination_path, os.getcwd())
+    settings_path_for_ahk = os.path.relpath(json_destination_path, project_root)
     settings_path_for_ahk = settings_path_for_ahk.replace(os.sep, "\\")
 
     # The content for paths.ahk using the relative path
@@ -404,29 +1350,378 @@ def post_build_actions(source_path, json_data, is_initial_run, StartAHKScriptOut
         f'{AHK_VAR_SETTINGS} := "{settings_path_for_ahk}"\n'
         f'{AHK_VAR_FINAL_SCRIPT} := "{StartAHKScriptOutput}"'
     )
+    python_info = get_python_interpreter_info()
+    if python_info:
+        python_path, python_version, python_stamp = python_info
+        pathfile_content += (
+            f'\n{AHK_VAR_PYTHON_CMD} := "{python_path}"'
+            f'\n{AHK_VAR_PYTHON_VERSION} := "{python_version}"'
+            f'\n{AHK_VAR_PYTHON_STAMP} := "{python_stamp}"'
+        )
     
     try:
         # Check if the file exists and if its content is the same to avoid unnecessary writes
         rewrite = True
+        count_fs_call('stat')
         if os.path.exists(pathfile_output_path):
+            count_fs_call('open')
             with open(pathfile_output_path, 'r', encoding='utf-8') as f:
                 if f.read().strip() == pathfile_content.strip():
                     rewrite = False
-                    logging.info(f"'{PATHFILE}' is already up-to-date. Skipping write.")
+                    logging.info(f"'{pathfile}' is already up-to-date. Skipping write.")
         
         if rewrite:
+            count_fs_call('open')
             with open(pathfile_output_path, 'w', encoding='utf-8') as f:
                 f.write(pathfile_content)
-            logging.info(f"Successfully wrote configuration to '{PATHFILE}'.")
+            logging.info(f"Successfully wrote configuration to '{pathfile}'.")
+            if changed_outputs is not None:
+                changed_outputs.append(pathfile_output_path)
             
     except Exception as e:
-        logging.error(f"Error writing to '{PATHFILE}': {e}")
-        exit_script(EXIT_CODE_ERROR)
+        logging.error(f"Error writing to '{pathfile}': {e}")
+        raise BuildError(f"Could not write '{pathfile}': {e}") from e
         
     # Return the absolute path for the rest of the Python script's execution,
     # and the relative path for the config directory.
     return json_destination_path, config_relative_path
 
+def write_scan_report(report_path, tree, snapshot, ahk_index=None, slowest_count=SCAN_REPORT_SLOWEST_DIRS):
+    """
+    Writes the scan statistics of a build (--scan-report) as JSON: for each
+    settings node, its effective 'Active' context and 'is_include', the .ahk
+    files found in its folder with their total size, and the time spent
+    listing the folder; then the slowest directories listed by the build,
+    whether they are nodes or not. Folders never listed (not included, or
+    restored from the build cache) have no time.
+    """
+    node_names = {}
+    nodes = []
+    for node in tree.walk():
+        name = '.'.join((tree.root_name,) + node.class_path)
+        folder = node.include_dir or node.rel_path
+        entry = {
+            "node": name,
+            "path": folder,
+            "active": include_context(node),
+            "is_include": node.include_effective,
+            "files": None,
+            "bytes": None,
+            "list_ms": None,
+            "listed": False,
+        }
+        if folder is not None:
+            key = FsSnapshot._key(folder)
+            node_names.setdefault(key, name)
+            if snapshot.peek(folder) is not None:
+                ahk_files = snapshot.ahk_files(folder)
+                entry["files"] = len(ahk_files)
+                if ahk_index is not None:
+                    # Sizes recorded by the AHK index: no extra stat
+                    sizes = [ahk_index.file_size(os.path.relpath(os.path.join(tree.root, folder, item_name), ahk_index.project_root))
+                             for item_name in ahk_files]
+                    entry["bytes"] = sum(size for size in sizes if size) if any(size is not None for size in sizes) else None
+            if key in snapshot.list_ms:
+                entry["list_ms"] = round(snapshot.list_ms[key], 3)
+                entry["listed"] = True
+        nodes.append(entry)
+
+    slowest = sorted(snapshot.list_ms.items(), key=lambda item: item[1], reverse=True)[:slowest_count]
+    report = {
+        "script_version": SCRIPT_VERSION,
+        "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "folders_listed": snapshot.listed_count,
+        "folders_reused": snapshot.reused_count,
+        "list_ms_total": round(sum(snapshot.list_ms.values()), 3),
+        "nodes": nodes,
+        "slowest_dirs": [
+            {"path": path, "list_ms": round(elapsed_ms, 3), "node": node_names.get(path)}
+            for path, elapsed_ms in slowest
+        ],
+    }
+    try:
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=4)
+    except OSError as e:
+        logging.warning(f"Could not write scan report '{report_path}': {e}")
+        return
+    if slowest:
+        path, elapsed_ms = slowest[0]
+        print(f"[scan] {len(nodes)} nodes, {snapshot.listed_count} folders listed in {report['list_ms_total']:.1f} ms "
+              f"(slowest: {path}, {elapsed_ms:.1f} ms). Report: {report_path}")
+    else:
+        print(f"[scan] {len(nodes)} nodes, no folder listed (all restored from the build cache). Report: {report_path}")
+
+# =================================================================
+# COMPILED SETTINGS TREE
+# =================================================================
+
+class TreeWalk:
+    """
+    Depth-first walk of a nested structure (settings.json items, compiled
+    SettingsNode) with an explicit stack instead of recursion: no recursion
+    limit, and memory bounded by the depth (one sibling iterator per open
+    level, the children lists are never copied). Items come in document
+    order, each parent before its children, as with a recursive walk.
+
+        walk = TreeWalk(roots, state)
+        for item, state in walk:
+            walk.descend(children, child_state) # Optional: visit them next
+
+    'state' is shared by the items of one level (e.g. their parent path), so
+    prefixes are built once per parent. 'on_exit' is called once the
+    children given to descend() are done (e.g. to close an AHK class).
+    """
+    __slots__ = ('_stack', '_pending')
+
+    def __init__(self, roots, state=None):
+        self._stack = [(iter(roots), state, None)]
+        self._pending = None
+
+    def descend(self, children, state=None, on_exit=None):
+        """Visits 'children' right after the current item, with 'state'."""
+        self._pending = (iter(children), state, on_exit)
+
+    def __iter__(self):
+        stack = self._stack
+        while stack:
+            siblings, state, on_exit = stack[-1]
+            for item in siblings:
+                self._pending = None
+                yield item, state
+                if self._pending is not None:
+                    stack.append(self._pending)
+                    self._pending = None
+                    break
+            else:
+                stack.pop()
+                if on_exit is not None:
+                    on_exit()
+
+_SETTINGS_NODE_FIELDS = (
+    'raw', 'type', 'folder_name', 'is_include', 'is_path',
+    'rel_path', 'abs_path', 'scan_ignored',
+    'include_dir', 'include_effective', 'active', 'class_path',
+    'emits_path', 'children', 'path_children',
+)
+
+class SettingsNode(namedtuple('SettingsNode', _SETTINGS_NODE_FIELDS)):
+    """
+    One settings.json node, resolved once by compile_settings_tree and
+    read-only afterwards (a tuple: no per-node dict, no setter). Every
+    traversal reads these fields instead of re-validating the raw dict.
+
+    Disk view (folders to create, sync and scan):
+        rel_path / abs_path: folder of the node, None if it has no folder
+        name (or a parent has none); scan_ignored: the node or one of its
+        parents has 'is_include': 'false'.
+    Include view (#include generation):
+        include_dir: folder scanned for .ahk files, None if the node is not
+        scanned (Configuration node, no 'type', invalid 'is_include');
+        include_effective: the node and all its parents are included;
+        active: effective 'Active' context (inherited); class_path: the
+        'type' chain used in the "Source:" comments.
+    Path view (A_Path generation):
+        emits_path: the node has a 'type' and a valid 'is_path': 'true';
+        path_children: the children that emit a path.
+    """
+    __slots__ = ()
+
+class SettingsTree:
+    """
+    The compiled settings.json: top-level nodes, root values and every
+    validation problem found during compilation.
+    'errors' are fatal (invalid 'is_include'), 'warnings' are not
+    (the node is only left out of the A_Path class).
+    'include_mode' is one of INCLUDE_MODES, 'path_mode' one of PATH_MODES;
+    'path_map' is True when A_Path.ByName must be emitted.
+    """
+    __slots__ = ('root', 'root_name', 'root_values', 'nodes', 'errors', 'warnings', 'include_mode',
+                 'path_mode', 'path_map')
+
+    def __init__(self, root, root_name, root_values, nodes, errors, warnings, include_mode="includes",
+                 path_mode="classes", path_map=False):
+        self.root = root
+        self.root_name = root_name
+        self.root_values = root_values
+        self.nodes = nodes
+        self.errors = errors
+        self.warnings = warnings
+        self.include_mode = include_mode
+        self.path_mode = path_mode
+        self.path_map = path_map
+
+    def walk(self):
+        """
+        Yields every node, depth-first, in settings.json order.
+        """
+        walk = TreeWalk(self.nodes)
+        for node, _ in walk:
+            yield node
+            walk.descend(node.children)
+
+def report_settings_problems(tree):
+    """
+    Logs the validation problems collected by compile_settings_tree.
+
+    Returns:
+        bool: True if the tree has no fatal error.
+    """
+    for message in tree.warnings:
+        logging.warning(message)
+    for message in tree.errors:
+        logging.error(f"Validation Error: {message}")
+    return not tree.errors
+
+def _join_relative(parent, name):
+    """
+    Normalized relative path of 'name' under 'parent' (os.curdir for the project root).
+    """
+    if parent == os.curdir:
+        return os.path.normpath(name)
+    return os.path.normpath(parent + os.sep + name)
+
+def compile_settings_tree(settings, project_root, json_keyConfig_name=None, snapshot=None, ignore_matcher=None):
+    """
+    Compiles the settings.json dict into a SettingsTree, validating each
+    node in the same single pass. The raw dict is not modified: compile it
+    again after editing it (sync, folders added to settings.json).
+
+    A node with "collapsed": "true" gets one child per sub-folder on disk
+    (except hidden and ignored ones), read from 'snapshot' (FsSnapshot) and
+    collapsed in turn: the whole subtree mirrors the disk without being
+    written to settings.json. Without a snapshot, they are not expanded.
+    """
+    if json_keyConfig_name is None:
+        json_keyConfig_name = json_keyConfig
+
+    errors = []
+    warnings = []
+    matchers = [ignore_matcher] # Loaded on the first collapsed node
+
+    def expand_collapsed(item, rel_path):
+        children = list(item.get('children') or [])
+        dir_listing = snapshot.listing(rel_path)
+        if dir_listing is None:
+            return children
+        if matchers[0] is None:
+            matchers[0] = load_ignore_matcher(project_root, settings)
+        named = {os.path.normcase(get_folder_name(child) or "") for child in children}
+        for name in dir_listing.dirs:
+            if (name.startswith('.') or os.path.normcase(name) in named
+                    or matchers[0].is_ignored_dir(os.path.join(rel_path, name))):
+                continue
+            children.append({"type": name, "is_include": "true", "is_path": "true", "collapsed": "true"})
+        return children
+
+    def finish_node(siblings, fields, children):
+        # Called once the children are compiled: the node tuple is immutable
+        children = tuple(children)
+        siblings.append(SettingsNode(
+            children=children,
+            path_children=tuple(child for child in children if child.emits_path),
+            **fields,
+        ))
+
+    # Each level shares (disk parent, include parent, include inherited, class prefix,
+    # inherited 'Active', parent ignored, list receiving the compiled nodes)
+    nodes = []
+    walk = TreeWalk(settings.get('structure', []), (os.curdir, os.curdir, True, (), None, False, nodes))
+    for item, level in walk:
+        disk_parent, include_parent, include_inherited, class_prefix, inherited_active, parent_ignored, siblings = level
+        node_type = item.get('type')
+        folder_name = get_folder_name(item)
+        include_status = is_valid_include_setting(item)
+        path_status = is_valid_path_setting(item)
+
+        if include_status == 'ERROR':
+            errors.append(f"'is_include' key must be 'true' or 'false' (current: {item.get('is_include')}) in element: {node_type}.")
+        if not node_type:
+            warnings.append(f"Item skipped for AHK path class, 'type' is missing: {item}")
+        elif path_status == 'ERROR':
+            warnings.append(f"Invalid 'is_path' value for type '{node_type}'. Skipping class/var generation.")
+
+        # Disk view: nodes without a folder name are skipped with their children
+        rel_path = None
+        abs_path = None
+        scan_ignored = parent_ignored or include_status is False
+        if disk_parent is not None and folder_name:
+            rel_path = _join_relative(disk_parent, folder_name)
+            abs_path = os.path.join(project_root, rel_path)
+
+        # Include view: the Configuration node and nodes without 'type' are not
+        # scanned, their children are looked up from the parent's folder instead
+        active = item.get("Active", inherited_active)
+        include_dir = None
+        include_effective = False
+        child_include_parent = None
+        child_include_inherited = True
+        child_class_prefix = class_prefix
+        if include_parent is not None and include_status != 'ERROR':
+            if node_type == json_keyConfig_name or not node_type:
+                child_include_parent = include_parent
+            else:
+                include_dir = rel_path if include_parent == disk_parent else _join_relative(include_parent, folder_name)
+                include_effective = include_inherited and include_status
+                child_include_parent = include_dir
+                child_include_inherited = include_effective
+                child_class_prefix = class_prefix + (node_type,)
+
+        raw_children = item.get('children') or []
+        if snapshot is not None and rel_path is not None and item.get('collapsed') == "true":
+            raw_children = expand_collapsed(item, rel_path)
+
+        fields = dict(
+            raw=item,
+            type=node_type,
+            folder_name=folder_name,
+            is_include=include_status,
+            is_path=path_status,
+            rel_path=rel_path,
+            abs_path=abs_path,
+            scan_ignored=scan_ignored,
+            include_dir=include_dir,
+            include_effective=include_effective,
+            active=active,
+            class_path=child_class_prefix if include_dir is not None else class_prefix,
+            emits_path=bool(node_type) and path_status is True,
+        )
+        children = []
+        walk.descend(
+            raw_children,
+            (rel_path, child_include_parent, child_include_inherited, child_class_prefix, active, scan_ignored, children),
+            partial(finish_node, siblings, fields, children),
+        )
+    nodes = tuple(nodes)
+    root_values = tuple((key, val) for key, val in settings.items() if key not in SETTINGS_RESERVED_KEYS)
+
+    include_mode = settings.get(SETTINGS_INCLUDE_MODE_KEY, INCLUDE_MODES[0])
+    if include_mode not in INCLUDE_MODES:
+        warnings.append(f"'{SETTINGS_INCLUDE_MODE_KEY}' must be one of {', '.join(INCLUDE_MODES)} (current: {include_mode}). Using '{INCLUDE_MODES[0]}'.")
+        include_mode = INCLUDE_MODES[0]
+
+    path_mode = settings.get(SETTINGS_PATH_MODE_KEY, PATH_MODES[0])
+    if path_mode not in PATH_MODES:
+        warnings.append(f"'{SETTINGS_PATH_MODE_KEY}' must be one of {', '.join(PATH_MODES)} (current: {path_mode}). Using '{PATH_MODES[0]}'.")
+        path_mode = PATH_MODES[0]
+
+    path_map = str(settings.get(SETTINGS_PATH_MAP_KEY, "false")).lower()
+    if path_map not in ("true", "false"):
+        warnings.append(f"'{SETTINGS_PATH_MAP_KEY}' must be \"true\" or \"false\" (current: {settings[SETTINGS_PATH_MAP_KEY]}). Using \"false\".")
+        path_map = "false"
+
+    return SettingsTree(
+        project_root,
+        settings.get("RootName", "Unknown_Root"),
+        root_values,
+        nodes,
+        errors,
+        warnings,
+        include_mode,
+        path_mode,
+        path_map == "true",
+    )
+
 # =================================================================
 # HELPER FUNCTIONS FOR SETTINGS.AHK GENERATION
 # =================================================================
@@ -475,98 +1770,74 @@ def is_valid_path_setting(item):
     else:
         return 'ERROR' # Invalid string
 
-def generate_nested_path_structure(structure_list, parent_class_path_str, parent_base_str, indent_level):
+def generate_nested_path_structure(nodes, parent_class_path_str, parent_base_str, indent_level, parent_rel_path=None, path_map=None):
     """
-    Recursive function to generate AHK code for a NESTED class structure,
-    mimicking the sample.ahk file.
+    Generates the AHK code for a NESTED class structure, mimicking the
+    sample.ahk file (walked with TreeWalk: no recursion limit on deep trees).
     
     Args:
-        structure_list (list): The list of node items (from settings.json).
+        nodes (tuple): The SettingsNode items (from the compiled settings tree).
         parent_class_path_str (str): The AHK path of the parent class (e.g., "A_Path" or "A_Path.Library").
         parent_base_str (str): The AHK variable for the parent's base path (e.g., "A_Path.rootDir" or "A_Path.Library._base").
         indent_level (int): The current indentation level.
+        parent_rel_path (str, optional): 'literal' path mode: the parent folder relative
+            to A_ScriptDir, with a leading backslash ("" for the root). Every path is then
+            written as A_ScriptDir followed by one literal, instead of through parent_base_str.
+        path_map (list, optional): Receives a (dotted name, AHK expression) pair for each path.
     """
     ahk_code_lines = []
-    indent = "    " * indent_level
 
-    for item in structure_list:
-        class_type = item.get("type")
-        if not class_type:
-            logging.warning(f"Item skipped for AHK path class, 'type' is missing: {item}")
-            continue
-        
-        # --- Check if THIS path should be included at all ---
-        path_status = is_valid_path_setting(item)
-        if path_status == 'ERROR':
-            logging.error(f"Invalid 'is_path' value for type '{class_type}'. Skipping class/var generation.")
-            continue
-        if path_status is False:
-            logging.info(f"Skipping AHK path generation for '{class_type}' (is_path: false).")
-            continue
-        # --- End Check ---
-        
-        item_folder_name = get_folder_name(item)
-        if not item_folder_name:
-            logging.warning(f"Item type '{class_type}' has no folder name ('name' or 'type'). Skipping path generation.")
+    # Each level shares (class path, base variable, indent, literal folder)
+    walk = TreeWalk(nodes, (parent_class_path_str, parent_base_str, "    " * indent_level, parent_rel_path))
+    for node, (parent_class_path_str, parent_base_str, indent, parent_rel_path) in walk:
+        # Invalid 'type' / 'is_path' values were reported when the tree was compiled
+        if not node.emits_path:
+            if node.type and node.is_path is False:
+                logging.info(f"Skipping AHK path generation for '{node.type}' (is_path: false).")
             continue
 
-        ahk_path_segment = f'\\{item_folder_name}'
+        ahk_path_segment = f'\\{node.folder_name}'
+        if parent_rel_path is not None:
+            node_rel_path = parent_rel_path + ahk_path_segment
+            node_path_expr = f'A_ScriptDir "{node_rel_path}"'
+        else:
+            node_rel_path = None
+            node_path_expr = None
+        if path_map is not None:
+            # A class node holds its path in '_base'
+            node_ref = f"{parent_class_path_str}.{node.type}" + ("._base" if node.path_children else "")
+            dotted_name = f"{parent_class_path_str}.{node.type}".split(".", 1)[1]
+            path_map.append((dotted_name, node_path_expr or node_ref))
         
-        # --- NOUVELLE LOGIQUE : PRÉ-FILTRER LES ENFANTS ---
-        children = item.get("children", [])
-        valid_path_children = []
-        if children:
-            for child in children:
-                # Vérifier si cet enfant va réellement générer un chemin
-                child_class_type = child.get("type")
-                if not child_class_type:
-                    continue
-                
-                child_path_status = is_valid_path_setting(child)
-                if child_path_status == 'ERROR' or child_path_status is False:
-                    continue
-                    
-                if not get_folder_name(child):
-                    continue
-                
-                # Si on arrive ici, l'enfant est valide
-                valid_path_children.append(child)
-        # --- Fin de la nouvelle logique ---
-
-        # MODIFIÉ : Vérifier la liste pré-filtrée
-        if valid_path_children:
+        # Les enfants qui génèrent un chemin sont déjà filtrés dans l'arbre compilé
+        if node.path_children:
             # --- This item has valid children, so it becomes a CLASS ---
-            current_class_name = class_type
+            current_class_name = node.type
             
             # 1. Start Class definition
             ahk_code_lines.append(f'\n{indent}class {current_class_name} extends A_Path.PathNode')
             ahk_code_lines.append(f'{indent}{{')
             
             # 2. Define its 'static _base'
-            line = f'{indent}    static _base := {parent_base_str} "{ahk_path_segment}"'
+            if node_path_expr:
+                line = f'{indent}    static _base := {node_path_expr}'
+            else:
+                line = f'{indent}    static _base := {parent_base_str} "{ahk_path_segment}"'
             ahk_code_lines.append(line)
+            ahk_code_lines.append(f'') # Add a newline for readability
             
-            # 3. Recurse for its children
+            # 3. Its children (all emit a path) come next, 4. then the class is closed
             new_parent_class_path = f"{parent_class_path_str}.{current_class_name}"
             new_parent_base_str = f"{new_parent_class_path}._base"
-            
-            child_lines = generate_nested_path_structure(
-                valid_path_children, # MODIFIÉ : Utiliser la liste filtrée
-                new_parent_class_path,
-                new_parent_base_str,
-                indent_level + 1
+            walk.descend(
+                node.path_children,
+                (new_parent_class_path, new_parent_base_str, indent + "    ", node_rel_path),
+                partial(ahk_code_lines.append, f'{indent}}}'),
             )
             
-            if child_lines:
-                ahk_code_lines.append(f'') # Add a newline for readability
-                ahk_code_lines.extend(child_lines)
-            
-            # 4. Close Class
-            ahk_code_lines.append(f'{indent}}}')
-            
         else:
             # --- No valid children, so it becomes a STATIC VARIABLE ---
-            current_var_name = class_type
+            current_var_name = node.type
             
             # Determine the base variable (e.g., A_Path.rootDir or this._base)
             base_var_to_use = "this._base"
@@ -574,7 +1845,10 @@ def generate_nested_path_structure(structure_list, parent_class_path_str, parent
                 # This item is a direct child of A_Path (like Configuration)
                 base_var_to_use = parent_base_str # which is A_Path.rootDir
             
-            line = f'{indent}static {current_var_name} := {base_var_to_use} "{ahk_path_segment}"'
+            if node_path_expr:
+                line = f'{indent}static {current_var_name} := {node_path_expr}'
+            else:
+                line = f'{indent}static {current_var_name} := {base_var_to_use} "{ahk_path_segment}"'
             ahk_code_lines.append(line)
     
     return ahk_code_lines
@@ -604,183 +1878,275 @@ def is_valid_include_setting(item):
         # Any other string is invalid
         return 'ERROR'  
 
-def extract_ahk_generated_content(settings, FINAL_rootName, include_file_dir):
+def generate_ahk_content(tree, include_file_dir, snapshot=None, bundle=None, ahk_index=None):
     """
-    Generates the AHK lines for the NESTED class structure and the includes.
-
-    Returns:
-        tuple: (structure_lines, include_string)
+    Yields the lines of the include file (after its header): the NESTED class
+    structure, then the includes, from the compiled settings tree
+    ('bundle', 'ahk_index': see generate_ahk_includes). Joined with newlines by the writer.
     """
-    structure_lines = []
-    structure_list = settings.get("structure", [])
-    
+    yield f'#Requires AutoHotkey v2.0\n'
+
     # --- 1. New class structure generation (Nested) ---
-    if FINAL_rootName != "Unknown_Root":
+    if tree.root_name != "Unknown_Root":
+        yield f'\n; Configuration structure based on {SETTINGS_FILE}'
+
         # Start of the root class
-        structure_lines.append(f'class A_Path\n{{')
+        yield f'class A_Path\n{{'
         
         # Add the base rootDir
-        structure_lines.append(f"    static rootDir := A_ScriptDir")
+        yield f"    static rootDir := A_ScriptDir"
         
         # Add any other root-level properties from settings.json
         # (e.g., if you have "Version": "1.0" at the root of settings.json)
-        for key, val in settings.items():
-            if key not in ("structure", "RootName"):
-                formatted_val = format_ahk_value(val)
-                structure_lines.append(f"    static {key} := {formatted_val}")
+        for key, val in tree.root_values:
+            formatted_val = format_ahk_value(val)
+            yield f"    static {key} := {formatted_val}"
 
         # Add the helper PathNode class (from sample.ahk)
-        structure_lines.append(f'\n    class PathNode {{')
-        structure_lines.append(f'        static _base := ""')
-        structure_lines.append(f'        static __Call() {{')
-        structure_lines.append(f'            return this._base')
-        structure_lines.append(f'        }}')
-        structure_lines.append(f'    }}\n')
+        yield f'\n    class PathNode {{'
+        yield f'        static _base := ""'
+        yield f'        static __Call() {{'
+        yield f'            return this._base'
+        yield f'        }}'
+        yield f'    }}\n'
 
         # Recursive call for children path variables
-        path_var_lines = generate_nested_path_structure(
-            structure_list, 
+        path_map = [] if tree.path_map else None
+        yield from generate_nested_path_structure(
+            tree.nodes,
             "A_Path",         # parent_class_path_str
             "A_Path.rootDir", # parent_base_str
-            1                 # indent_level (starts at 1 for 4 spaces)
+            1,                # indent_level (starts at 1 for 4 spaces)
+            "" if tree.path_mode == "literal" else None,
+            path_map
         )
-        structure_lines.extend(path_var_lines)
+
+        # Flat lookup by dotted name: A_Path.ByName["Library.AHK.Core"]
+        if path_map:
+            yield f'\n    static {AHK_PATH_MAP_NAME} := Map('
+            yield ",\n".join(f'        "{name}", {expr}' for name, expr in path_map)
+            yield f'    )'
         
-        structure_lines.append(f'\n}}') # Close the root class
+        yield f'\n}}' # Close the root class
 
-    # --- 2. Generate #include directives (This part is unchanged) ---
-    base_project_dir = os.getcwd() 
-    include_string = generate_ahk_includes(structure_list, FINAL_rootName, base_project_dir, json_keyConfig, include_file_dir)
-    
-    return "\n".join(structure_lines), include_string
+    # --- 2. Generate #include directives ---
+    yield from generate_ahk_includes(tree, include_file_dir, snapshot, bundle, ahk_index)
+
+class BundleCache(SignatureCache):
+    """
+    Per-module cache of the 'bundle' include mode, stored next to the include
+    file: {include path: [mtime_ns, size, sha1, text]} (see SignatureCache).
+    'text' is None for modules that cannot be inlined and stay an #include
+    (see module_text).
+    """
+    label = "bundle cache"
+    # Modules that depend on their own file location or include other files
+    _NOT_INLINABLE = re.compile(r'^\s*#include|\bA_LineFile\b', re.IGNORECASE | re.MULTILINE)
+
+    def __init__(self, cache_path):
+        super().__init__(cache_path, BUNDLE_CACHE_VERSION, "modules")
+        self.inputs = {} # Absolute path -> [mtime_ns, size] of every bundled module
+        self.kept_count = 0 # Modules kept as #include
+        self.output_line = 1 # Line of the include file the next chunk starts at (see count_lines)
+
+    def count_lines(self, chunks, first_line):
+        """
+        Yields the chunks of the include file (joined with newlines by the
+        writer) from line 'first_line', keeping output_line up to date, so
+        the markers of a module can give the lines its content is written at.
+        """
+        self.output_line = first_line
+        for chunk in chunks:
+            yield chunk
+            self.output_line += chunk.count("\n") + 1
+
+    def _inline_text(self, full_path, data):
+        try:
+            text = data.decode('utf-8-sig').replace('\r\n', '\n').rstrip('\n')
+        except UnicodeDecodeError:
+            logging.warning(f"Bundle: '{full_path}' is not UTF-8. Kept as #include.")
+            return None
+        if self._NOT_INLINABLE.search(text):
+            logging.info(f"Bundle: '{full_path}' uses #include or A_LineFile. Kept as #include.")
+            return None
+        return text
+
+    def module_text(self, full_path, include_path):
+        """
+        Returns the content of the module to inline (BOM and trailing line
+        breaks removed), or None if it must stay an #include: not UTF-8, or
+        using #include or A_LineFile, whose meaning depends on the file.
+        A module is resolved once per build, even if the content is generated twice.
+        """
+        if include_path in self._used:
+            return self._used[include_path][3]
+        try:
+            entry = self.lookup(include_path, full_path, lambda data: self._inline_text(full_path, data))
+        except OSError as e:
+            logging.warning(f"Bundle: cannot read '{full_path}' ({e}). Kept as #include.")
+            self.read_count += 1
+            entry = self._used[include_path] = [None, None, None, None]
+
+        self.inputs[os.path.abspath(full_path)] = entry[:2]
+        if entry[3] is None:
+            self.kept_count += 1
+        return entry[3]
+
+def include_context(node):
+    """
+    Returns the WinActive condition the files of node are included under
+    (e.g., "ahk_exe Adobe Premiere Pro.exe"), or None when they are global
+    ('Active' missing or "Windows").
+    """
+    current_win_active = node.active
+    # Use None for all global conditions ("Windows" or none)
+    if current_win_active and current_win_active.lower() == "windows":
+        return None
+    elif current_win_active:
+        return current_win_active # Specific context (e.g., ahk_class Premiere Pro)
+    return None # Totally global context (no winActive)
 
-def generate_ahk_includes(structure_list, FINAL_rootName, base_dir, json_keyConfig_name, include_file_dir):
+def generate_ahk_includes(tree, include_file_dir, snapshot=None, bundle=None, ahk_index=None):
     """
-    Recursively scans the project structure for .ahk files and generates
-    #include declarations, grouped by Active context. Paths are relative
-    to the generated include file itself.
+    Scans the folders of the compiled settings tree for .ahk files and
+    yields the #include declarations, grouped by Active context. Paths are
+    relative to the generated include file itself.
+    With a BundleCache ('bundle' include mode), the content of each module
+    is inlined instead, between '; >>> Bundled:' and '; <<< End:' markers
+    that name its source and the lines of the include file its content is
+    written at (see BundleCache.count_lines), in the same order. Modules are only read when
+    their lines are yielded, so one module text is held at a time.
+    With the AHK index, the nested #include lines of the modules are
+    followed (see IncludeGraph): each file is emitted once, after the files
+    of its own source section it depends on. Files are never moved to
+    another section: a file that a nested #include already loaded keeps an
+    'Already included by' comment in its section, since AutoHotkey loads it
+    at the #include line, under the includer's #HotIf (a warning is
+    reported when that context differs from its folder's). The context
+    every file is actually loaded under is recorded in ahk_index.contexts.
     """
+    if snapshot is None:
+        snapshot = FsSnapshot(tree.root)
+
     # Use a dictionary to group includes by their WinActive condition.
     # The key None is reserved for global includes (no HotIf).
     grouped_includes = {}
 
-    def find_files_recursive(node_list, fs_path_prefix, ahk_path_prefix, inherited_win_active=None, inherited_include_status=True):
-        """Recursive helper to find and sort files."""
-        
-        for node in node_list:
-            node_type = node.get("type")
+    # Same order as settings.json, parents before children
+    for node in tree.walk():
+        # 1. Nodes outside the include view (Configuration folder, no 'type',
+        # invalid 'is_include'): their children are still visited
+        if node.include_dir is None:
+            if node.type == json_keyConfig:
+                logging.info(f"Skipping include scan for node type: {node.type}")
+            continue
 
-            # Get the status of the current node (True, False, or 'ERROR')
-            node_include_status = is_valid_include_setting(node)
-        
-            if node_include_status == 'ERROR':
-                # Error is handled upstream, but this is a safety net.
-                logging.error(f"Include validation failed for node {node_type}. Skipping includes.")
-                continue
+        # 2. Scan for .ahk files in the node's path
+        found_ahk_files = []
+
+        # --- Scan condition with EFFECTIVE status ---
+        if node.include_effective and snapshot.is_dir(node.include_dir):
+            full_fs_path = os.path.join(tree.root, node.include_dir)
+            logging.debug(f"Scanning for AHK files in: {full_fs_path}")
+            # Iterate only the current directory (no recursion), from the snapshot
+            for item_name in snapshot.ahk_files(node.include_dir):
+                # Get the full absolute path of the found .ahk file
+                found_file_full_path = os.path.join(full_fs_path, item_name)
+                
+                # Create a relative path from the location of the generated include file
+                relative_path_for_include = os.path.relpath(found_file_full_path, include_file_dir)
+                
+                logging.debug(f"AHK file found: {relative_path_for_include}")
+                
+                # Format for AHK (backslashes)
+                ahk_include_path = relative_path_for_include.replace(os.sep, "\\")
+
+                # Use the new relative path
+                found_ahk_files.append((f'#include "{ahk_include_path}"', ahk_include_path, found_file_full_path))
+        elif not node.include_effective:
+            # This log confirms the scan was skipped due to 'false' inheritance
+            logging.info(f"Skipping AHK includes for node type: {node.type} (effective 'is_include': 'false')")
         
-            # The effective include status is a combination of inherited and local status.
-            # If inheritance is False, effective must be False.
-            current_effective_include_status = inherited_include_status and node_include_status
+        # 3. Assign found files to the correct list
+        if found_ahk_files:
+            context_key = include_context(node)
+
+            if context_key not in grouped_includes:
+                grouped_includes[context_key] = []
             
-            # Determine the winActive for this node: either its own or inherited.
-            current_win_active = node.get("Active", inherited_win_active)
-
-            # 1. Completely ignore the configuration directory
-            if node_type == json_keyConfig_name:
-                logging.info(f"Skipping include scan for node type: {node_type}")
-                if node.get("children"):
-                    find_files_recursive(node.get("children"), fs_path_prefix, ahk_path_prefix, current_win_active)
+            # Add a source comment for easier maintenance
+            source_path = '.'.join((tree.root_name,) + node.class_path)
+            grouped_includes[context_key].append(f"\n; --- Source: {source_path} ---")
+            grouped_includes[context_key].extend(sorted(found_ahk_files))
+
+    def emit(entry):
+        include_line, ahk_include_path, found_file_full_path = entry
+        module_text = bundle.module_text(found_file_full_path, ahk_include_path) if bundle else None
+        if module_text is None:
+            return include_line
+        # Line N of the module is at include line first_line + N - 1 (the marker line comes first)
+        first_line = bundle.output_line + 1
+        last_line = first_line + module_text.count("\n")
+        return (f"; >>> Bundled: {ahk_include_path} (include lines {first_line}-{last_line})\n"
+                f"{module_text}\n; <<< End: {ahk_include_path}")
+
+    graph = ahk_index.graph if ahk_index else None
+    loaded = {} # Relative path -> relative path of the file that loaded it (itself if emitted)
+
+    def expand(entries, context_key):
+        # Source comments are strings, modules are (include line, include path, full path).
+        # Each comment starts the section of one folder: dependencies only move up within it
+        sections = {}
+        section = 0
+        for entry in entries:
+            if isinstance(entry, str):
+                section += 1
+            else:
+                sections[os.path.relpath(entry[2], tree.root)] = (section, entry)
+        section = 0
+        for entry in entries:
+            if isinstance(entry, str):
+                section += 1
+                yield entry
                 continue
-                
-            if not node_type:
-                if node.get("children"):
-                    find_files_recursive(node.get("children"), fs_path_prefix, ahk_path_prefix, current_win_active)
+            if graph is None:
+                yield emit(entry)
                 continue
-                
-            # 2. Reconstruct the filesystem path (fs_path)
-            current_fs_path_segment = get_folder_name(node)
-            full_fs_path = os.path.normpath(os.path.join(base_dir, fs_path_prefix, current_fs_path_segment))
-            
-            # 3. Reconstruct the AHK class path (ahk_path)
-            current_ahk_path_list = ahk_path_prefix + [node_type]
-            
-            # 4. Scan for .ahk files in the node's path
-            found_ahk_files = []
-
-            # --- Scan condition with EFFECTIVE status ---
-            if current_effective_include_status is True and os.path.isdir(full_fs_path):
-                logging.debug(f"Scanning for AHK files in: {full_fs_path}")
-                # Iterate only the current directory (no recursion)
-                for item_name in os.listdir(full_fs_path):
-                    if item_name.lower().endswith(".ahk") and os.path.isfile(os.path.join(full_fs_path, item_name)):
-                        
-                        # Get the full absolute path of the found .ahk file
-                        found_file_full_path = os.path.join(full_fs_path, item_name)
-                        
-                        # Create a relative path from the location of the generated include file
-                        relative_path_for_include = os.path.relpath(found_file_full_path, include_file_dir)
-                        
-                        logging.debug(f"AHK file found: {relative_path_for_include}")
-                        
-                        # Format for AHK (backslashes)
-                        ahk_include_path = relative_path_for_include.replace(os.sep, "\\")
-
-                        # Use the new relative path
-                        found_ahk_files.append(f'#include "{ahk_include_path}"')
-            elif current_effective_include_status is False:
-                # This log confirms the scan was skipped due to 'false' inheritance
-                logging.info(f"Skipping AHK includes for node type: {node_type} (effective 'is_include': 'false')")
-            
-            # 5. Assign found files to the correct list
-            if found_ahk_files:
-                # Use None for all global conditions ("Windows" or none)
-                if current_win_active and current_win_active.lower() == "windows":
-                    context_key = None
-                    context_description = "Global (Windows/Always Active)"
-                elif current_win_active:
-                    context_key = current_win_active # Specific context (e.g., ahk_class Premiere Pro)
-                    context_description = current_win_active
-                else:
-                    context_key = None # Totally global context (no winActive)
-                    context_description = "Global (Always Active)"
 
-                if context_key not in grouped_includes:
-                    grouped_includes[context_key] = []
-                
-                # Add a source comment for easier maintenance
-                grouped_includes[context_key].append(f"\n; --- Source: {'.'.join(current_ahk_path_list)} ---")
-                grouped_includes[context_key].extend(sorted(found_ahk_files))
-
-            # 6. Recurse into children
-            if node.get("children"): 
-                # IMPORTANT: Pass the current_win_active to children
-                find_files_recursive(
-                    node.get("children"),
-                    os.path.join(fs_path_prefix, current_fs_path_segment),
-                    current_ahk_path_list,
-                    current_win_active,
-                    current_effective_include_status
-                )
-
-    # Initial call to the recursive helper
-    find_files_recursive(structure_list, '', [FINAL_rootName])
-    
-    # --- 7. Generation of the final includes content ---
-    final_includes = []
+            rel_path = os.path.relpath(entry[2], tree.root)
+            if rel_path in loaded:
+                if loaded[rel_path] != rel_path:
+                    yield f"; Already included by {loaded[rel_path]}: {entry[1]}"
+                    if ahk_index.contexts.get(rel_path) != context_key:
+                        graph.issues[f"'{rel_path}' is loaded by the #include of '{loaded[rel_path]}', "
+                                     f"under {ahk_index.contexts.get(rel_path) or 'the global context'} "
+                                     f"instead of {context_key or 'the global context'}."] = logging.WARNING
+                continue
+            for dep, parent in graph.load_order(rel_path, loaded):
+                dep_section, dep_entry = sections.get(dep, (None, None))
+                if dep_section == section:
+                    # Dependencies of the same section come first (topological order)
+                    yield emit(dep_entry)
+                    loaded[dep] = dep
+                else:
+                    loaded[dep] = parent
+                ahk_index.contexts[dep] = context_key
+    
+    # --- 4. Generation of the final includes content ---
     SECTION_SEPARATOR = "=" * 40
     
-    final_includes.append(f'\n; {SECTION_SEPARATOR}\n; --- AUTO-GENERATED SCRIPT INCLUDES ---\n; {SECTION_SEPARATOR}\n')
+    yield f'\n; {SECTION_SEPARATOR}\n; --- AUTO-GENERATED SCRIPT INCLUDES ---\n; {SECTION_SEPARATOR}\n'
     
     # A. Global Includes (key None) - Merged and without HotIf
     global_content = grouped_includes.pop(None, [])
     
     if global_content:
-        final_includes.append(f'; --- 1. Global Includes (Always Active) ---\n')
-        final_includes.extend(global_content)
+        yield f'; --- 1. Global Includes (Always Active) ---\n'
+        yield from expand(global_content, None)
         
     # B. Context-Sensitive Includes (All other keys)
     if grouped_includes:
-        final_includes.append(f'\n; --- 2. Context-Sensitive (HotIf) Includes ---\n')
+        yield f'\n; --- 2. Context-Sensitive (HotIf) Includes ---\n'
         
         # Sort keys for stable output order (alphabetical)
         sorted_keys = sorted(grouped_includes.keys())
@@ -790,104 +2156,198 @@ def generate_ahk_includes(structure_list, FINAL_rootName, base_dir, json_keyConf
             includes = grouped_includes[win_active_condition]
             
             # Start of the #HotIf block
-            final_includes.append(f'\n; --- Context: {win_active_condition} ---')
-            final_includes.append(f'#HotIf WinActive("{win_active_condition}")')
+            yield f'\n; --- Context: {win_active_condition} ---'
+            yield f'#HotIf WinActive("{win_active_condition}")'
             
             # Add the includes
-            final_includes.extend(includes)
+            yield from expand(includes, win_active_condition)
             
             # End of the #HotIf block
-            final_includes.append(f'#HotIf ; End context {win_active_condition}')
+            yield f'#HotIf ; End context {win_active_condition}'
             
     # Final reset to ensure no context persists in the script's main thread
-    final_includes.append("\n#HotIf ; Final context reset")
-    
-    return "\n".join(final_includes)
+    yield "\n#HotIf ; Final context reset"
 
 # =================================================================
 # GENERATION FUNCTION
 # =================================================================
 
-def generate_INCLUDE_OUTPUT(settings, Param_pathsAHK_jsonPathVar, is_initial_run, Param_StartAHKScriptOutput, config_path):
+def read_output_digest(file_path):
+    """
+    Returns the digest recorded in the header of a file written by
+    write_digested_output, or None (missing file, no digest line).
+    Only the first lines are read.
+    """
+    try:
+        count_fs_call('open')
+        with open(file_path, 'r', encoding='utf-8') as f:
+            for _ in range(OUTPUT_DIGEST_MAX_LINES):
+                line = f.readline()
+                if line.startswith(OUTPUT_DIGEST_PREFIX):
+                    return line[len(OUTPUT_DIGEST_PREFIX):].strip()
+    except (OSError, ValueError):
+        pass
+    return None
+
+def _join_output_lines(lines):
+    # Same text as "\n".join(lines), one chunk per line
+    separator = ""
+    for line in lines:
+        yield separator + line
+        separator = "\n"
+
+def write_digested_output(file_path, header, make_lines, previous_digest=None):
     """
-    Generates the INCLUDE_OUTPUT file (e.g., Includes.ahk) in the config directory,
-    including the class structure and #include directives based on settings.json.
+    Writes a generated file without holding its content in memory: the lines
+    returned by make_lines() (joined with newlines) are streamed into a SHA-1
+    hasher and a temporary file next to file_path together, after 'header'
+    and a '; Deepr-Digest:' line. The digest covers the lines only (not the
+    header, which holds the generation date). The temporary file is then
+    swapped in with os.replace, so file_path is never left half written.
+
+    When previous_digest is given (see read_output_digest), the lines are
+    first hashed without writing anything: if the digest and the size on disk
+    match, file_path and its directory are left untouched. make_lines is
+    called a second time only when the file must be written.
+
+    Returns:
+        bool: True if file_path was written.
+
+    Raises:
+        OSError: if it could not be written (file_path is unchanged).
     """
-    global INCLUDE_OUTPUT # Use the global variable for the output file name
+    if previous_digest is not None:
+        hasher = hashlib.sha1()
+        size = 0
+        newline_count = 0
+        for chunk in _join_output_lines(make_lines()):
+            data = chunk.encode('utf-8')
+            hasher.update(data)
+            size += len(data)
+            newline_count += chunk.count("\n")
+        if hasher.hexdigest() == previous_digest:
+            head = f"{header}\n{OUTPUT_DIGEST_PREFIX}{previous_digest}\n"
+            size += len(head.encode('utf-8'))
+            newline_count += head.count("\n")
+            # Text mode writes os.linesep for each newline
+            size += newline_count * (len(os.linesep) - 1)
+            try:
+                if os.path.getsize(file_path) == size:
+                    return False
+            except OSError:
+                pass
+
+    temp_path = f"{file_path}.{os.getpid()}.tmp"
+    hasher = hashlib.sha1()
+    try:
+        count_fs_call('open')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(f"{header}\n")
+            # Fixed-width placeholder, filled in once every line is hashed
+            digest_pos = f.tell()
+            f.write(f"{OUTPUT_DIGEST_PREFIX}{'0' * hasher.digest_size * 2}\n")
+            for chunk in _join_output_lines(make_lines()):
+                hasher.update(chunk.encode('utf-8'))
+                f.write(chunk)
+            f.seek(digest_pos)
+            f.write(f"{OUTPUT_DIGEST_PREFIX}{hasher.hexdigest()}")
+            f.flush()
+            os.fsync(f.fileno())
+        count_fs_call('replace')
+        os.replace(temp_path, file_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    return True
 
+def generate_INCLUDE_OUTPUT(tree, Param_pathsAHK_jsonPathVar, is_initial_run, Param_StartAHKScriptOutput, config_path, include_output, snapshot=None, changed_outputs=None, bundled_inputs=None, ahk_index=None):
+    """
+    Generates the include_output file (e.g., .includes.ahk) in the config directory,
+    including the class structure and #include directives based on the
+    compiled settings tree (see compile_settings_tree). The content is
+    streamed to the file (see write_digested_output), which is only replaced
+    when its digest changed, and appended to 'changed_outputs' in that case.
+    In 'bundle' include mode, the modules are inlined (see BundleCache) and
+    their stat signatures are added to 'bundled_inputs' ({path: [mtime_ns, size]}):
+    the include file depends on their content.
+    With the AHK index (see update_ahk_index), nested #include lines are
+    followed so that each file is included once (see generate_ahk_includes).
+    """
     # 1. Determination of the AHK INCLUDE FILE path to write
-    # This path (INCLUDE_OUTPUT) comes from sys.argv[4].
-    if not INCLUDE_OUTPUT:
-        logging.error("Global variable INCLUDE_OUTPUT is not defined. Cannot write AHK include file.")
-        exit_script(EXIT_CODE_ERROR)
+    if not include_output:
+        logging.error("The include file name is not defined. Cannot write AHK include file.")
+        raise BuildError("The include file name is not defined.")
 
     # Build the output path using the config folder
-    # config_path is (e.g., ".config"), INCLUDE_OUTPUT is (e.g., ".include.ahk")
-    FINAL_INCLUDE_FILE_PATH = os.path.join(os.getcwd(), config_path, INCLUDE_OUTPUT)
+    # config_path is (e.g., ".config"), include_output is (e.g., ".include.ahk")
+    FINAL_INCLUDE_FILE_PATH = os.path.join(tree.root, config_path, include_output)
     FINAL_INCLUDE_FILE_PATH = os.path.abspath(FINAL_INCLUDE_FILE_PATH) # Clean up
     
     # Get the directory where the include file will be written
     include_file_dir = os.path.dirname(FINAL_INCLUDE_FILE_PATH)
     
-    rootName = settings.get("RootName", "Unknown_Root")
+    rootName = tree.root_name
 
     # --- Debug variables ---
     logging.debug(f"DEBUG - rootName: {rootName}")
     logging.debug(f"DEBUG - FINAL_INCLUDE_FILE_PATH (File to Write): {FINAL_INCLUDE_FILE_PATH}")
 
-    # --- 2. Generate dynamic content (Classes and Includes) ---
-    # The rootName is used for the class (A_Path)
-    generated_structure_string, generated_include_string = extract_ahk_generated_content(settings, rootName, include_file_dir)
-    logging.debug(f"DEBUG - Generated structure and include strings created.")
+    # --- 2. Compare against the digest of the current file (if not initial run) ---
+    previous_digest = None
+    if not is_initial_run:
+        previous_digest = read_output_digest(FINAL_INCLUDE_FILE_PATH)
 
-    # --- 3. Reconstruction of the final AHK content ---
-    ahk_content_lines = [
-        f'; Configuration file generated by {os.path.basename(__file__)} on {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}',
-        f'#Requires AutoHotkey v2.0\n',
-    ]
-    
-    if generated_structure_string:
-        ahk_content_lines.append(f'\n; Configuration structure based on {SETTINGS_FILE}')
-        ahk_content_lines.append(generated_structure_string)
-        
-    if generated_include_string:
-        ahk_content_lines.append(generated_include_string)
-    
-    ahk_content = "\n".join(ahk_content_lines)
+    # --- 3. Stream the dynamic content (Classes and Includes) to the file ---
+    # The rootName is used for the class (A_Path)
+    bundle = None
+    if tree.include_mode == "bundle":
+        bundle = BundleCache(os.path.join(include_file_dir, BUNDLE_CACHE_FILE))
+    header = f'; Configuration file generated by {os.path.basename(__file__)} on {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}'
+
+    def make_lines():
+        lines = generate_ahk_content(tree, include_file_dir, snapshot, bundle, ahk_index)
+        if bundle:
+            # The content starts after the header and the digest line
+            lines = bundle.count_lines(lines, header.count("\n") + 3)
+        return lines
 
-    # --- 4. Comparison (if not initial run and file exists) ---
-    should_rewrite = True
-    
-    if not is_initial_run and os.path.exists(FINAL_INCLUDE_FILE_PATH):
-        try:
-            with open(FINAL_INCLUDE_FILE_PATH, 'r', encoding='utf-8') as f:
-                existing_content = f.read()
-            
-            # Simple content comparison
-            if existing_content.strip() == ahk_content.strip():
-                logging.info(f"AHK include file content (Classes/Includes) is identical. Skipping rewrite.")
-                should_rewrite = False
-                
-        except Exception as e:
-            logging.warning(f"Error during existing AHK include file comparison: {e}. Forcing rewrite.")
-            # should_rewrite remains True
-    
-    # --- 5. Write the file ---
-    if should_rewrite:
-        try:
-            # Write to FINAL_INCLUDE_FILE_PATH
-            with open(FINAL_INCLUDE_FILE_PATH, 'w', encoding='utf-8') as f:
-                f.write(ahk_content)
-            logging.info(f"AHK include file generated successfully at: {FINAL_INCLUDE_FILE_PATH}")
-        except Exception as e:
-            # Show the actual filename that caused the error
-            logging.error(f"Error writing AHK include file '{FINAL_INCLUDE_FILE_PATH}': {e}")
-            exit_script(EXIT_CODE_ERROR)
+    try:
+        written = write_digested_output(
+            FINAL_INCLUDE_FILE_PATH,
+            header,
+            make_lines,
+            previous_digest
+        )
+    except OSError as e:
+        # Show the actual filename that caused the error
+        logging.error(f"Error writing AHK include file '{FINAL_INCLUDE_FILE_PATH}': {e}")
+        raise BuildError(f"Could not write the AHK include file '{FINAL_INCLUDE_FILE_PATH}': {e}") from e
+
+    if ahk_index:
+        ahk_index.graph.report()
+
+    if bundle:
+        logging.info(
+            f"Bundle: {len(bundle.inputs) - bundle.kept_count} modules inlined, {bundle.kept_count} kept as #include "
+            f"({bundle.read_count} read, {bundle.changed_count} changed, {bundle.reused_count} reused)."
+        )
+        bundle.save()
+        if bundled_inputs is not None:
+            bundled_inputs.update(bundle.inputs)
+
+    if written:
+        logging.info(f"AHK include file generated successfully at: {FINAL_INCLUDE_FILE_PATH}")
+        if changed_outputs is not None:
+            changed_outputs.append(FINAL_INCLUDE_FILE_PATH)
     else:
-         # End function without writing
-         logging.info(f"Skipping rewrite of AHK include file: {FINAL_INCLUDE_FILE_PATH}")
+        logging.info(f"AHK include file content (Classes/Includes) is identical. Skipping rewrite.")
+
+    return FINAL_INCLUDE_FILE_PATH
 
-def final_script_actions(StartAHKFileOutput, is_initial_run, generated_INCLUDE_OUTPUT_filename, config_path):
+def final_script_actions(StartAHKFileOutput, is_initial_run, generated_INCLUDE_OUTPUT_filename, config_path, project_root, launch=True, changed_outputs=None):
     """
     Manages the initial creation of the final AHK script or its launch.
     The AHK script is created from a template if not found or on 'initial run'.
@@ -895,9 +2355,12 @@ def final_script_actions(StartAHKFileOutput, is_initial_run, generated_INCLUDE_O
     StartAHKFileOutput: Name of the main script (e.g., Deepr.ahk)
     generated_INCLUDE_OUTPUT_filename: Name of the include file (e.g., .include.ahk)
     config_path: Relative path of the config folder (e.g., .config)
+    project_root: Folder of the main script
+    launch: False to only create the script, never launch it
+    changed_outputs: List the created script is appended to
     """
     # The `StartAHKFileOutput` (e.g., Deepr.ahk) is at the ROOT.
-    script_path = os.path.join(os.getcwd(), StartAHKFileOutput) 
+    script_path = os.path.join(project_root, StartAHKFileOutput) 
 
     create_base_script = False
     if is_initial_run:
@@ -969,17 +2432,21 @@ def final_script_actions(StartAHKFileOutput, is_initial_run, generated_INCLUDE_O
             with open(script_path, 'w', encoding='utf-8') as f:
                 f.write(base_content)
             logging.info(f"Base AHK script '{StartAHKFileOutput}' created/updated successfully from template.")
+            if changed_outputs is not None:
+                changed_outputs.append(script_path)
         except Exception as e:
             logging.error(f"Error writing base AHK script '{StartAHKFileOutput}': {e}")
             # Do not stop, but launch will probably fail
     
     # Attempt to launch the script ONLY if it's NOT an 'initial run'
-    if not is_initial_run:
+    if not launch:
+        logging.info(f"Launch disabled: '{StartAHKFileOutput}' is not launched.")
+    elif not is_initial_run:
         logging.info(f"Standard run: Attempting to launch '{StartAHKFileOutput}'.")
         if os.path.exists(script_path):
             try:
                 # Launch the AHK script using the associated program (AutoHotkey)
-                os.startfile(script_path)
+                launch_file(script_path)
                 logging.info(f"Launched '{StartAHKFileOutput}' successfully.")
             except Exception as e:
                 # On launch failure
@@ -987,89 +2454,76 @@ def final_script_actions(StartAHKFileOutput, is_initial_run, generated_INCLUDE_O
         else:
             logging.warning(f"File '{StartAHKFileOutput}' not found at '{script_path}'. Skipping launch (write may have failed).")
 
-def get_paths_to_ignore_for_scan(structure, base_path="."):
+def get_paths_to_ignore_for_scan(tree):
     """
-    Recursively generates a list of folder paths that should be ignored
-    during the unknown folder scan, based on 'is_include': 'false'.
-    If a parent is ignored, all its children are also ignored.
+    Returns the folder paths that should be ignored during the unknown
+    folder scan, based on 'is_include': 'false'. If a parent is ignored,
+    all its children are also ignored.
     """
-    ignored_paths = []
-    for item in structure:
-        include_status = is_valid_include_setting(item)
-        
-        item_folder_name = get_folder_name(item)
-        if not item_folder_name:
-            continue
-
-        current_path = os.path.join(base_path, item_folder_name)
-
-        if include_status is False:
-            # If this item is set to not be included, add it and all its children.
-            ignored_paths.append(current_path)
-            if item.get('children'):
-                # Use get_expected_paths to quickly get all children paths recursively
-                ignored_paths.extend(get_expected_paths(item['children'], current_path))
-        elif item.get('children'):
-            # If this item is included, we still need to check its children.
-            ignored_paths.extend(get_paths_to_ignore_for_scan(item['children'], current_path))
-            
-    return ignored_paths
+    return [node.rel_path for node in tree.walk() if node.rel_path and node.scan_ignored]
 
-def find_unknown_folders(expected_paths, paths_to_ignore_scan):
+def find_unknown_folders(expected_paths, paths_to_ignore_scan, snapshot=None, ignore_matcher=None):
     """
     Scans the project directory and finds all folders that exist on disk
     but are NOT part of the expected_paths list. It also ignores folders
-    explicitly marked for exclusion from the scan.
+    explicitly marked for exclusion from the scan, and prunes the folders
+    matched by 'ignore_matcher' (IgnoreMatcher, see load_ignore_matcher).
     
-    This version DOES NOT prune unknown folders, allowing os.walk to
-    descend into them to find unknown children.
+    This version DOES NOT prune unknown folders, allowing the walk to
+    descend into them to find unknown children. The walk reads the shared
+    FsSnapshot and visits folders in the same order as os.walk (top-down).
     """
+    if snapshot is None:
+        snapshot = FsSnapshot(os.getcwd())
+    if ignore_matcher is None:
+        ignore_matcher = load_ignore_matcher(snapshot.root)
+
     # Use sets for fast lookup
-    expected_paths_set = set(os.path.normpath(p) for p in expected_paths)
-    ignore_scan_paths_set = set(os.path.normpath(p) for p in paths_to_ignore_scan)
-    
-    # Standard directories to ignore during the scan
-    ignore_dirs = {'.git', 'venv', '.venv', '__pycache__', '.vscode'}
+    expected_paths_set = set(os.path.normcase(os.path.normpath(p)) for p in expected_paths)
+    ignore_scan_paths_set = set(os.path.normcase(os.path.normpath(p)) for p in paths_to_ignore_scan)
     
     unknown_folders = []
     
-    # Walk the directory structure from the root
-    for root, dirs, files in os.walk(os.getcwd(), topdown=True):
-        
-        # Iterate over a copy of dirs so we can modify the original 'dirs' list
-        # to prune traversal for 'ignore_dirs' and 'ignore_scan_paths'
-        dirs_copy = list(dirs)
-        
-        for d in dirs_copy:
-            full_path = os.path.normpath(os.path.join(root, d))
-            relative_path = os.path.relpath(full_path, os.getcwd())
+    # Depth-first walk from the root, children pushed in reverse to keep os.walk order
+    pending = [os.curdir]
+    while pending:
+        root = pending.pop()
+        dir_listing = snapshot.listing(root)
+        if dir_listing is None:
+            continue
+
+        descend = []
+        for d in dir_listing.dirs:
+            relative_path = os.path.normpath(os.path.join(root, d))
 
-            # 1. Prune standard ignored directories
-            if d in ignore_dirs:
-                dirs.remove(d)
+            # 1. Prune standard and user ignored directories (.deeprignore, 'ignore' key)
+            if ignore_matcher.is_ignored_dir(relative_path):
                 continue
 
+            lookup_path = os.path.normcase(relative_path)
+
             # 2. Prune directories explicitly set to 'is_include: false'
-            if relative_path in ignore_scan_paths_set:
+            if lookup_path in ignore_scan_paths_set:
                 logging.info(f"Ignoring folder during scan (is_include: false): {relative_path}")
-                dirs.remove(d) # Prune from traversal
                 continue
 
             # 3. Check if it's an expected path
-            if relative_path in expected_paths_set:
-                # This is a known folder, allow os.walk to descend
-                continue
-            else:
+            if lookup_path not in expected_paths_set:
                 # 4. This is an UNKNOWN folder
                 logging.warning(f"Found unknown folder: {relative_path}")
                 unknown_folders.append(relative_path)
-                # We DO NOT prune. We let os.walk descend into it.
+                # We DO NOT prune. We let the walk descend into it.
+
+            descend.append(relative_path)
+
+        pending.extend(reversed(descend))
             
     return unknown_folders
 
-def select_action_cli(unknown_folder, structure_json):
+def select_action_cli(unknown_folder, structure_json, settings_index=None):
     """
     Asks the user what to do with an unknown folder.
+    'settings_index' (SettingsPathIndex of structure_json) is built if not given.
     
     Returns:
         tuple: (action, data)
@@ -1108,7 +2562,9 @@ def select_action_cli(unknown_folder, structure_json):
         logging.info(f"Utilisateur a choisi d'AJOUTER '{unknown_folder}'. Parent auto-détecté : '{parent_path}'.")
         
         # 2. Vérifier que le parent auto-détecté existe bien dans le JSON
-        parent_node = find_parent_node_in_json(structure_json, os.path.normpath(parent_path))
+        if settings_index is None:
+            settings_index = SettingsPathIndex(structure_json)
+        parent_node = settings_index.get(parent_path)
         
         if not parent_node:
             logging.error(f"Échec de l'ajout auto : Le parent '{parent_path}' n'a pas été trouvé dans settings.json.")
@@ -1134,26 +2590,28 @@ def select_action_cli(unknown_folder, structure_json):
         cli_destinations = [] # (display_line, path_value)
 
         def build_cli_options(structure_list, base_path=".", indent_str=""):
-            """Populate cli_destinations recursively."""
+            """Populate cli_destinations, parents before their children (TreeWalk)."""
             prefix_mid = "├─ "
             prefix_last = "└─ "
             indent_mid = "│  "
             indent_last = "   "
             
-            valid_items = [item for item in structure_list if get_folder_name(item)]
+            def numbered(items):
+                valid_items = [item for item in items if get_folder_name(item)]
+                return ((item, i == len(valid_items) - 1) for i, item in enumerate(valid_items))
             
-            for i, item in enumerate(valid_items):
+            walk = TreeWalk(numbered(structure_list), (base_path, indent_str))
+            for (item, is_last), (parent_path, parent_indent) in walk:
                 item_folder_name = get_folder_name(item)
-                current_path = os.path.join(base_path, item_folder_name)
-                is_last = (i == len(valid_items) - 1)
+                current_path = os.path.join(parent_path, item_folder_name)
                 prefix = prefix_last if is_last else prefix_mid
                 
-                display_line = f"{indent_str}{prefix}{item_folder_name}"
+                display_line = f"{parent_indent}{prefix}{item_folder_name}"
                 cli_destinations.append((display_line, current_path))
                 
                 if item.get('children'):
                     new_indent = indent_last if is_last else indent_mid
-                    build_cli_options(item['children'], current_path, indent_str + new_indent)
+                    walk.descend(numbered(item['children']), (current_path, parent_indent + new_indent))
 
         # Build and display options
         build_cli_options(structure_json, ".")
@@ -1191,77 +2649,246 @@ def select_action_cli(unknown_folder, structure_json):
     # Fallback (ne devrait pas être atteint)
     return 'skip', None
 
-def find_parent_node_in_json(structure_list, target_path, base_path="."):
+def ask_add_mode_cli(unknown_folder, scan):
     """
-    Recursively searches the json structure for the node matching target_path.
-    Returns the node (dict) if found, else None.
+    Shows how many nodes adding unknown_folder would write to settings.json
+    (FolderScan of scan_disk_for_children) and, when a scan limit was
+    reached, asks how to add it.
+
+    Returns:
+        str: 'tree', 'collapsed' or 'skip' (see add_folder_to_settings).
     """
-    for item in structure_list:
-        item_folder_name = get_folder_name(item)
-        if not item_folder_name:
-            continue
-        
-        current_path = os.path.normpath(os.path.join(base_path, item_folder_name))
-        
-        if current_path == target_path:
-            return item # Found it
-        
-        if item.get('children'):
-            found = find_parent_node_in_json(item['children'], target_path, current_path)
-            if found:
-                return found
-    return None
+    print(f"Aperçu : {scan.node_count + 1} noeud(s) seront ajoutés à settings.json pour '{unknown_folder}'.")
+    if not scan.truncated:
+        return 'tree'
+
+    print(f" ⚠ Limite atteinte (profondeur {ADD_FOLDER_MAX_DEPTH}, {ADD_FOLDER_MAX_NODES} noeuds) : "
+          f"les sous-dossiers de {len(scan.truncated)} dossier(s) ne sont pas inclus.")
+    print("  [ l ]  Ajouter l'arbre limité (les dossiers plus profonds seront signalés comme inconnus).")
+    print("  [ r ]  Ajouter un noeud replié : seul ce dossier est écrit, ses sous-dossiers sont lus sur le disque à chaque build.")
+    print("  [ 0 ]  Annuler l'ajout.")
+    choices = {'l': 'tree', 'r': 'collapsed', '0': 'skip'}
+    while True:
+        try:
+            answer = input("Votre choix (l, r, 0) : ").lower().strip()
+        except (KeyboardInterrupt, EOFError):
+            print("\nOpération annulée.")
+            return 'skip'
+        if answer in choices:
+            return choices[answer]
 
-def scan_disk_for_children(parent_disk_path):
+class ConflictPromptCLI:
+    """
+    Conflict resolver of merge_move_folder() for the console: asks what to do
+    with a moved file that already exists (with another content) at the
+    destination. An uppercase answer applies to every following conflict.
+    """
+    _CHOICES = {'r': 'replace', 'k': 'skip', 'b': 'keep_both'}
+
+    def __init__(self):
+        self.answer_for_all = None
+
+    def __call__(self, src_file, dst_file):
+        if self.answer_for_all:
+            return self.answer_for_all
+        print(f"\n ⚠ Conflit : '{dst_file}' existe déjà (contenu différent).")
+        print("  [ r ]  Remplacer le fichier existant.")
+        print("  [ k ]  Garder le fichier existant (le fichier déplacé reste dans le dossier d'origine).")
+        print("  [ b ]  Garder les deux (le fichier déplacé est renommé).")
+        print("  (R, K ou B en majuscule : pour tous les conflits suivants)")
+        while True:
+            try:
+                answer = input("Votre choix (r, k, b) : ").strip()
+            except (KeyboardInterrupt, EOFError):
+                print("\nOpération annulée. Les deux fichiers sont gardés.")
+                return 'keep_both'
+            decision = self._CHOICES.get(answer.lower())
+            if decision:
+                if answer.isupper():
+                    self.answer_for_all = decision
+                return decision
+
+class SettingsPathIndex:
     """
-    Scans a directory on disk and returns a list of JSON objects
-    for its subdirectories.
+    Relative folder path -> raw settings.json node (dict), for every node
+    of the structure. Replaces a recursive search of the structure per
+    lookup. Keys are normalized like FsSnapshot keys; when two nodes share
+    a path, the first one in settings.json order wins.
     """
+    __slots__ = ('_nodes',)
+
+    def __init__(self, structure_list):
+        self._nodes = {}
+        self._add_children(os.curdir, structure_list)
+
+    @staticmethod
+    def _key(rel_path):
+        return os.path.normcase(os.path.normpath(rel_path))
+
+    def _add_children(self, base_path, structure_list):
+        # Depth-first in settings.json order (children pushed in reverse),
+        # so setdefault keeps the node a recursive search would find first
+        pending = [(base_path, item) for item in reversed(structure_list)]
+        while pending:
+            parent_path, item = pending.pop()
+            item_folder_name = get_folder_name(item)
+            if not item_folder_name:
+                continue
+            current_path = os.path.join(parent_path, item_folder_name)
+            self._nodes.setdefault(self._key(current_path), item)
+            if item.get('children'):
+                pending.extend((current_path, child) for child in reversed(item['children']))
+
+    def get(self, rel_path):
+        """
+        Returns the node (dict) at rel_path, or None.
+        """
+        return self._nodes.get(self._key(rel_path))
+
+    def add(self, rel_path, node):
+        """
+        Records a node added to settings.json at rel_path, with its children.
+        """
+        self._nodes.setdefault(self._key(rel_path), node)
+        if node.get('children'):
+            self._add_children(rel_path, node['children'])
+
+class PathPrefixTrie:
+    """
+    Set of folder roots (e.g. the unknown folders already moved or added),
+    stored as a trie of path components. find_root answers "is this path
+    inside one of the roots?" in one walk down the path, whatever the
+    number of roots.
+    """
+    __slots__ = ('_root',)
+
+    # Marks the end of a stored root inside a trie node
+    _END = ""
+
+    def __init__(self):
+        self._root = {}
+
+    @staticmethod
+    def _parts(rel_path):
+        return os.path.normcase(os.path.normpath(rel_path)).split(os.sep)
+
+    def add(self, rel_path):
+        trie_node = self._root
+        for part in self._parts(rel_path):
+            trie_node = trie_node.setdefault(part, {})
+        trie_node[self._END] = rel_path
+
+    def find_root(self, rel_path):
+        """
+        Returns the stored root that strictly contains rel_path, or None.
+        """
+        trie_node = self._root
+        parts = self._parts(rel_path)
+        for part in parts[:-1]:
+            trie_node = trie_node.get(part)
+            if trie_node is None:
+                return None
+            if self._END in trie_node:
+                return trie_node[self._END]
+        return None
+
+# Result of scan_disk_for_children: the JSON nodes of the sub-folders, how many
+# they are, and the folders (relative paths) whose sub-folders were left out
+# (or not listed) because of the depth or node limit
+FolderScan = namedtuple('FolderScan', ['children', 'node_count', 'truncated'])
+
+def scan_disk_for_children(parent_disk_path, ignore_matcher=None, parent_rel_path=None,
+                           max_depth=ADD_FOLDER_MAX_DEPTH, max_nodes=ADD_FOLDER_MAX_NODES):
+    """
+    Scans a directory on disk and returns JSON objects for its subdirectories,
+    breadth first, down to 'max_depth' levels and up to 'max_nodes' nodes
+    (None = no limit): the upper levels are kept when a limit is reached.
+    Once 'max_nodes' is reached the scan stops: the folders still queued are
+    not listed and are reported in 'truncated' with the folder being read.
+    Hidden folders and the folders matched by 'ignore_matcher' are skipped;
+    'parent_rel_path' is parent_disk_path relative to the project root
+    (rules anchored to the root need it).
+
+    Returns:
+        FolderScan
+    """
+    if ignore_matcher is None:
+        ignore_matcher = IgnoreMatcher(f"{name}/" for name in SCAN_IGNORE_DIRS)
+    if parent_rel_path is None:
+        parent_rel_path = os.path.basename(os.path.normpath(parent_disk_path))
     children_nodes = []
-    try:
-        for entry in os.scandir(parent_disk_path):
-            if entry.is_dir():
-                # Ignore hidden/system folders
-                if entry.name.startswith('.') or entry.name in ('__pycache__', 'venv', '.venv'):
-                    continue
-                
-                folder_name = entry.name
-                logging.info(f"  -> Trouvé sous-dossier : {folder_name}")
-                
-                new_node = {
-                    "type": folder_name, # Use folder name as type
-                    "is_include": "true",
-                    "is_path": "true"
-                }
-                
-                # Recurse to find grand-children
-                grand_children = scan_disk_for_children(entry.path)
-                if grand_children:
-                    new_node["children"] = grand_children
-                
-                children_nodes.append(new_node)
-                
-    except FileNotFoundError:
-        logging.warning(f"Scan error: Dossier {parent_disk_path} non trouvé.")
-    except Exception as e:
-        logging.error(f"Erreur lors du scan de {parent_disk_path}: {e}")
-        
-    return children_nodes
+    node_count = 0
+    truncated = []
+
+    # (disk path, relative path, JSON node or None for the scanned folder, depth of its children)
+    pending = deque([(parent_disk_path, parent_rel_path, None, 1)])
+    while pending:
+        if max_nodes is not None and node_count >= max_nodes:
+            # Node limit reached: no more scandir for the folders left in the queue
+            truncated.extend(queued[1] for queued in pending)
+            pending.clear()
+            break
+        disk_path, rel_path, parent_node, depth = pending.popleft()
+        try:
+            with os.scandir(disk_path) as entries:
+                sub_folders = [entry.name for entry in entries if entry.is_dir()]
+        except FileNotFoundError:
+            logging.warning(f"Scan error: Dossier {disk_path} non trouvé.")
+            continue
+        except OSError as e:
+            logging.error(f"Erreur lors du scan de {disk_path}: {e}")
+            continue
+
+        for folder_name in sub_folders:
+            entry_rel_path = os.path.join(rel_path, folder_name)
+            # Ignore hidden/system folders
+            if folder_name.startswith('.') or ignore_matcher.is_ignored_dir(entry_rel_path):
+                continue
+            if (max_depth is not None and depth > max_depth) or (max_nodes is not None and node_count >= max_nodes):
+                truncated.append(rel_path)
+                break
 
-def add_folder_to_settings(json_data, unknown_folder_path, parent_path, settings_json_path):
+            logging.info(f"  -> Trouvé sous-dossier : {entry_rel_path}")
+            new_node = {
+                "type": folder_name, # Use folder name as type
+                "is_include": "true",
+                "is_path": "true"
+            }
+            siblings = children_nodes if parent_node is None else parent_node.setdefault("children", [])
+            siblings.append(new_node)
+            node_count += 1
+            pending.append((os.path.join(disk_path, folder_name), entry_rel_path, new_node, depth + 1))
+
+    return FolderScan(children_nodes, node_count, truncated)
+
+def add_folder_to_settings(settings_store, unknown_folder_path, parent_path, project_root, settings_index=None, ignore_matcher=None, choose_add_mode=None):
     """
-    Adds the unknown folder and its children to settings.json
-    under the specified parent_path.
+    Adds the unknown folder (relative to project_root) and its children to
+    the settings (SettingsStore) under the specified parent_path, and marks
+    them dirty: settings.json is written once by the build. 'settings_index'
+    (SettingsPathIndex), if given, is updated with the new nodes; children
+    matched by 'ignore_matcher' (IgnoreMatcher) are not added.
+
+    'choose_add_mode(unknown_folder_path, scan)' (see ask_add_mode_cli) gets
+    the bounded FolderScan and returns 'tree' (add the scanned nodes),
+    'collapsed' (add the folder alone, its sub-folders are read from disk at
+    build time) or 'skip'. Without it, the scanned nodes are added.
+
+    Returns:
+        bool: True if the folder was added.
     """
+    json_data = settings_store.data
     logging.info(f"Tentative d'ajout de '{unknown_folder_path}' à settings.json sous '{parent_path}'...")
     
     # 1. Find the parent node in the JSON structure
-    parent_node = find_parent_node_in_json(json_data.get('structure', []), os.path.normpath(parent_path))
+    if settings_index is None:
+        settings_index = SettingsPathIndex(json_data.get('structure', []))
+    parent_node = settings_index.get(parent_path)
     
     if not parent_node:
         logging.error(f"Impossible de trouver le noeud parent '{parent_path}' dans settings.json. Ajout annulé.")
         print(f"ERREUR: Parent '{parent_path}' non trouvé dans JSON. Annulé.")
-        return
+        return False
 
     # 2. Get the name of the new folder (the last part of the path)
     new_folder_name = os.path.basename(unknown_folder_path)
@@ -1273,59 +2900,212 @@ def add_folder_to_settings(json_data, unknown_folder_path, parent_path, settings
         "is_path": "true"
     }
     
-    # 4. Scan the folder on disk for its children
-    full_disk_path = os.path.join(os.getcwd(), unknown_folder_path)
-    children = scan_disk_for_children(full_disk_path)
-    if children:
-        new_node["children"] = children
+    # 4. Scan the folder on disk for its children (bounded, see ADD_FOLDER_MAX_NODES)
+    full_disk_path = os.path.join(project_root, unknown_folder_path)
+    scan = scan_disk_for_children(full_disk_path, ignore_matcher, unknown_folder_path)
+    add_mode = choose_add_mode(unknown_folder_path, scan) if choose_add_mode else 'tree'
+    if add_mode == 'skip':
+        logging.info(f"Ajout de '{unknown_folder_path}' annulé ({scan.node_count} sous-dossiers scannés).")
+        return False
+    if add_mode == 'collapsed':
+        new_node["collapsed"] = "true"
+    elif scan.children:
+        new_node["children"] = scan.children
 
     # 5. Add the new node to the parent's "children" list
     if "children" not in parent_node:
         parent_node["children"] = []
     
     parent_node["children"].append(new_node)
+    settings_index.add(os.path.join(parent_path, new_folder_name), new_node)
     logging.info(f"Noeud {new_folder_name} ajouté avec succès à la structure JSON (en mémoire).")
     
-    # 6. Write the modified json_data back to the settings.json file
-    try:
-        with open(settings_json_path, 'w', encoding='utf-8') as f:
-            json.dump(json_data, f, indent=4) # indent=4 for pretty print
-        logging.info(f"'{settings_json_path}' mis à jour avec succès sur le disque.")
-        print(f"'{settings_json_path}' a été mis à jour.")
-        
-    except Exception as e:
-        logging.error(f"ERREUR fatale: Impossible d'écrire dans '{settings_json_path}': {e}")
-        print(f"ERREUR: Impossible de sauvegarder les modifications dans '{settings_json_path}'.")
+    # 6. settings.json is written once, after every unknown folder was handled
+    settings_store.mark_dirty()
+    print(f"'{new_folder_name}' ajouté à '{settings_store.path}' (enregistré à la fin du traitement).")
+    return True
 
-def copy_folder_contents(src, dst, root_tk):
+class MoveStats:
     """
-    Copies all contents from src to dst.
-    Uses shutil.copytree with dirs_exist_ok=True.
+    Counters of one merge_move_folder() call. Cross-device copies print
+    their progress (size copied and throughput) on a single console line.
     """
-    logging.info(f"Attempting to copy contents from '{src}' to '{dst}'...")
+    __slots__ = (
+        'renamed', 'copied_files', 'copied_bytes', 'identical', 'replaced',
+        'kept_both', 'skipped', 'errors', 'started', '_last_report',
+    )
+
+    def __init__(self):
+        self.renamed = 0 # Files and folders moved with a rename
+        self.copied_files = 0 # Files copied to another device
+        self.copied_bytes = 0
+        self.identical = 0 # Already at the destination with the same content
+        self.replaced = 0
+        self.kept_both = 0
+        self.skipped = 0 # Left in the source folder
+        self.errors = []
+        self.started = time.perf_counter()
+        self._last_report = self.started
+
+    def report_progress(self, force=False):
+        now = time.perf_counter()
+        if not force and now - self._last_report < MOVE_PROGRESS_INTERVAL:
+            return
+        self._last_report = now
+        copied_mb = self.copied_bytes / (1024 * 1024)
+        elapsed = max(now - self.started, 1e-6)
+        print(f"\r  Copie : {self.copied_files} fichier(s), {copied_mb:.1f} Mo ({copied_mb / elapsed:.1f} Mo/s)", end="", flush=True)
+
+def _is_cross_device_error(error):
+    """True if a rename failed because source and destination are on different volumes."""
+    return error.errno == errno.EXDEV or getattr(error, 'winerror', None) == 17 # ERROR_NOT_SAME_DEVICE
+
+def _unique_destination(path):
+    """Returns 'name (1).ext', 'name (2).ext'... for the first name not taken next to path."""
+    base, ext = os.path.splitext(path)
+    counter = 1
+    while os.path.lexists(f"{base} ({counter}){ext}"):
+        counter += 1
+    return f"{base} ({counter}){ext}"
+
+def _copy_file_chunked(src, dst, stats):
+    """Copies src to dst by chunks (reporting the progress), then its metadata."""
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        while True:
+            chunk = fsrc.read(MOVE_COPY_CHUNK_SIZE)
+            if not chunk:
+                break
+            fdst.write(chunk)
+            stats.copied_bytes += len(chunk)
+            stats.report_progress()
+    shutil.copystat(src, dst)
+    stats.copied_files += 1
+
+def _move_file(src, dst, stats):
+    """Moves a file over dst: rename on the same volume, copy + delete otherwise."""
     try:
-        # This copies all files and subfolders from src into dst
-        shutil.copytree(src, dst, dirs_exist_ok=True)
-        logging.info("Copy successful.")
-        
-    except Exception as e:
-        logging.error(f"Error copying files from '{src}' to '{dst}': {e}")
-        messagebox.showerror("Copy Error", f"Failed to copy files from '{src}' to '{dst}'.\n\nError: {e}", parent=root_tk)
-   
-def delete_source_folder(src, root_tk):
+        os.replace(src, dst)
+        stats.renamed += 1
+    except OSError as e:
+        if not _is_cross_device_error(e):
+            raise
+        _copy_file_chunked(src, dst, stats)
+        os.remove(src)
+
+def merge_move_folder(src, dst, resolve_conflict=None):
     """
-    Deletes the source folder after a successful copy.
+    Moves the contents of src into the existing folder dst, merging folders
+    that exist on both sides. Entries missing from dst are renamed into it
+    (no data is copied on the same volume); only a move to another volume
+    copies the files, by chunks, with progress and throughput reporting.
+
+    A file that already exists in dst is dropped from src if both have the
+    same content. Otherwise 'resolve_conflict(src_file, dst_file)' decides:
+    'replace', 'keep_both' (the moved file gets a ' (n)' suffix) or 'skip'
+    (the file stays in src). Without a resolver, both files are kept.
+    src is deleted once empty; folders still holding skipped files remain.
+
+    Returns:
+        MoveStats
     """
-    logging.info(f"Tentative de suppression du dossier d'origine : '{src}'...")
-    try:
-        shutil.rmtree(src)
-        logging.info("Dossier d'origine supprimé avec succès.")
-        print(f"Nettoyage : Suppression de '{src}' terminée.")
-    except Exception as e:
-        logging.error(f"Erreur lors de la suppression du dossier '{src}': {e}")
-        messagebox.showerror("Erreur de suppression", f"Échec de la suppression du dossier d'origine '{src}'.\n\nVous devrez peut-être le supprimer manuellement.\n\nErreur: {e}", parent=root_tk)
+    logging.info(f"Merge-move of '{src}' into '{dst}'...")
+    stats = MoveStats()
+    visited_dirs = [] # Source folders, parents first
+    pending = [(src, dst)]
+
+    while pending:
+        src_dir, dst_dir = pending.pop()
+        visited_dirs.append(src_dir)
+        try:
+            with os.scandir(src_dir) as entries:
+                src_entries = [(entry.name, entry.is_dir(follow_symlinks=False)) for entry in entries]
+        except OSError as e:
+            stats.errors.append(f"{src_dir}: {e}")
+            continue
+
+        for name, is_dir in src_entries:
+            src_path = os.path.join(src_dir, name)
+            dst_path = os.path.join(dst_dir, name)
+            try:
+                if os.path.lexists(dst_path):
+                    dst_is_dir = os.path.isdir(dst_path) and not os.path.islink(dst_path)
+                    if is_dir and dst_is_dir:
+                        pending.append((src_path, dst_path)) # Merge both folders
+                        continue
+                    if is_dir or dst_is_dir:
+                        # A folder and a file with the same name: keep both
+                        decision = 'keep_both'
+                    elif filecmp.cmp(src_path, dst_path, shallow=False):
+                        os.remove(src_path)
+                        stats.identical += 1
+                        continue
+                    else:
+                        decision = resolve_conflict(src_path, dst_path) if resolve_conflict else 'keep_both'
+
+                    if decision == 'skip':
+                        logging.info(f"Conflict: '{src_path}' left in place ('{dst_path}' kept).")
+                        stats.skipped += 1
+                        continue
+                    if decision == 'replace':
+                        logging.info(f"Conflict: '{dst_path}' replaced by '{src_path}'.")
+                        _move_file(src_path, dst_path, stats)
+                        stats.replaced += 1
+                        continue
+                    dst_path = _unique_destination(dst_path)
+                    logging.info(f"Conflict: '{src_path}' moved as '{dst_path}'.")
+                    stats.kept_both += 1
+
+                if not is_dir:
+                    _move_file(src_path, dst_path, stats)
+                    continue
+                try:
+                    os.rename(src_path, dst_path)
+                    stats.renamed += 1
+                except OSError as e:
+                    if not _is_cross_device_error(e):
+                        raise
+                    # Another volume: create the folder and move its contents one by one
+                    os.mkdir(dst_path)
+                    shutil.copystat(src_path, dst_path)
+                    pending.append((src_path, dst_path))
+            except OSError as e:
+                stats.errors.append(f"{src_path}: {e}")
+
+    if stats.copied_files:
+        stats.report_progress(force=True)
+        print()
+
+    # Delete the emptied source folders, children first
+    for src_dir in reversed(visited_dirs):
+        try:
+            os.rmdir(src_dir)
+        except OSError:
+            pass # Not empty: skipped files or errors
+
+    elapsed = time.perf_counter() - stats.started
+    summary = (
+        f"{stats.renamed} renamed, {stats.copied_files} copied ({stats.copied_bytes} bytes), "
+        f"{stats.identical} identical, {stats.replaced} replaced, {stats.kept_both} kept both, "
+        f"{stats.skipped} skipped in {elapsed:.2f}s"
+    )
+    if stats.errors:
+        logging.error(f"Merge-move of '{src}' finished with {len(stats.errors)} error(s): {summary}")
+        for error in stats.errors:
+            logging.error(f"  {error}")
+        show_error_dialog(
+            "Move Error",
+            f"{len(stats.errors)} item(s) could not be moved from '{src}' to '{dst}'.\n\n"
+            f"First error: {stats.errors[0]}\n\nThey were left in '{src}'."
+        )
+    else:
+        logging.info(f"Merge-move of '{src}' done: {summary}")
+    if os.path.exists(src):
+        print(f"'{src}' conservé : {stats.skipped} fichier(s) ignoré(s), {len(stats.errors)} erreur(s).")
+    else:
+        print(f"Nettoyage : '{src}' déplacé puis supprimé.")
+    return stats
 
-def create_minimal_settings():
+def create_minimal_settings(project_root):
     """
     Prompts the user to create a minimal settings.json file when it's missing
     during an initial run.
@@ -1338,14 +3118,11 @@ def create_minimal_settings():
     # 1. Vérifier si la console est interactive
     if not sys.stdout.isatty():
         logging.fatal("Pas de terminal interactif (isatty=False). Impossible de demander le RootName.")
-        root_err = Tk()
-        root_err.withdraw()
-        messagebox.showerror(
+        show_error_dialog(
             "Erreur Critique", 
             "Impossible de trouver settings.json.\n\n"
             "Un terminal interactif est requis pour la configuration initiale (définir le RootName)."
         )
-        root_err.destroy()
         return None # Signal d'échec
 
     # 2. Demander le RootName à l'utilisateur
@@ -1390,12 +3167,11 @@ def create_minimal_settings():
     }
     
     # 4. Définir le chemin de destination (à la racine)
-    settings_abs_path = os.path.abspath(os.path.join(os.getcwd(), SETTINGS_FILE))
+    settings_abs_path = os.path.abspath(os.path.join(project_root, SETTINGS_FILE))
     
     # 5. Écrire le fichier
     try:
-        with open(settings_abs_path, 'w', encoding='utf-8') as f:
-            json.dump(minimal_data, f, indent=4)
+        SettingsStore(minimal_data, settings_abs_path, dirty=True).flush()
         
         logging.info(f"Fichier '{SETTINGS_FILE}' minimal créé avec succès à : {settings_abs_path}")
         print(f"'{SETTINGS_FILE}' créé avec succès.")
@@ -1405,19 +3181,84 @@ def create_minimal_settings():
         
     except Exception as e:
         logging.error(f"Erreur lors de l'écriture du fichier '{settings_abs_path}': {e}")
-        root_err = Tk()
-        root_err.withdraw()
-        messagebox.showerror("Erreur d'écriture", f"Impossible de créer le fichier {SETTINGS_FILE}.\n\nErreur: {e}")
-        root_err.destroy()
+        show_error_dialog("Erreur d'écriture", f"Impossible de créer le fichier {SETTINGS_FILE}.\n\nErreur: {e}")
         return None # Signal d'échec
 
 # =================================================================
 # EXECUTIONS
 # =================================================================
 
-def main_build():
+class BuildOptions:
     """
-    Main build process:
+    Options of an in-process build (see build()).
+
+    profile: count filesystem calls per phase and write PROFILE_FILE.
+    scan_report: write the per-node scan statistics to SCAN_REPORT_FILE
+        (see write_scan_report).
+    interactive: ask about unknown folders (relaunching in a new console
+        when there is no terminal). When False, they are only reported in
+        BuildResult.unknown_folders and the build cache is not saved.
+    launch: launch the final script at the end of a standard run. A
+        non-interactive build that leaves unknown folders never launches it:
+        the caller is expected to run an interactive build next.
+    build_cache: build cache already in memory (BuildResult.build_cache of
+        the previous build), used instead of reading the cache file.
+    resume: checkpoint file written by the build that relaunched this one in
+        a new console (relative to the project folder): the build resumes at
+        the unknown-folder prompt.
+    log: --log was given. It is passed on, with --profile and --scan-report,
+        to a build relaunched in a new console.
+    """
+    __slots__ = ('profile', 'scan_report', 'interactive', 'launch', 'build_cache', 'resume', 'log')
+
+    def __init__(self, profile=False, interactive=True, launch=True, build_cache=None, resume=None, scan_report=False, log=False):
+        self.profile = profile
+        self.log = log
+        self.scan_report = scan_report
+        self.interactive = interactive
+        self.launch = launch
+        self.build_cache = build_cache
+        self.resume = resume
+
+class BuildResult:
+    """
+    Outcome of build():
+    changed_outputs: absolute paths of the files written by the build
+        (settings.json, PATHFILE, include file, final script).
+    timings: {phase: wall ms}, in execution order.
+    unknown_folders: folders found on disk but not in settings.json.
+    pruned_count: folders skipped by the ignore rules (IGNORE_FILE, 'ignore' key).
+    hotkey_duplicates: hotkeys defined twice in the same context (see find_hotkey_collisions).
+    cache_hit: the build cache was up-to-date, nothing was regenerated.
+    relaunched: the build continues in a new console (unknown folders
+        without an interactive terminal).
+    build_cache: the build cache saved (or found valid) by this build,
+        to pass to the next one in BuildOptions.build_cache.
+    """
+    __slots__ = (
+        'changed_outputs', 'timings', 'unknown_folders', 'pruned_count', 'hotkey_duplicates', 'cache_hit',
+        'relaunched', 'is_initial_run', 'start_script', 'include_file_path', 'settings_path', 'build_cache',
+    )
+
+    def __init__(self):
+        self.changed_outputs = []
+        self.timings = {}
+        self.unknown_folders = []
+        self.pruned_count = 0
+        self.hotkey_duplicates = 0
+        self.cache_hit = False
+        self.relaunched = False
+        self.is_initial_run = False
+        self.start_script = None
+        self.include_file_path = None
+        self.settings_path = None
+        self.build_cache = None
+
+def build(project_root, pathfile, include_output, options=None):
+    """
+    Builds the project in project_root. Reentrant: all the state lives in
+    the arguments and the returned BuildResult, so a daemon, a test or the
+    benchmark can run any number of builds in one process.
     1. Detects initial run vs. standard run.
     2. Loads settings.json (from root or config path).
     3. Validates settings and structure.
@@ -1425,40 +3266,65 @@ def main_build():
     5. Moves settings.json and writes paths.ahk (root).
     6. Generates .include.ahk (in config path).
     7. Creates/Launches the main RootName.ahk script (root).
-    """
-
-    # ------------------------------------------------------------------------------------
-    # 0. Get arguments (PYTHON_CMD, PATHFILE, INCLUDE_OUTPUT)
-    # ------------------------------------------------------------------------------------
-    global INCLUDE_OUTPUT, PATHFILE, StartAHKScriptOutput 
-    
-    StartAHKScriptOutput = None # Will be set by RootName
-    config_relative_path = None # Will be set after reading settings.json
 
-    try:
-        # sys.argv[2] is the Python command path
-        PYTHON_CMD = sys.argv[2] 
-        logging.info(f"Python command detected via command-line argument: {PYTHON_CMD}")
+    Args:
+        project_root (str): Project folder (where pathfile and the final script live).
+        pathfile (str): File name of the AHK path file (e.g., paths.ahk).
+        include_output (str): File name of the AHK include file (e.g., .includes.ahk).
+        options (BuildOptions): Defaults to BuildOptions().
 
-        # sys.argv[3] is the output AHK Path file name (e.g., paths.ahk)
-        PATHFILE = sys.argv[3]
-        logging.info(f"Output PATHFILE (path config) file name detected via command-line argument: {PATHFILE}")
+    Returns:
+        BuildResult
 
-        # sys.argv[4] is the output AHK include file name (e.g., .includes.ahk)
-        INCLUDE_OUTPUT = sys.argv[4]
-        logging.info(f"Output INCLUDE_OUTPUT (includes) file name detected via command-line argument: {INCLUDE_OUTPUT}")
+    Raises:
+        BuildError: on a fatal error (already logged).
+    """
+    if options is None:
+        options = BuildOptions()
+    project_root = os.path.abspath(project_root)
 
-    except IndexError:
-        raise ValueError("Error: Arguments are missing. Usage: main.py build <python_cmd> <ahk_path_file> <ahk_include_file> [--log]")
+    result = BuildResult()
+    profiler = PhaseProfiler(options.profile)
+    profiler.start()
+    try:
+        _run_build(project_root, pathfile, include_output, options, result, profiler)
+    finally:
+        # Always end the last phase and detach the profiler from this thread
+        profiler.stop()
+        result.timings = profiler.timings()
+    return result
+
+def _run_build(project_root, pathfile, include_output, options, result, profiler):
+    """
+    Body of build(): fills 'result' in place, phase by phase.
+    """
+    StartAHKScriptOutput = None # Will be set by RootName
+    config_relative_path = None # Will be set after reading settings.json
+    profile_report_path = os.path.join(project_root, PROFILE_FILE)
+
+    if options.resume:
+        checkpoint = load_build_checkpoint(options.resume, project_root)
+        if checkpoint:
+            logging.info(f"--- Build resumed from checkpoint '{options.resume}' ---")
+            profiler.begin("resume")
+            # Compiling is cheap; folders unchanged since the checkpoint are not listed again
+            snapshot = FsSnapshot(project_root, checkpoint["dirs"])
+            ignore_matcher = load_ignore_matcher(project_root, checkpoint["settings"])
+            settings_tree = compile_settings_tree(checkpoint["settings"], project_root, snapshot=snapshot, ignore_matcher=ignore_matcher)
+            ignore_matcher.pruned = checkpoint["pruned_count"]
+            _finish_build(project_root, pathfile, include_output, options, result, profiler, checkpoint, settings_tree, snapshot, ignore_matcher)
+            return
+        logging.warning("The build checkpoint cannot be used. Running a full build.")
 
     # ------------------------------------------------------------------------------------
     # 1. Determine 'is_initial_run' by reading PATHFILE at the ROOT
     # ------------------------------------------------------------------------------------
     
     logging.info(f"--- Build Process Started ---")
+    profiler.begin("ahk_parse")
     
     # Look for PATHFILE (e.g., paths.ahk) at the ROOT
-    pathsAHK_source = os.path.join(os.getcwd(), PATHFILE) 
+    pathsAHK_source = os.path.join(project_root, pathfile) 
     
     pathsAHK_jsonPathVar = None # This is the path to .config/settings.json
     is_initial_run = False 
@@ -1466,25 +3332,51 @@ def main_build():
     if os.path.exists(pathsAHK_source):
         # Case 1: 'paths.ahk' exists. 'is_initial_run = False'.
         # Read the settings.json path from this file.
-        logging.info(f"Attempting to load paths from AHK file: {PATHFILE}")
+        logging.info(f"Attempting to load paths from AHK file: {pathfile}")
         pathsAHK_infos = read_ahk_variables(pathsAHK_source) 
         if pathsAHK_infos:
             pathsAHK_jsonPathVar, StartAHKScriptOutput = pathsAHK_infos
-            logging.info(f"Loaded config from '{PATHFILE}'. Settings.json should be at '{pathsAHK_jsonPathVar}'.")
+            # The settings.json path is relative to the project root
+            pathsAHK_jsonPathVar = os.path.join(project_root, pathsAHK_jsonPathVar)
+            logging.info(f"Loaded config from '{pathfile}'. Settings.json should be at '{pathsAHK_jsonPathVar}'.")
         else:
-            logging.warning(f"File '{PATHFILE}' exists but variables could not be read. Proceeding as partial initial run.")
+            logging.warning(f"File '{pathfile}' exists but variables could not be read. Proceeding as partial initial run.")
             is_initial_run = True 
     else:
         # Case 2: 'paths.ahk' does NOT exist. 'is_initial_run = True'.
         is_initial_run = True
-        logging.info(f"File '{PATHFILE}' not found at root. Assuming initial run.")
+        logging.info(f"File '{pathfile}' not found at root. Assuming initial run.")
+
+    # ------------------------------------------------------------------------------------
+    # 1.5. Incremental build: nothing changed since the last build, only launch
+    # ------------------------------------------------------------------------------------
+
+    profiler.begin("cache_check")
+    build_cache = None
+    if not is_initial_run and pathsAHK_jsonPathVar and os.path.exists(pathsAHK_jsonPathVar):
+        build_cache = options.build_cache or load_build_cache(get_build_cache_path(pathsAHK_jsonPathVar))
+        cached_config_path = check_build_cache(build_cache, pathsAHK_jsonPathVar, pathsAHK_source, include_output, project_root)
+        if cached_config_path:
+            logging.info("Build cache is up-to-date. Skipping scan and generation.")
+            if options.scan_report:
+                logging.info("Scan report not written: the build cache is up-to-date and no folder was scanned.")
+            result.cache_hit = True
+            result.build_cache = build_cache
+            result.start_script = StartAHKScriptOutput
+            result.settings_path = os.path.abspath(pathsAHK_jsonPathVar)
+            result.include_file_path = os.path.join(project_root, cached_config_path, include_output)
+            profiler.begin("launch")
+            final_script_actions(StartAHKScriptOutput, is_initial_run, include_output, cached_config_path, project_root, options.launch, result.changed_outputs)
+            profiler.report(profile_report_path, cache_hit=True)
+            return
     
     # ------------------------------------------------------------------------------------
     # 2. Load settings.json
     #    (Either from the remote path or from root if 'initial_run')
     # ------------------------------------------------------------------------------------
     
-    json_source_absolutePath = os.path.join(os.getcwd(), SETTINGS_FILE) # Local source (root)
+    profiler.begin("settings_load")
+    json_source_absolutePath = os.path.join(project_root, SETTINGS_FILE) # Local source (root)
     json_data = None
     loaded_settings_json_path = None # <--- VARIABLE AJOUTÉE POUR STOCKER LE CHEMIN
     
@@ -1494,7 +3386,7 @@ def main_build():
         if json_data_check:
             # CORRECTION : Capturer le chemin absolu qui a été chargé
             json_data, loaded_settings_json_path = json_data_check
-            logging.info(f"Configuration path confirmed by '{PATHFILE}'.")
+            logging.info(f"Configuration path confirmed by '{pathfile}'.")
         else:
             logging.warning(f"Remote settings.json file at '{pathsAHK_jsonPathVar}' is invalid. Attempting local load.")
             is_initial_run = True # Treat as initial run if remote JSON is broken
@@ -1519,7 +3411,7 @@ def main_build():
             logging.info("Attempting to create a minimal settings.json file...")
             
             # Appel de la nouvelle fonction pour créer le fichier
-            minimal_json_check = create_minimal_settings()
+            minimal_json_check = create_minimal_settings(project_root)
             
             if minimal_json_check:
                 # La création a réussi
@@ -1530,19 +3422,19 @@ def main_build():
             else:
                 # La création a échoué (l'utilisateur a annulé ou erreur d'écriture)
                 logging.fatal("Failed to create minimal settings.json. Exiting.")
-                exit_script(EXIT_CODE_ERROR)
+                raise BuildError(f"Failed to create a minimal '{SETTINGS_FILE}'.")
         
         else:
             # CAS 3: settings.json n'existe pas, et on N'EST PAS en initial run
             # (signifie que paths.ahk est corrompu ou pointe vers un fichier supprimé)
             logging.fatal(f"'{SETTINGS_FILE}' not found locally or at the configured path '{pathsAHK_jsonPathVar}'.")
-            exit_script(EXIT_CODE_ERROR)
+            raise BuildError(f"'{SETTINGS_FILE}' not found locally or at '{pathsAHK_jsonPathVar}'.")
     
     # CORRECTION : Vérifier aussi que le chemin a bien été stocké
     if not json_data or not loaded_settings_json_path:
         # Cette condition est maintenant la sécurité finale si tout a échoué
         logging.fatal(f"Could not find or load '{SETTINGS_FILE}'.")
-        exit_script(EXIT_CODE_ERROR)
+        raise BuildError(f"Could not find or load '{SETTINGS_FILE}'.")
 
     # ------------------------------------------------------------------------------------
     # 3. Validate settings.json and find config_relative_path
@@ -1550,19 +3442,19 @@ def main_build():
     
     if 'structure' not in json_data:
         logging.error("The 'structure' key is missing in the settings.json file.")
-        exit_script(EXIT_CODE_ERROR)
+        raise BuildError("The 'structure' key is missing in settings.json.")
 
     # Validate RootName
     FINAL_rootName = json_data.get("RootName") 
     if not FINAL_rootName:
         logging.error("Error: 'RootName' key is missing in your settings.json file.")
-        exit_script(EXIT_CODE_ERROR)
+        raise BuildError("The 'RootName' key is missing in settings.json.")
     
     # Validate and FIND config_relative_path (e.g., .config)
     config_relative_path = find_config_dir_path(json_data, json_keyConfig)
     if not config_relative_path:
         logging.error(f"Mandatory key 'type' for structure item type '{json_keyConfig}' is missing or empty in settings.json.")
-        exit_script(EXIT_CODE_ERROR) 
+        raise BuildError(f"No '{json_keyConfig}' folder in settings.json.")
         
     logging.info(f"Mandatory keys 'RootName' ('{FINAL_rootName}') and 'Configuration' path ('{config_relative_path}') are present.")
         
@@ -1582,15 +3474,13 @@ def main_build():
         StartAHKScriptOutput = new_start_script_name
         
         # Check if the old script file exists at the root
-        old_script_path = os.path.join(os.getcwd(), old_start_script_name)
-        new_script_path = os.path.join(os.getcwd(), new_start_script_name)
+        old_script_path = os.path.join(project_root, old_start_script_name)
+        new_script_path = os.path.join(project_root, new_start_script_name)
 
         if os.path.exists(old_script_path):
             logging.info(f"Found existing script file: '{old_start_script_name}'")
             
             # Ask the user if they want to migrate content
-            root = Tk()
-            root.withdraw()
             msg = (
                 f"RootName Change Detected\n\n"
                 f"The script name has changed from:\n{old_start_script_name}\n\n"
@@ -1599,8 +3489,7 @@ def main_build():
                 f"(Yes = Move content and delete old file)\n"
                 f"(No = Create a new blank file for {new_start_script_name})"
             )
-            response = messagebox.askyesno("Migrate Script Content?", msg)
-            root.destroy()
+            response = ask_yes_no_dialog("Migrate Script Content?", msg)
             
             if response:
                 # User selected YES: Move content
@@ -1612,10 +3501,7 @@ def main_build():
                 except Exception as e:
                     logging.error(f"Error during script migration: {e}")
                     # Show an error, but continue. The new file might be incomplete.
-                    root_err = Tk()
-                    root_err.withdraw()
-                    messagebox.showerror("Migration Error", f"Failed to move content from {old_start_script_name} to {new_start_script_name}.\n\nError: {e}")
-                    root_err.destroy()
+                    show_error_dialog("Migration Error", f"Failed to move content from {old_start_script_name} to {new_start_script_name}.\n\nError: {e}")
             else:
                 # User selected NO: Do nothing.
                 logging.info(f"User opted not to migrate content. A new '{new_start_script_name}' will be created if needed.")
@@ -1637,30 +3523,35 @@ def main_build():
     # Instead of checking expected paths and asking the user, we now
     # prune the JSON structure to match reality (remove missing folders).
     logging.info("Synchronizing settings.json with current disk structure...")
+    profiler.begin("sync")
+
+    # Single view of the project tree, shared by every following phase.
+    # Folders unchanged since the last build are restored from the build cache.
+    snapshot = FsSnapshot(project_root, build_cache.get("dirs") if build_cache else None)
     
-    structure_was_modified = remove_missing_entries(json_data['structure'])
+    structure_was_modified = remove_missing_entries(json_data['structure'], snapshot=snapshot)
     
     if structure_was_modified:
+        # Saved once with the other changes of this build (SettingsStore.flush)
         logging.info("Structure mismatched. Missing folders removed from memory.")
-        # Save the updated JSON to disk immediately so the file is clean
-        try:
-            with open(loaded_settings_json_path, 'w', encoding='utf-8') as f:
-                json.dump(json_data, f, indent=4)
-            logging.info(f"Updated '{SETTINGS_FILE}' saved successfully.")
-        except Exception as e:
-            logging.error(f"Error saving updated settings.json: {e}")
-            # We continue even if save fails, using the in-memory structure
+
+    # Compile (and validate) the synced structure once for every following phase.
+    profiler.begin("compile")
+    # .deeprignore and the 'ignore' key of settings.json, compiled once for every scanner
+    ignore_matcher = load_ignore_matcher(project_root, json_data)
+    settings_tree = compile_settings_tree(json_data, project_root, snapshot=snapshot, ignore_matcher=ignore_matcher)
+    if not report_settings_problems(settings_tree):
+        logging.fatal(f"FATAL VALIDATION ERROR: {len(settings_tree.errors)} invalid node(s) in {SETTINGS_FILE}.")
+        raise BuildError(f"{len(settings_tree.errors)} invalid node(s) in {SETTINGS_FILE}.")
 
     # We still run create_structure. 
     # Since we just removed missing folders from json_data, this will effectively 
     # just verify that the remaining folders still exist (which they should).
-    create_structure(json_data)
+    profiler.begin("create_structure")
+    create_structure(settings_tree, snapshot)
 
-    try:
-        expected_paths = get_expected_paths(json_data['structure'])
-    except ValueError as e:
-        logging.fatal(f"FATAL VALIDATION ERROR: {e}")
-        exit_script(EXIT_CODE_ERROR)
+    profiler.begin("unknown_scan")
+    expected_paths = get_expected_paths(settings_tree)
     
     # ------------------------------------------------------------------------------------
     # 4.5. Handle unknown folders
@@ -1668,10 +3559,53 @@ def main_build():
     logging.info("--- Checking for unknown folders not defined in settings.json ---")
     
     # Get a list of folders to ignore based on "is_include": "false"
-    paths_to_ignore = get_paths_to_ignore_for_scan(json_data['structure'])
-    unknown_folders = find_unknown_folders(expected_paths, paths_to_ignore)
-    
-    if unknown_folders:
+    paths_to_ignore = get_paths_to_ignore_for_scan(settings_tree)
+    unknown_folders = find_unknown_folders(expected_paths, paths_to_ignore, snapshot, ignore_matcher)
+    if ignore_matcher.pruned:
+        logging.info(f"{ignore_matcher.pruned} folder(s) pruned by the ignore rules.")
+
+    # Everything the rest of the build needs, in JSON values (the build checkpoint)
+    state = {
+        "project_root": project_root,
+        "is_initial_run": is_initial_run,
+        "start_script": StartAHKScriptOutput,
+        "config_path": config_relative_path,
+        "settings": json_data,
+        "settings_source_path": json_source_absolutePath,
+        "settings_path": loaded_settings_json_path,
+        "settings_dirty": structure_was_modified,
+        "expected_paths": expected_paths,
+        "paths_to_ignore": paths_to_ignore,
+        "unknown_folders": unknown_folders,
+        "pruned_count": ignore_matcher.pruned,
+    }
+    _finish_build(project_root, pathfile, include_output, options, result, profiler, state, settings_tree, snapshot, ignore_matcher)
+
+def _finish_build(project_root, pathfile, include_output, options, result, profiler, state, settings_tree, snapshot, ignore_matcher):
+    """
+    Second half of build(), from the unknown-folder prompt to the launch.
+    'state' holds what the first half computed, so a build relaunched in a
+    new console resumes here from a checkpoint (see save_build_checkpoint).
+    """
+    is_initial_run = state["is_initial_run"]
+    StartAHKScriptOutput = state["start_script"]
+    json_data = state["settings"]
+    json_source_absolutePath = state["settings_source_path"]
+    loaded_settings_json_path = state["settings_path"]
+    unknown_folders = state["unknown_folders"]
+    settings_store = SettingsStore(json_data, loaded_settings_json_path, state["settings_dirty"])
+    pathsAHK_source = os.path.join(project_root, pathfile)
+    profile_report_path = os.path.join(project_root, PROFILE_FILE)
+
+    result.is_initial_run = is_initial_run
+    result.start_script = StartAHKScriptOutput
+    result.unknown_folders = unknown_folders
+
+    if unknown_folders and not options.interactive:
+        logging.warning(f"Found {len(unknown_folders)} unknown folders (non-interactive build: left as they are).")
+
+    elif unknown_folders:
+        profiler.begin("unknown_prompt")
         
         # --- NOUVELLE VÉRIFICATION DE CONSOLE ---
         if not sys.stdout.isatty():
@@ -1679,67 +3613,75 @@ def main_build():
             logging.info("Tentative de relance dans une nouvelle console...")
 
             command_args = [sys.executable] + sys.argv
-            cmd_string = f'cmd.exe /k "{" ".join(command_args)}"'
+            # The dispatcher removed the options from sys.argv: give them back to the new console
+            for flag, enabled in (("--log", options.log), ("--profile", options.profile), ("--scan-report", options.scan_report)):
+                if enabled:
+                    command_args.append(flag)
+            # The new console resumes at this prompt instead of starting over
+            checkpoint_path = os.path.join(state["config_path"], BUILD_CHECKPOINT_FILE)
+            # The checkpoint is only valid for the settings.json on disk: save it first
+            _flush_settings(settings_store, result)
+            state["settings_dirty"] = settings_store.dirty
+            if save_build_checkpoint(os.path.join(project_root, checkpoint_path), state, snapshot):
+                command_args += ["--resume", checkpoint_path]
+            # Quoted for paths with spaces (interpreter, project folder, checkpoint)
+            cmd_string = f'cmd.exe /k "{subprocess.list2cmdline(command_args)}"'
             
             try:
                 subprocess.Popen(cmd_string, creationflags=subprocess.CREATE_NEW_CONSOLE)
                 logging.info(f"Script relancé avec succès dans une nouvelle console. Ce processus (caché) va se terminer.")
-                exit_script(0) 
+                result.relaunched = True
                 return
             
             except Exception as e:
                 logging.error(f"Échec de la relance dans une nouvelle console: {e}")
-                root_err = Tk()
-                root_err.withdraw()
-                messagebox.showerror("Erreur Critique", f"Impossible d'ouvrir un terminal pour gérer les dossiers inconnus.\n\nErreur: {e}")
-                root_err.destroy()
-                exit_script(EXIT_CODE_ERROR)
-                return
+                show_error_dialog("Erreur Critique", f"Impossible d'ouvrir un terminal pour gérer les dossiers inconnus.\n\nErreur: {e}")
+                raise BuildError(f"Could not open a console for the unknown folders: {e}") from e
         
         # --- SI ON EST ICI, LA CONSOLE EST VISIBLE ---
         logging.warning(f"Found {len(unknown_folders)} unknown folders.")
         
-        dialog_root = Tk()
-        dialog_root.withdraw()
-        
         structure_json_list = json_data.get('structure', [])
         
-        # NEW: Set to track folders that have been moved or added
-        handled_paths = set() 
+        # Folders that have been moved or added: their children are skipped
+        handled_paths = PathPrefixTrie()
+        settings_were_added = False
+        # Path -> node lookup for the 'add' action, updated as folders are added
+        settings_index = SettingsPathIndex(structure_json_list)
+        # Asks about files already present at a 'move' destination
+        conflict_prompt = ConflictPromptCLI()
         
         print(f"\n--- GESTION DES {len(unknown_folders)} DOSSIERS INCONNUS ---")
         
         for unknown_folder in unknown_folders:
             
-            # --- NEW: Check if this folder is a child of an already handled one ---
-            is_already_handled = False
-            for handled_root in handled_paths:
-                # Check if unknown_folder starts with "handled_root/"
-                if unknown_folder.startswith(handled_root + os.sep):
-                    logging.info(f"Skipping '{unknown_folder}' as it is a child of already handled '{handled_root}'.")
-                    is_already_handled = True
-                    break
-            
-            if is_already_handled:
+            # --- Check if this folder is a child of an already handled one ---
+            handled_root = handled_paths.find_root(unknown_folder)
+            if handled_root is not None:
+                logging.info(f"Skipping '{unknown_folder}' as it is a child of already handled '{handled_root}'.")
                 continue
             # --- End of check ---
 
             # 1. Call the new action function
             action, data = select_action_cli(
                 unknown_folder,
-                structure_json_list
+                structure_json_list,
+                settings_index
             )
             
             if action == 'move':
                 # 2. User chose 'move'
                 destination = data
-                src_path = os.path.join(os.getcwd(), unknown_folder)
-                dst_path = os.path.join(os.getcwd(), destination)
+                src_path = os.path.join(project_root, unknown_folder)
+                dst_path = os.path.join(project_root, destination)
                 
                 print(f"Déplacement de '{src_path}' vers '{dst_path}'...")
                 
-                copy_folder_contents(src_path, dst_path, dialog_root)
-                delete_source_folder(src_path, dialog_root)
+                merge_move_folder(src_path, dst_path, conflict_prompt)
+
+                # The disk changed under the snapshot: list both folders again
+                snapshot.invalidate(unknown_folder)
+                snapshot.invalidate(destination)
                 
                 # Add to handled set so we skip its children
                 handled_paths.add(unknown_folder) 
@@ -1748,14 +3690,17 @@ def main_build():
                 # 3. User chose 'add'
                 parent_path = data
                 
-                # Call the new function to write to settings.json
-                # We pass the *full* json_data dict, and the path to settings.json
-                add_folder_to_settings(
-                    json_data,          # The full dict
+                # Adds the folder to settings.json in memory (saved once, below)
+                if add_folder_to_settings(
+                    settings_store,
                     unknown_folder,     # e.g., "Library/NewModule"
                     parent_path,        # e.g., "Library"
-                    loaded_settings_json_path # <--- CORRECTION : Utiliser le chemin chargé
-                )
+                    project_root,
+                    settings_index,
+                    ignore_matcher,
+                    ask_add_mode_cli    # Preview of the nodes, collapsed node for large trees
+                ):
+                    settings_were_added = True
                 
                 # Add to handled set so we skip its children
                 handled_paths.add(unknown_folder)
@@ -1766,23 +3711,33 @@ def main_build():
                 print(f"Dossier '{unknown_folder}' ignoré.")
                 # We DO NOT add to handled_paths, allowing children to be processed
         
-        # Clean up the hidden Tk root
-        dialog_root.destroy()
         logging.info("--- Fin du traitement des dossiers inconnus ---")
+
+        if settings_were_added:
+            # New nodes were written to json_data: compile it again for the generation
+            settings_tree = compile_settings_tree(json_data, project_root, snapshot=snapshot, ignore_matcher=ignore_matcher)
+            if not report_settings_problems(settings_tree):
+                raise BuildError(f"{len(settings_tree.errors)} invalid node(s) in {SETTINGS_FILE}.")
         
     else:
         logging.info("No unknown folders found. Structure is clean.")
     # ------------------------------------------------------------------------------------
-    # 5. Post-build (Move JSON and write PATHFILE to ROOT)
+    # 5. Post-build (Save and move JSON, write PATHFILE to ROOT)
     # ------------------------------------------------------------------------------------
     
-   # Call the corrected function (post_build_actions)
+    profiler.begin("post_build")
+    # Every change of this build to settings.json is written here, in one write
+    _flush_settings(settings_store, result)
+    # Call the corrected function (post_build_actions)
     # It writes PATHFILE to root and returns the paths we need.
     pathsAHK_jsonPathVar_result, config_relative_path_result = post_build_actions(
         source_path=json_source_absolutePath, # The local settings.json (root)
         json_data=json_data,
         is_initial_run=is_initial_run,
-        StartAHKScriptOutput=StartAHKScriptOutput
+        StartAHKScriptOutput=StartAHKScriptOutput,
+        project_root=project_root,
+        pathfile=pathfile,
+        changed_outputs=result.changed_outputs
     )
     # Ensure we use the returned config_path (e.g., .config)
     config_relative_path = config_relative_path_result
@@ -1793,40 +3748,1092 @@ def main_build():
     # 6. Generate the INCLUDE_OUTPUT file (in .config)
     # ------------------------------------------------------------------------------------
     
+    # Symbols and nested #include lines of the modules, only parsed again when they changed
+    profiler.begin("ahk_index")
+    ahk_index = update_ahk_index(settings_tree, config_relative_path, snapshot)
+
     # generate_INCLUDE_OUTPUT expects 'config_relative_path'
-    generate_INCLUDE_OUTPUT(
-        json_data, 
+    profiler.begin("include_generation")
+    # Every module read below: nested #include lines and hotkeys change the output too
+    build_inputs = ahk_index.inputs
+    include_file_path = generate_INCLUDE_OUTPUT(
+        settings_tree, 
         pathsAHK_jsonPathVar, 
         is_initial_run, 
         StartAHKScriptOutput,
-        config_relative_path # <- Pass the config path (e.g., .config)
+        config_relative_path, # <- Pass the config path (e.g., .config)
+        include_output,
+        snapshot,
+        result.changed_outputs,
+        build_inputs,
+        ahk_index
     )
+    result.settings_path = pathsAHK_jsonPathVar
+    result.include_file_path = include_file_path
+
+    # Hotkeys defined twice in one context only fail when AutoHotkey loads the script
+    profiler.begin("hotkey_check")
+    result.hotkey_duplicates = report_hotkey_collisions(find_hotkey_collisions(ahk_index))
+
+    # Record this build so an unchanged project skips straight to the launch next time.
+    # Not saved while unknown folders exist, so the user is asked about them again.
+    if unknown_folders:
+        logging.info("Unknown folders were found: build cache not saved.")
+    else:
+        profiler.begin("cache_save")
+        result.build_cache = save_build_cache(pathsAHK_jsonPathVar, pathsAHK_source, include_output, include_file_path, config_relative_path, snapshot, build_inputs)
     
     # ------------------------------------------------------------------------------------
     # 7. Action on the Final script (e.g., Deepr.ahk)
     # ------------------------------------------------------------------------------------
     
     # final_script_actions expects 'config_relative_path'
-    # INCLUDE_OUTPUT is the *filename* (e.g., .include.ahk)
+    # include_output is the *filename* (e.g., .include.ahk)
+    profiler.begin("launch")
     final_script_actions(
         StartAHKScriptOutput,       # e.g., Deepr.ahk (at root)
         is_initial_run, 
-        INCLUDE_OUTPUT,             # e.g., .include.ahk (filename)
-        config_relative_path        # e.g., .config (folder where the include is)
+        include_output,             # e.g., .include.ahk (filename)
+        config_relative_path,       # e.g., .config (folder where the include is)
+        project_root,
+        options.launch and (options.interactive or not unknown_folders),
+        result.changed_outputs
     ) 
 
+    result.pruned_count = ignore_matcher.pruned
+    if options.scan_report:
+        write_scan_report(os.path.join(project_root, SCAN_REPORT_FILE), settings_tree, snapshot, ahk_index)
+    profiler.report(
+        profile_report_path,
+        cache_hit=False,
+        folders_listed=snapshot.listed_count,
+        folders_reused=snapshot.reused_count,
+        unknown_folders=len(unknown_folders),
+        pruned=ignore_matcher.pruned,
+        hotkey_duplicates=result.hotkey_duplicates,
+    )
+
+def _flush_settings(settings_store, result):
+    """
+    Saves the changes of the build to settings.json. A failure is logged and
+    the build goes on with the in-memory structure.
+    """
+    try:
+        settings_store.flush(result.changed_outputs)
+    except OSError as e:
+        logging.error(f"Error saving updated settings.json: {e}")
+        print(f"ERREUR: Impossible de sauvegarder les modifications dans '{settings_store.path}'.")
+
+def main_build(profile=False, resume=None, scan_report=False, log=False):
+    """
+    CLI entry point of the 'build' mode: main.py build <python_cmd> <ahk_path_file> <ahk_include_file>.
+    Runs build() in the current directory and exits with its status.
+    'resume' is the checkpoint file given with --resume, 'scan_report' is --scan-report,
+    'log' is --log.
+    """
+    try:
+        # sys.argv[2] is the Python command path
+        PYTHON_CMD = sys.argv[2] 
+        logging.info(f"Python command detected via command-line argument: {PYTHON_CMD}")
+
+        # sys.argv[3] is the output AHK Path file name (e.g., paths.ahk)
+        pathfile = sys.argv[3]
+        logging.info(f"Output PATHFILE (path config) file name detected via command-line argument: {pathfile}")
+
+        # sys.argv[4] is the output AHK include file name (e.g., .includes.ahk)
+        include_output = sys.argv[4]
+        logging.info(f"Output INCLUDE_OUTPUT (includes) file name detected via command-line argument: {include_output}")
+
+    except IndexError:
+        raise ValueError("Error: Arguments are missing. Usage: main.py build <python_cmd> <ahk_path_file> <ahk_include_file> [--log]")
+
+    try:
+        build(os.getcwd(), pathfile, include_output, BuildOptions(profile=profile, resume=resume, scan_report=scan_report, log=log))
+    except BuildError as e:
+        logging.error(f"Build failed: {e}")
+        exit_script(EXIT_CODE_ERROR)
+    exit_script(0)
+
+def pop_cli_options(argv, flags=(), value_flags=()):
+    """
+    Removes the options from argv (in place), so the indices of the positional
+    arguments (mode, python_cmd, ...) stay correct wherever the options are
+    written. 'flags' are switches, 'value_flags' take the argument after them.
+
+    Returns:
+        dict: {flag: bool} for 'flags' and {flag: value or None} for 'value_flags'.
+    """
+    options = {}
+    for flag in flags:
+        options[flag] = flag in argv
+        while flag in argv:
+            argv.remove(flag)
+    for flag in value_flags:
+        options[flag] = None
+        if flag in argv:
+            index = argv.index(flag)
+            options[flag] = argv[index + 1] if index + 1 < len(argv) else None
+            del argv[index:index + 2]
+    return options
+
+# =================================================================
+# AHK SOURCE INDEX
+# =================================================================
+
+# Lines of AutoHotkey v2 source recognized by parse_ahk_symbols
+_AHK_HOTIF_PATTERN = re.compile(r'^#HotIf\b\s*(.*)$', re.IGNORECASE)
+_AHK_INCLUDE_PATTERN = re.compile(r'^#include(?:again)?\s+(\*i\s+)?(.+)$', re.IGNORECASE)
+_AHK_HOTSTRING_PATTERN = re.compile(r'^:([^:\s]*):(.+?)::(.*)$')
+# A key is one character (e.g. '"' or '(') or a name without quotes nor parentheses,
+# so 'Send("a::b")' or 'MsgBox "x::y"' are not read as hotkeys
+_AHK_HOTKEY_KEY = r'(?:[^\s("\']+?|\S)'
+_AHK_HOTKEY_PATTERN = re.compile(
+    rf'^([#!^+<>*~$]*{_AHK_HOTKEY_KEY}(?:\s+&\s+~?{_AHK_HOTKEY_KEY})?(?:\s+up)?)::(.*)$', re.IGNORECASE
+)
+_AHK_CLASS_PATTERN = re.compile(r'^class\s+([A-Za-z_]\w*)(?:\s+extends\s+([\w.]+))?', re.IGNORECASE)
+_AHK_FUNCTION_PATTERN = re.compile(r'^(?:static\s+)?([A-Za-z_]\w*)\((.*)\)\s*(\{|=>)?')
+_AHK_STRING_PATTERN = re.compile(r'"(?:[^"`]|`.)*"|\'(?:[^\'`]|`.)*\'')
+_AHK_COMMENT_PATTERN = re.compile(r'(?:^|\s);.*$')
+# Control flow statements look like function calls: 'if (x) {', 'while(...)'
+_AHK_KEYWORDS = frozenset((
+    "if", "else", "while", "loop", "for", "switch", "case", "catch", "try", "finally",
+    "until", "return", "throw", "global", "local", "static", "and", "or", "not",
+))
+
+def _strip_ahk_code(line):
+    """Removes strings and the trailing comment of a line of code (for brace counting)."""
+    return _AHK_COMMENT_PATTERN.sub('', _AHK_STRING_PATTERN.sub('""', line))
+
+def parse_ahk_symbols(text):
+    """
+    Line-based scan of an AutoHotkey v2 source for the definitions the build
+    checks need. Block comments and continuation sections are skipped, and
+    braces are counted outside strings and comments to qualify methods with
+    their class. This is not a full parser: hotkeys created at runtime with
+    Hotkey() and code inside strings are not seen.
+
+    Returns:
+        dict: Lists of [line number, ...] entries:
+            hotkeys: [line, key, #HotIf context]
+            hotstrings: [line, trigger, options, #HotIf context]
+        The #HotIf context is the expression of the last #HotIf of the file,
+        "" after a bare #HotIf (global), None when no #HotIf precedes it
+        (the context the file is included under applies).
+            functions: [line, name] ('Class.Method' inside a class)
+            classes: [line, name, base class or None] ('Outer.Inner' when nested)
+            includes: [line, target as written (quotes removed), optional (*i)]
+    """
+    symbols = {"hotkeys": [], "hotstrings": [], "functions": [], "classes": [], "includes": []}
+    lines = text.splitlines()
+    context = None
+    depth = 0
+    class_stack = [] # [name, depth before the class, body opened]
+    in_block_comment = False
+    in_continuation = False
+
+    for index, raw_line in enumerate(lines):
+        line_number = index + 1
+        line = raw_line.strip()
+
+        # --- Skipped regions ---
+        if in_block_comment:
+            if "*/" in line:
+                in_block_comment = False
+            continue
+        if line.startswith("/*"):
+            in_block_comment = "*/" not in line[2:]
+            continue
+        if in_continuation:
+            if line.startswith(")"):
+                in_continuation = False
+            continue
+        if line.startswith("(") and ")" not in line:
+            in_continuation = True
+            continue
+        if not line or line.startswith(";"):
+            continue
+
+        # --- Directives ---
+        if line.startswith("#"):
+            match = _AHK_HOTIF_PATTERN.match(line)
+            if match:
+                context = _AHK_COMMENT_PATTERN.sub('', match.group(1)).strip()
+                continue
+            match = _AHK_INCLUDE_PATTERN.match(line)
+            if match:
+                target = _AHK_COMMENT_PATTERN.sub('', match.group(2)).strip()
+                if len(target) > 1 and target[0] == target[-1] and target[0] in "\"'":
+                    target = target[1:-1]
+                symbols["includes"].append([line_number, target, bool(match.group(1))])
+                continue
+
+        # --- Hotstrings and hotkeys (the key may hold quotes or braces) ---
+        code = line
+        match = _AHK_HOTSTRING_PATTERN.match(line)
+        if match:
+            symbols["hotstrings"].append([line_number, match.group(2), match.group(1), context])
+            # Only a function body counts: the rest is the replacement text
+            code = match.group(3) if match.group(3).strip().startswith("{") else ""
+        elif not line.startswith(":"):
+            match = _AHK_HOTKEY_PATTERN.match(line)
+            if match:
+                symbols["hotkeys"].append([line_number, match.group(1), context])
+                code = match.group(2)
+
+        if code is line:
+            class_path = [entry[0] for entry in class_stack]
+            match = _AHK_CLASS_PATTERN.match(line)
+            if match:
+                name = ".".join(class_path + [match.group(1)])
+                symbols["classes"].append([line_number, name, match.group(2)])
+                class_stack.append([name.rsplit(".", 1)[-1], depth, False])
+            else:
+                match = _AHK_FUNCTION_PATTERN.match(_strip_ahk_code(line).strip())
+                if match and match.group(1).lower() not in _AHK_KEYWORDS:
+                    is_definition = bool(match.group(3))
+                    if not is_definition:
+                        # One True Brace is optional: '{' may open the body on the next line
+                        for next_line in lines[index + 1:]:
+                            next_line = next_line.strip()
+                            if next_line and not next_line.startswith(";"):
+                                is_definition = next_line.startswith("{")
+                                break
+                    if is_definition:
+                        symbols["functions"].append([line_number, ".".join(class_path + [match.group(1)])])
+
+        # --- Brace depth, to know when a class body ends ---
+        code = _strip_ahk_code(code)
+        depth += code.count("{") - code.count("}")
+        while class_stack:
+            entry = class_stack[-1]
+            if depth > entry[1]:
+                entry[2] = True
+                break
+            if entry[2]:
+                class_stack.pop()
+            else:
+                break
+
+    return symbols
+
+class IncludeGraph:
+    """
+    Nested #include dependencies between .ahk files: relative path -> the
+    files its #include lines load, in line order. Built from the #include
+    targets of the AHK index, so a file is only parsed again when its hash
+    changes. Targets that cannot be resolved statically (library includes
+    such as <Lib>, unknown variables, missing files) are left out.
+
+    load_order() walks the graph with an explicit stack and collects, in
+    'issues', the cycles and the #include lines that load nothing new.
+    """
+
+    def __init__(self, index):
+        self.index = index
+        self._edges = {}
+        self.issues = {} # Message -> logging level, once per message
+
+    def _resolve(self, target, include_dir):
+        path = re.sub(r'%A_ScriptDir%', lambda _m: self.index.project_root, target, flags=re.IGNORECASE)
+        if '%' in path or path.startswith('<'):
+            return None
+        path = path.replace('\\', os.sep).replace('/', os.sep)
+        return os.path.normpath(os.path.join(include_dir, path))
+
+    def dependencies(self, rel_path):
+        """
+        Returns the [(line, relative path)] loaded by the #include lines of
+        rel_path. A relative target is resolved from the folder of the file,
+        or from the last '#include <folder>' above it.
+        """
+        edges = self._edges.get(rel_path)
+        if edges is not None:
+            return edges
+        edges = []
+        full_path = os.path.join(self.index.project_root, rel_path)
+        symbols = self.index.file_symbols(full_path)
+        include_dir = os.path.dirname(full_path)
+        for line, target, _optional in (symbols or {}).get("includes", ()):
+            # A_LineFile is the including file itself ('%A_LineFile%\..\x.ahk')
+            target = re.sub(r'%A_LineFile%', lambda _m: full_path, target, flags=re.IGNORECASE)
+            resolved = self._resolve(target, include_dir)
+            if resolved is None:
+                logging.debug(f"Include graph: '{target}' ({rel_path}:{line}) cannot be resolved statically.")
+            elif os.path.isdir(resolved):
+                include_dir = resolved
+            elif os.path.isfile(resolved):
+                edges.append((line, os.path.relpath(resolved, self.index.project_root)))
+            else:
+                logging.debug(f"Include graph: '{target}' ({rel_path}:{line}) not found.")
+        self._edges[rel_path] = edges
+        return edges
+
+    def visit_all(self, rel_paths):
+        """Resolves (and indexes) every file reachable from rel_paths."""
+        pending = list(rel_paths)
+        seen = set(pending)
+        while pending:
+            for _line, dep in self.dependencies(pending.pop()):
+                if dep not in seen:
+                    seen.add(dep)
+                    pending.append(dep)
+
+    def load_order(self, rel_path, loaded):
+        """
+        Returns the files that '#include rel_path' loads, dependencies first
+        (topological order), as [(relative path, path of the including file
+        or None for rel_path)]. Files in 'loaded' are not loaded again and not
+        descended into: AutoHotkey skips a file it already included.
+        """
+        order = []
+        state = {rel_path: False} # False while on the stack, True once done
+        stack = [(rel_path, None, iter(self.dependencies(rel_path)))]
+        while stack:
+            node, parent, edges = stack[-1]
+            for line, dep in edges:
+                if dep in loaded or state.get(dep) is True:
+                    self.issues[f"Redundant #include in {node}:{line}: '{dep}' is already included."] = logging.INFO
+                elif dep in state:
+                    cycle = [entry[0] for entry in stack]
+                    cycle = cycle[cycle.index(dep):] + [dep]
+                    self.issues[f"#include cycle: {' -> '.join(cycle)}."] = logging.WARNING
+                else:
+                    state[dep] = False
+                    stack.append((dep, node, iter(self.dependencies(dep))))
+                    break
+            else:
+                stack.pop()
+                state[node] = True
+                order.append((node, parent))
+        return order
+
+    def report(self):
+        """Logs the issues collected by load_order since the last report."""
+        for message, level in self.issues.items():
+            logging.log(level, message)
+        self.issues = {}
+
+def _parse_ahk_bytes(data):
+    return parse_ahk_symbols(data.decode('utf-8-sig', errors='replace'))
+
+class AhkIndex(SignatureCache):
+    """
+    Incremental symbol index of the included .ahk files, stored in the config
+    directory: {relative path: [mtime_ns, size, sha1, symbols]} (see
+    parse_ahk_symbols and SignatureCache: a file is only parsed again when
+    its content hash changes). Entries are kept in include order.
+    """
+    label = "AHK index"
+
+    def __init__(self, index_path, project_root):
+        super().__init__(index_path, AHK_INDEX_VERSION, "files")
+        self.project_root = project_root
+        self.contexts = {} # Relative path -> context the file is loaded under
+        self.graph = IncludeGraph(self)
+
+    @property
+    def files(self):
+        """{relative path: symbols} of the indexed files, in include order."""
+        return {rel_path: entry[3] for rel_path, entry in self._used.items()}
+
+    @property
+    def inputs(self):
+        """{absolute path: [mtime_ns, size]} of the indexed files (build cache inputs)."""
+        return {
+            os.path.abspath(os.path.join(self.project_root, rel_path)): entry[:2]
+            for rel_path, entry in self._used.items()
+        }
+
+    def file_size(self, rel_path):
+        """Size in bytes of an indexed file, or None."""
+        entry = self._used.get(rel_path)
+        return entry[1] if entry else None
+
+    def file_symbols(self, full_path):
+        """
+        Returns the symbols of full_path, parsing it only if its content
+        changed since it was indexed. None if it cannot be read.
+        """
+        rel_path = os.path.relpath(full_path, self.project_root)
+        try:
+            return self.lookup(rel_path, full_path, _parse_ahk_bytes)[3]
+        except OSError as e:
+            logging.warning(f"Index: cannot read '{full_path}' ({e}).")
+            return None
+
+    def update(self, tree, snapshot=None):
+        """
+        Indexes every .ahk file included by the compiled settings tree (the
+        folders scanned by generate_ahk_includes), in the same order, and
+        records the context of its folder, then the files they #include.
+        """
+        if snapshot is None:
+            snapshot = FsSnapshot(tree.root)
+        listed = []
+        for node in tree.walk():
+            if node.include_dir is None or not node.include_effective or not snapshot.is_dir(node.include_dir):
+                continue
+            for item_name in sorted(snapshot.ahk_files(node.include_dir)):
+                full_path = os.path.join(tree.root, node.include_dir, item_name)
+                self.file_symbols(full_path)
+                rel_path = os.path.relpath(full_path, self.project_root)
+                self.contexts[rel_path] = include_context(node)
+                listed.append(rel_path)
+        # Nested includes, outside the settings.json folders
+        self.graph.visit_all(listed)
+
+def update_ahk_index(tree, config_path, snapshot=None):
+    """
+    Brings the AHK index of the config directory up to date with the
+    compiled settings tree (and the files they #include) and saves it.
+
+    Returns:
+        AhkIndex: The updated index.
+    """
+    index = AhkIndex(os.path.join(tree.root, config_path, AHK_INDEX_FILE), tree.root)
+    index.update(tree, snapshot)
+    index.save()
+    logging.info(f"AHK index: {len(index.files)} files ({index.changed_count} parsed, "
+                 f"{index.read_count - index.changed_count} unchanged, {index.reused_count} reused).")
+    return index
+
+# Hotkey name spellings accepted by AutoHotkey for the same key
+_AHK_KEY_ALIASES = {
+    "escape": "esc", "return": "enter", "delete": "del", "insert": "ins",
+    "control": "ctrl", "bs": "backspace",
+}
+
+def normalize_ahk_hotkey(key):
+    """
+    Returns the canonical form of a hotkey, so that two spellings of the same
+    hotkey compare equal: lowercase, modifiers sorted, key aliases resolved,
+    and the '~' and '$' prefixes dropped (they do not make a distinct hotkey).
+    E.g. "+^Esc" and "^+Escape" both give "+^esc".
+    """
+    key = key.strip().lower()
+    suffix = ""
+    if key.endswith(" up"):
+        key = key[:-3].rstrip()
+        suffix = " up"
+    if " & " in key:
+        # Custom combination: the order of the two keys matters
+        parts = [part.strip().lstrip("~$") for part in key.split(" & ", 1)]
+        return " & ".join(_AHK_KEY_ALIASES.get(part, part) for part in parts) + suffix
+
+    modifiers = set()
+    wildcard = ""
+    index = 0
+    # The last character is always (part of) the key name, e.g. "+" in "^+"
+    while index < len(key) - 1 and key[index] in "#!^+<>*~$":
+        char = key[index]
+        if char in "<>" and key[index + 1] in "#!^+":
+            modifiers.add(char + key[index + 1])
+            index += 1
+        elif char == "*":
+            wildcard = "*"
+        elif char in "#!^+":
+            modifiers.add(char)
+        index += 1
+    name = key[index:]
+    return wildcard + "".join(sorted(modifiers)) + _AHK_KEY_ALIASES.get(name, name) + suffix
+
+def _normalize_hotif(expression):
+    return " ".join(expression.split()) or None
+
+# Two definitions of one hotkey: 'kind' is "duplicate" (same context, AutoHotkey
+# refuses to load the script) or "shadowed" (global, and overridden in 'context').
+# 'first' and 'second' are (relative path, line number).
+HotkeyCollision = namedtuple('HotkeyCollision', ('kind', 'hotkey', 'context', 'first', 'second'))
+
+def find_hotkey_collisions(index):
+    """
+    Finds the hotkeys defined more than once among the indexed files, using
+    the context each file is loaded under (#HotIf WinActive of its folder, or
+    of the file that #includes it) unless a #HotIf of the file itself applies. One dict lookup per hotkey:
+    definitions are keyed on (context, normalized hotkey).
+
+    Returns:
+        list: HotkeyCollision items, in include order.
+    """
+    definitions = {} # (context, hotkey) -> (rel_path, line)
+    global_definitions = {} # hotkey -> (rel_path, line)
+    context_definitions = {} # hotkey -> [(context, (rel_path, line))]
+    collisions = []
+
+    for rel_path, symbols in index.files.items():
+        include_win_active = index.contexts.get(rel_path)
+        file_context = f'WinActive("{include_win_active}")' if include_win_active else None
+        for line, key, hotif in symbols.get("hotkeys", ()):
+            context = file_context if hotif is None else _normalize_hotif(hotif)
+            hotkey = normalize_ahk_hotkey(key)
+            location = (rel_path, line)
+
+            first = definitions.get((context, hotkey))
+            if first:
+                collisions.append(HotkeyCollision("duplicate", key, context, first, location))
+                continue
+            definitions[(context, hotkey)] = location
+
+            if context is None:
+                global_definitions[hotkey] = location
+                for other_context, other_location in context_definitions.get(hotkey, ()):
+                    collisions.append(HotkeyCollision("shadowed", key, other_context, location, other_location))
+            else:
+                context_definitions.setdefault(hotkey, []).append((context, location))
+                if hotkey in global_definitions:
+                    collisions.append(HotkeyCollision("shadowed", key, context, global_definitions[hotkey], location))
+
+    return collisions
+
+def report_hotkey_collisions(collisions):
+    """
+    Logs the hotkey collisions: duplicates as warnings (the script will not
+    load). Global hotkeys overridden in a context are usually intended (an
+    application-specific version of a global hotkey): they are logged as
+    information.
+
+    Returns:
+        int: The number of duplicates.
+    """
+    duplicate_count = 0
+    for collision in collisions:
+        first = f"{collision.first[0]}:{collision.first[1]}"
+        second = f"{collision.second[0]}:{collision.second[1]}"
+        if collision.kind == "duplicate":
+            duplicate_count += 1
+            logging.warning(f"Hotkey '{collision.hotkey}' is defined twice in the {collision.context or 'global'} context: "
+                            f"{first} and {second}.")
+        else:
+            logging.info(f"Global hotkey '{collision.hotkey}' ({first}) is overridden under {collision.context} ({second}).")
+    if collisions:
+        logging.info(f"Hotkey check: {duplicate_count} duplicate(s), {len(collisions) - duplicate_count} overridden global hotkey(s).")
+    return duplicate_count
+
+def main_parser():
+    """
+    Indexes the .ahk files included by settings.json: main.py parser <python_cmd> <ahk_path_file> <ahk_include_file>.
+    Only the files changed since the previous run are parsed again. Nothing
+    else is generated; settings.json and the outputs are not modified.
+    """
+    # Same positional arguments as 'build' (checked by the dispatcher)
+    pathfile = sys.argv[3]
+    project_root = os.getcwd()
+
+    pathsAHK_source = os.path.join(project_root, pathfile)
+    pathsAHK_infos = read_ahk_variables(pathsAHK_source) if os.path.exists(pathsAHK_source) else None
+    if not pathsAHK_infos:
+        logging.error(f"'{pathfile}' is missing or invalid. Run 'main.py build' once before 'main.py parser'.")
+        exit_script(EXIT_CODE_ERROR)
+
+    settings_check = load_settings_json(os.path.join(project_root, pathsAHK_infos[0]))
+    if not settings_check:
+        exit_script(EXIT_CODE_ERROR)
+    json_data, _settings_abs_path = settings_check
+
+    config_relative_path = find_config_dir_path(json_data, json_keyConfig)
+    if not config_relative_path:
+        logging.error("The Configuration folder is not defined in settings.json.")
+        exit_script(EXIT_CODE_ERROR)
+    settings_tree = compile_settings_tree(json_data, project_root)
+    if not report_settings_problems(settings_tree):
+        exit_script(EXIT_CODE_ERROR)
+
+    started = time.perf_counter()
+    index = update_ahk_index(settings_tree, config_relative_path)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    totals = {kind: 0 for kind in ("hotkeys", "hotstrings", "functions", "classes", "includes")}
+    for symbols in index.files.values():
+        for kind in totals:
+            totals[kind] += len(symbols.get(kind, ()))
+    print(f"[parser] {len(index.files)} files indexed in {elapsed_ms:.1f} ms "
+          f"({index.changed_count} parsed, {index.reused_count + index.read_count - index.changed_count} unchanged): "
+          + ", ".join(f"{count} {kind}" for kind, count in totals.items()) + ".")
+    exit_script(0)
+
+# =================================================================
+# WATCH MODE
+# =================================================================
+
+class InotifyWatcher:
+    """
+    Change notifications through the Linux inotify API (via ctypes, no extra
+    dependency). 'is_relevant(dir_path, name, is_dir, content_only)' decides
+    which events should trigger a rebuild.
+    """
+    _IN_CLOSE_WRITE = 0x00000008
+    _IN_MOVED_FROM = 0x00000040
+    _IN_MOVED_TO = 0x00000080
+    _IN_CREATE = 0x00000100
+    _IN_DELETE = 0x00000200
+    _IN_DELETE_SELF = 0x00000400
+    _IN_MOVE_SELF = 0x00000800
+    _IN_Q_OVERFLOW = 0x00004000
+    _IN_IGNORED = 0x00008000
+    _IN_ISDIR = 0x40000000
+    _IN_CLOEXEC = 0o2000000
+    _EVENT_HEADER = struct.Struct('iIII') # wd, mask, cookie, len
+
+    _WATCH_MASK = (_IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE
+                   | _IN_DELETE | _IN_DELETE_SELF | _IN_MOVE_SELF)
+
+    def __init__(self, is_relevant):
+        import ctypes
+        import ctypes.util
+        self._ctypes = ctypes
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self._fd = self._libc.inotify_init1(self._IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._is_relevant = is_relevant
+        self._watches = {} # directory path -> watch descriptor
+        self._paths = {}   # watch descriptor -> directory path
+
+    def set_paths(self, dir_paths, file_paths=()):
+        """
+        Watches exactly dir_paths (adds new folders, drops the others).
+        Events on file_paths come through the watch of their folder, which
+        is added when it is not in dir_paths (modules loaded by a nested #include).
+        """
+        wanted = set(dir_paths)
+        wanted.update(os.path.dirname(path) for path in file_paths)
+        for path in [p for p in self._watches if p not in wanted]:
+            wd = self._watches.pop(path)
+            self._paths.pop(wd, None)
+            self._libc.inotify_rm_watch(self._fd, wd)
+        for path in wanted:
+            if path in self._watches:
+                continue
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), self._WATCH_MASK)
+            if wd < 0:
+                logging.debug(f"inotify: cannot watch '{path}' (errno {self._ctypes.get_errno()}).")
+                continue
+            self._watches[path] = wd
+            self._paths[wd] = path
+
+    def wait(self, timeout):
+        """
+        Blocks up to 'timeout' seconds (None = forever).
+        Returns True if at least one relevant change was received.
+        """
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return False
+
+        data = os.read(self._fd, 64 * 1024)
+        relevant = False
+        offset = 0
+        while offset < len(data):
+            wd, mask, _cookie, length = self._EVENT_HEADER.unpack_from(data, offset)
+            offset += self._EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+
+            if mask & self._IN_IGNORED:
+                # The kernel dropped this watch (folder deleted or moved)
+                path = self._paths.pop(wd, None)
+                self._watches.pop(path, None)
+                continue
+            if mask & (self._IN_Q_OVERFLOW | self._IN_DELETE_SELF | self._IN_MOVE_SELF):
+                relevant = True
+                continue
+
+            dir_path = self._paths.get(wd)
+            content_only = not (mask & ~self._IN_CLOSE_WRITE & self._WATCH_MASK)
+            if dir_path and self._is_relevant(dir_path, name, bool(mask & self._IN_ISDIR), content_only):
+                relevant = True
+        return relevant
+
+    def close(self):
+        os.close(self._fd)
+
+class PollingWatcher:
+    """
+    Portable fallback: compares the mtime of every watched folder and the
+    mtime/size of settings.json (and of the watched files) every 'interval' seconds.
+    """
+
+    def __init__(self, settings_json_path, interval):
+        self._settings_json_path = settings_json_path
+        self._interval = interval
+        self._dir_paths = []
+        self._file_paths = []
+        self._state = None
+
+    def _scan(self):
+        state = {path: _stat_signature(path) for path in self._dir_paths}
+        state.update((path, _stat_signature(path)) for path in self._file_paths)
+        state[self._settings_json_path] = _stat_signature(self._settings_json_path)
+        return state
+
+    def set_paths(self, dir_paths, file_paths=()):
+        self._dir_paths = list(dir_paths)
+        self._file_paths = list(file_paths)
+        self._state = self._scan()
+
+    def wait(self, timeout):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            sleep_for = self._interval
+            if deadline is not None:
+                sleep_for = max(0.0, min(sleep_for, deadline - time.monotonic()))
+            time.sleep(sleep_for)
+
+            state = self._scan()
+            if state != self._state:
+                self._state = state
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+
+    def close(self):
+        pass
+
+def regenerate_outputs(project_root, pathfile, include_output, settings_json_path, StartAHKScriptOutput, listing_cache=None):
+    """
+    Regenerates only pathfile and include_output from the current settings.json.
+    settings.json itself is never modified and unknown folders are not handled.
+
+    Returns:
+        tuple or None: (snapshot, watched_dirs, input_files) on success, else None.
+        'input_files' lists the modules read for include_output: the indexed
+        modules (nested #include lines, hotkeys) and the bundled ones.
+    """
+    settings_check = load_settings_json(settings_json_path)
+    if not settings_check:
+        return None
+    json_data, settings_abs_path = settings_check
+
+    config_relative_path = find_config_dir_path(json_data, json_keyConfig)
+    if 'structure' not in json_data or not json_data.get("RootName") or not config_relative_path:
+        logging.error("settings.json is missing 'structure', 'RootName' or the Configuration folder. Skipping rebuild.")
+        return None
+
+    snapshot = FsSnapshot(project_root, listing_cache)
+    settings_tree = compile_settings_tree(json_data, project_root, snapshot=snapshot)
+    if not report_settings_problems(settings_tree):
+        logging.error("Validation error, skipping rebuild.")
+        return None
+    expected_paths = get_expected_paths(settings_tree)
+    try:
+        post_build_actions(settings_abs_path, json_data, False, StartAHKScriptOutput, project_root, pathfile)
+        ahk_index = update_ahk_index(settings_tree, config_relative_path, snapshot)
+        build_inputs = ahk_index.inputs
+        generate_INCLUDE_OUTPUT(settings_tree, settings_abs_path, False, StartAHKScriptOutput, config_relative_path, include_output, snapshot,
+                                bundled_inputs=build_inputs, ahk_index=ahk_index)
+    except BuildError as e:
+        logging.error(f"Rebuild failed: {e}")
+        return None
+
+    watched_dirs = [project_root]
+    watched_dirs.extend(os.path.join(project_root, p) for p in expected_paths if snapshot.is_dir(p))
+    return snapshot, watched_dirs, sorted(build_inputs)
+
+def main_watch():
+    """
+    Long-running mode: regenerates PATHFILE and INCLUDE_OUTPUT each time a
+    folder of the settings.json structure, or settings.json itself, changes.
+    Uses inotify on Linux and polling elsewhere. Unknown folders are not
+    prompted for: run a normal build to add or move them.
+    """
+    # Same positional arguments as 'build' (checked by the dispatcher)
+    pathfile = sys.argv[3]
+    include_output = sys.argv[4]
+    project_root = os.getcwd()
+
+    pathsAHK_source = os.path.join(project_root, pathfile)
+    pathsAHK_infos = read_ahk_variables(pathsAHK_source) if os.path.exists(pathsAHK_source) else None
+    if not pathsAHK_infos:
+        logging.error(f"'{pathfile}' is missing or invalid. Run 'main.py build' once before 'main.py watch'.")
+        exit_script(EXIT_CODE_ERROR)
+
+    settings_json_path, StartAHKScriptOutput = pathsAHK_infos
+    settings_json_path = os.path.abspath(os.path.join(project_root, settings_json_path))
+    settings_dir = os.path.dirname(settings_json_path)
+    settings_name = os.path.normcase(os.path.basename(settings_json_path))
+    # Our own outputs must not trigger a new rebuild
+    own_outputs = {os.path.normcase(name) for name in (pathfile, include_output, BUILD_CACHE_FILE, BUILD_CHECKPOINT_FILE,
+                                                       BUNDLE_CACHE_FILE, AHK_INDEX_FILE)}
+    # The content of the indexed modules feeds the include file too: nested
+    # #include lines decide the load order, hotkeys the collision check, and
+    # in 'bundle' mode the modules are inlined
+    input_files = set()
+
+    def is_relevant(dir_path, name, is_dir, content_only):
+        if dir_path == settings_dir and os.path.normcase(name) == settings_name:
+            return True
+        if os.path.normcase(name) in own_outputs:
+            return False
+        if content_only:
+            return not is_dir and os.path.normcase(os.path.join(dir_path, name)) in input_files
+        # Only folder and .ahk names feed the generated files
+        return is_dir or os.path.normcase(name).endswith(".ahk")
+
+    watcher = None
+    if sys.platform.startswith("linux"):
+        try:
+            watcher = InotifyWatcher(is_relevant)
+            watcher_name = "inotify"
+        except (OSError, AttributeError) as e:
+            logging.warning(f"inotify unavailable ({e}). Falling back to polling.")
+    if watcher is None:
+        watcher = PollingWatcher(settings_json_path, WATCH_POLL_INTERVAL)
+        watcher_name = f"polling every {WATCH_POLL_INTERVAL}s"
+
+    print(f"[watch] Watching '{project_root}' ({watcher_name}). Press Ctrl+C to stop.")
+
+    listing_cache = None
+    watched_dirs = [project_root]
+    watched_files = []
+    try:
+        while True:
+            started = time.perf_counter()
+            result = regenerate_outputs(project_root, pathfile, include_output, settings_json_path, StartAHKScriptOutput, listing_cache)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+
+            if result:
+                snapshot, watched_dirs, watched_files = result
+                input_files.clear()
+                input_files.update(os.path.normcase(path) for path in watched_files)
+                # Keep the listings warm: only changed folders are listed again
+                listing_cache = snapshot.export_listings()
+                print(f"[watch] Rebuilt in {elapsed_ms:.1f} ms "
+                      f"({snapshot.listed_count} folders listed, {snapshot.reused_count} reused).")
+            else:
+                print(f"[watch] Rebuild failed after {elapsed_ms:.1f} ms (see log). Waiting for the next change...")
+
+            watcher.set_paths(watched_dirs + [settings_dir], watched_files)
+
+            # Block until a relevant change, then let the burst of events settle
+            while not watcher.wait(None):
+                pass
+            while watcher.wait(WATCH_DEBOUNCE_SECONDS):
+                pass
+    except KeyboardInterrupt:
+        print("\n[watch] Stopped.")
+    finally:
+        watcher.close()
+
+    exit_script(0)
+
+# =================================================================
+# BUILD SERVER
+# =================================================================
+
+def get_build_server_address(project_root):
+    """
+    Address of the build server of project_root: a named pipe on Windows
+    (its name must match Launcher.Server.PipeName in Launcher.ahk), a Unix
+    socket in the temporary directory elsewhere.
+    """
+    root = os.path.normcase(os.path.abspath(project_root))
+    if sys.platform == "win32":
+        return "\\\\.\\pipe\\deepr-build-" + re.sub(r'[^a-z0-9]', '_', root.lower())
+    import tempfile
+    digest = hashlib.sha1(root.encode('utf-8')).hexdigest()[:16]
+    return os.path.join(tempfile.gettempdir(), f"deepr-build-{digest}.sock")
+
+def _build_server_family():
+    return 'AF_PIPE' if sys.platform == "win32" else 'AF_UNIX'
+
+def request_build_server(project_root, request):
+    """
+    Sends one request (dict) to the build server of project_root and waits
+    for its reply. Messages are JSON documents (never pickles).
+
+    Returns:
+        dict or None: The reply, or None if no server answered.
+    """
+    from multiprocessing.connection import Client
+
+    address = get_build_server_address(project_root)
+    family = _build_server_family()
+    if family == 'AF_UNIX' and not os.path.exists(address):
+        return None
+    try:
+        with Client(address, family) as conn:
+            conn.send_bytes(json.dumps(request).encode('utf-8'))
+            return json.loads(conn.recv_bytes(BUILD_SERVER_MAX_MESSAGE).decode('utf-8'))
+    except (OSError, EOFError, ValueError) as e:
+        logging.debug(f"Build server unavailable at '{address}': {e}")
+        return None
+
+def handle_build_request(request, project_root, pathfile, include_output, state):
+    """
+    Serves one build server request. 'state' keeps what stays warm between
+    requests: the build cache of the last build and the main.py signature.
+
+    Returns:
+        tuple: (reply dict, keep_running)
+    """
+    command = request.get("command") if isinstance(request, dict) else None
+
+    if command == "ping":
+        return {"status": "ok", "pid": os.getpid(), "builds": state["builds"]}, True
+    if command == "stop":
+        return {"status": "stopped"}, False
+    if command != "build":
+        return {"status": "error", "error": f"Unknown command: {command}"}, True
+
+    # An updated main.py must not be served by the old code still in memory
+    if _stat_signature(os.path.abspath(__file__)) != state["script_signature"]:
+        logging.warning("main.py changed since the build server started. Stopping the server.")
+        return {"status": "stopped", "error": "main.py changed, build server stopped"}, False
+
+    options = BuildOptions(
+        interactive=False,
+        launch=bool(request.get("launch", True)),
+        build_cache=state["build_cache"],
+    )
+    try:
+        result = build(project_root, pathfile, include_output, options)
+    except BuildError as e:
+        state["build_cache"] = None
+        return {"status": "error", "error": str(e)}, True
+    except Exception as e:
+        # A daemon must survive a crashing build: report it and keep serving
+        logging.exception(f"Unhandled crash in a served build: {e}")
+        state["build_cache"] = None
+        return {"status": "error", "error": f"Unhandled crash: {e}"}, True
+
+    state["builds"] += 1
+    state["build_cache"] = result.build_cache
+    return {
+        # "status" stays first: Launcher.ahk reads it from a reply truncated to its buffer.
+        # Unknown folders need the prompts of an interactive (local) build
+        "status": "unknown_folders" if result.unknown_folders else "ok",
+        "cache_hit": result.cache_hit,
+        "changed_outputs": result.changed_outputs,
+        "unknown_folders": result.unknown_folders,
+        "pruned": result.pruned_count,
+        "hotkey_duplicates": result.hotkey_duplicates,
+        "timings": {phase: round(wall_ms, 3) for phase, wall_ms in result.timings.items()},
+    }, True
+
+def run_build_server(project_root, pathfile, include_output):
+    """
+    Listens on get_build_server_address(project_root) and serves the
+    requests one at a time, keeping the interpreter, main.py and the build
+    cache warm, so a build request only costs a cache check when nothing
+    changed. Builds are non-interactive: unknown folders are reported to
+    the client, which runs a normal build to prompt for them.
+
+    Returns:
+        bool: False if a server was already running for project_root,
+              True once a 'stop' request (or Ctrl+C) stopped this one.
+    """
+    from multiprocessing.connection import Listener
+
+    project_root = os.path.abspath(project_root)
+    address = get_build_server_address(project_root)
+    family = _build_server_family()
+    if request_build_server(project_root, {"command": "ping"}):
+        print(f"[serve] A build server is already running for '{project_root}'.")
+        return False
+    if family == 'AF_UNIX' and os.path.exists(address):
+        # Left behind by a server that did not stop cleanly
+        os.remove(address)
+
+    state = {
+        "builds": 0,
+        "build_cache": None,
+        "script_signature": _stat_signature(os.path.abspath(__file__)),
+    }
+
+    # Socket created readable/writable by the current user only
+    previous_umask = os.umask(0o177) if family == 'AF_UNIX' else None
+    try:
+        listener = Listener(address, family)
+    finally:
+        if previous_umask is not None:
+            os.umask(previous_umask)
+
+    print(f"[serve] Build server for '{project_root}' listening on {address}. Press Ctrl+C to stop.")
+    keep_running = True
+    try:
+        with listener:
+            while keep_running:
+                try:
+                    conn = listener.accept()
+                except OSError as e:
+                    logging.warning(f"Build server: connection failed: {e}")
+                    continue
+                with conn:
+                    try:
+                        request = json.loads(conn.recv_bytes(BUILD_SERVER_MAX_MESSAGE).decode('utf-8'))
+                    except (OSError, EOFError, ValueError) as e:
+                        logging.warning(f"Build server: invalid request: {e}")
+                        continue
+
+                    started = time.perf_counter()
+                    reply, keep_running = handle_build_request(request, project_root, pathfile, include_output, state)
+                    reply["server_ms"] = round((time.perf_counter() - started) * 1000, 3)
+                    try:
+                        conn.send_bytes(json.dumps(reply).encode('utf-8'))
+                    except OSError as e:
+                        logging.warning(f"Build server: could not send the reply: {e}")
+
+                if isinstance(request, dict) and request.get("command") == "build":
+                    print(f"[serve] Build {reply['status']} in {reply['server_ms']:.1f} ms"
+                          f"{' (cache hit)' if reply.get('cache_hit') else ''}.")
+    except KeyboardInterrupt:
+        pass
+    print("[serve] Stopped.")
+    return True
+
+def main_serve():
+    """
+    Resident build server: main.py serve <python_cmd> <ahk_path_file> <ahk_include_file>.
+    Serves the builds of the current directory (see run_build_server).
+    """
+    # Same positional arguments as 'build' (checked by the dispatcher)
+    run_build_server(os.getcwd(), sys.argv[3], sys.argv[4])
     exit_script(0)
 
+def main_client(profile=False, resume=None, scan_report=False, log=False):
+    """
+    Tiny client of the build server: main.py client <python_cmd> <ahk_path_file> <ahk_include_file> [--stop].
+    Sends a build request to the server of the current directory. Falls
+    back to a normal (local) build when no server answers, when the build
+    failed there, or when unknown folders need the interactive prompts.
+    The options of main_build (--profile, --resume, --scan-report) are not
+    sent to the server: with any of them, the build runs locally.
+    """
+    project_root = os.getcwd()
+
+    if "--stop" in sys.argv:
+        reply = request_build_server(project_root, {"command": "stop"})
+        print("[client] Build server stopped." if reply else "[client] No build server running.")
+        exit_script(0)
+
+    if profile or resume or scan_report:
+        logging.info("Options given for a local build only. Running a local build.")
+        main_build(profile=profile, resume=resume, scan_report=scan_report, log=log)
+
+    reply = request_build_server(project_root, {"command": "build", "launch": True})
+    if reply and reply.get("status") == "ok":
+        print(f"[client] Built by the server in {reply.get('server_ms', 0):.1f} ms"
+              f"{' (cache hit)' if reply.get('cache_hit') else ''}, "
+              f"{len(reply.get('changed_outputs', []))} file(s) written.")
+        exit_script(0)
+
+    if reply:
+        logging.info(f"Build server answered '{reply.get('status')}' ({reply.get('error', 'no error')}). Running a local build.")
+    else:
+        logging.info("No build server running. Running a local build.")
+    main_build(profile=profile, resume=resume, scan_report=scan_report, log=log)
+
 if __name__ == "__main__":
     
-    enable_logging = False
-    if "--log" in sys.argv:
-        enable_logging = True
-        # Remove the '--log' argument from sys.argv so that the indices
-        # of positional arguments (build, python_cmd, etc.) remain correct.
-        sys.argv.remove("--log")
+    cli_options = pop_cli_options(sys.argv, ("--log", "--profile", "--scan-report"), ("--resume",))
+    enable_logging = cli_options["--log"]
+    enable_profile = cli_options["--profile"]
+    enable_scan_report = cli_options["--scan-report"]
+    resume_checkpoint = cli_options["--resume"] # Checkpoint file of a relaunched build
 
-    setup_logging(enable_logging)
+    # Watch, serve and parser modes keep the console for their one-line reports (use --log for details)
+    is_quiet_mode = len(sys.argv) > 1 and sys.argv[1].lower() in ("watch", "serve", "parser")
+    setup_logging(enable_logging, logging.WARNING if is_quiet_mode and not enable_logging else logging.DEBUG)
 
     if len(sys.argv) < 2:
         print("❌ Error: Mode or command argument missing.")
@@ -1840,11 +4847,11 @@ if __name__ == "__main__":
         # Total: 5 arguments (main.py build python_cmd ahk_output_file)
         if len(sys.argv) < 5: # <--- (checks 5 necessary arguments)
             print("❌ Launch Error (BUILD)")
-            print("Usage: main.py build <python_cmd> <ahk_path_file> <ahk_include_file> [--log]")
+            print("Usage: main.py build <python_cmd> <ahk_path_file> <ahk_include_file> [--log] [--profile] [--scan-report] [--resume <checkpoint>]")
             sys.exit(1)
 
         try:
-            main_build()
+            main_build(profile=enable_profile, resume=resume_checkpoint, scan_report=enable_scan_report, log=enable_logging)
         # Capture all unhandled exceptions in main_build
         except Exception as e:
             # Print the full trace to the console for immediate diagnosis
@@ -1854,10 +4861,34 @@ if __name__ == "__main__":
             logging.error(f"Unhandled crash. See console. Error: {e}")
             exit_script(EXIT_CODE_ERROR) # Attempt clean exit
 
+    elif mode == "watch":
+        if len(sys.argv) < 5:
+            print("❌ Launch Error (WATCH)")
+            print("Usage: main.py watch <python_cmd> <ahk_path_file> <ahk_include_file> [--log]")
+            sys.exit(1)
+
+        main_watch()
+
+    elif mode in ("serve", "client"):
+        if len(sys.argv) < 5:
+            print(f"❌ Launch Error ({mode.upper()})")
+            print(f"Usage: main.py {mode} <python_cmd> <ahk_path_file> <ahk_include_file> [--log]"
+                  + (" [--stop]" if mode == "client" else ""))
+            sys.exit(1)
+
+        if mode == "serve":
+            main_serve()
+        else:
+            main_client(profile=enable_profile, resume=resume_checkpoint, scan_report=enable_scan_report, log=enable_logging)
+
     elif mode == "parser":
-        logging.error(f"Parsed Mode previously removed. Need to work on it.")
-        exit_script(EXIT_CODE_ERROR) # Attempt clean exit
+        if len(sys.argv) < 5:
+            print("❌ Launch Error (PARSER)")
+            print("Usage: main.py parser <python_cmd> <ahk_path_file> <ahk_include_file> [--log]")
+            sys.exit(1)
+
+        main_parser()
     else:
         print(f"❌ Error: Unrecognized mode: {mode}")
-        print("Available modes: build, parser")
+        print("Available modes: build, watch, serve, client, parser")
         sys.exit(1)
\ No newline at end of file
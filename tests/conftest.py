@@ -0,0 +1,39 @@
+import os
+import sys
+import random
+
+import pytest
+
+# main.py and benchmark.py sit at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+import benchmark
+
+
+@pytest.fixture
+def headless(monkeypatch):
+    """main.py without dialogs nor script launch (see benchmark.stub_user_interface)."""
+    monkeypatch.setattr(main, "show_error_dialog", lambda title, message: None)
+    monkeypatch.setattr(main, "ask_yes_no_dialog", lambda title, message: True)
+    monkeypatch.setattr(main, "launch_file", lambda path: None)
+
+
+def make_project(root, unknown_count=0):
+    """
+    Small synthetic project (see benchmark.generate_project), with its main
+    script already created: the first build does not add it to the root
+    folder after recording the folder mtimes in the build cache.
+    """
+    benchmark.generate_project(
+        str(root), node_count=12, depth=3, files_per_folder=2, include_ratio=1.0,
+        path_ratio=1.0, active_ratio=0.3, unknown_count=unknown_count, rng=random.Random(1),
+    )
+    with open(os.path.join(str(root), f"{benchmark.BENCH_ROOT_NAME}.ahk"), 'w', encoding='utf-8') as f:
+        f.write("#Requires AutoHotkey v2.0\n")
+    return str(root)
+
+
+@pytest.fixture
+def project(tmp_path, headless):
+    return make_project(tmp_path)
@@ -0,0 +1,48 @@
+"""
+AHK symbol parser (parse_ahk_symbols) and hotkey collision report.
+"""
+import logging
+
+import main
+
+
+def hotkey_names(text):
+    return [key for _line, key, _context in main.parse_ahk_symbols(text)["hotkeys"]]
+
+
+def test_hotkeys_are_found():
+    text = "\n".join((
+        '^!F1::MsgBox "one"',
+        '#HotIf WinActive("ahk_exe App.exe")',
+        'a & b::Send("x")',
+        '~LButton up::',
+        '{',
+        '}',
+        '"::Send "quote"',
+        '^(::Send "paren"',
+    ))
+    assert hotkey_names(text) == ['^!F1', 'a & b', '~LButton up', '"', '^(']
+
+
+def test_calls_and_strings_holding_a_double_colon_are_not_hotkeys():
+    text = "\n".join((
+        'Send("a::b")',
+        'MsgBox "x::y"',
+        "MsgBox('x::y')",
+        'value := "key::value"',
+        'Run(A_ComSpec " /c echo a::b")',
+    ))
+    assert hotkey_names(text) == []
+
+
+def test_overridden_global_hotkeys_are_reported_at_info(caplog):
+    collisions = [
+        main.HotkeyCollision("shadowed", "^a", 'WinActive("ahk_exe App.exe")', ("Global.ahk", 1), ("App.ahk", 3)),
+        main.HotkeyCollision("duplicate", "^b", None, ("Global.ahk", 2), ("Other.ahk", 5)),
+    ]
+    with caplog.at_level(logging.INFO):
+        assert main.report_hotkey_collisions(collisions) == 1
+
+    shadowed = [record for record in caplog.records if "overridden under" in record.getMessage()]
+    assert [record.levelno for record in shadowed] == [logging.INFO]
+    assert "Global.ahk:1" in shadowed[0].getMessage() and "App.ahk:3" in shadowed[0].getMessage()
@@ -0,0 +1,90 @@
+"""
+Build checkpoint: a build without a terminal saves its state and relaunches
+itself with --resume; the relaunched build continues at the unknown-folder
+prompt unless the project changed in between.
+"""
+import io
+import os
+
+import main
+import benchmark
+from conftest import make_project
+
+
+class TerminalOutput(io.StringIO):
+    def isatty(self):
+        return True
+
+
+def relaunch_build(project, monkeypatch):
+    """
+    Runs an interactive build without a terminal. Returns its result and the
+    command line of the new console (nothing is started).
+    """
+    commands = []
+    monkeypatch.setattr(main.sys, "stdout", io.StringIO())
+    monkeypatch.setattr(main.sys, "argv", ["main.py", "build", "python", benchmark.BENCH_PATHFILE, benchmark.BENCH_INCLUDE_OUTPUT])
+    monkeypatch.setattr(main.subprocess, "CREATE_NEW_CONSOLE", 0x10, raising=False)
+    monkeypatch.setattr(main.subprocess, "Popen", lambda command, **kwargs: commands.append(command))
+
+    options = main.BuildOptions(launch=False, log=True, profile=True)
+    result = main.build(project, benchmark.BENCH_PATHFILE, benchmark.BENCH_INCLUDE_OUTPUT, options)
+    return result, commands
+
+
+def resume_build(project, monkeypatch):
+    """
+    Runs the relaunched build (with a terminal). Returns its result and the
+    unknown folders it prompted for (all skipped).
+    """
+    prompted = []
+
+    def select_action_cli(unknown_folder, structure_json, settings_index=None):
+        prompted.append(unknown_folder)
+        return 'skip', None
+
+    monkeypatch.setattr(main.sys, "stdout", TerminalOutput())
+    monkeypatch.setattr(main, "select_action_cli", select_action_cli)
+
+    checkpoint_path = os.path.join(".config", main.BUILD_CHECKPOINT_FILE)
+    options = main.BuildOptions(launch=False, resume=checkpoint_path)
+    result = main.build(project, benchmark.BENCH_PATHFILE, benchmark.BENCH_INCLUDE_OUTPUT, options)
+    return result, prompted
+
+
+def test_relaunched_build_resumes_at_the_unknown_folder_prompt(tmp_path, headless, monkeypatch):
+    project = make_project(tmp_path / "My Project", unknown_count=2)
+
+    first, commands = relaunch_build(project, monkeypatch)
+    assert first.relaunched
+    assert len(first.unknown_folders) == 2
+    checkpoint_file = os.path.join(project, ".config", main.BUILD_CHECKPOINT_FILE)
+    assert os.path.exists(checkpoint_file)
+
+    # One quoted command line, with the options removed from sys.argv given back
+    assert len(commands) == 1
+    assert commands[0].startswith('cmd.exe /k "')
+    for option in ("--log", "--profile", "--resume"):
+        assert option in commands[0]
+
+    resumed, prompted = resume_build(project, monkeypatch)
+    assert "resume" in resumed.timings
+    assert "sync" not in resumed.timings and "unknown_scan" not in resumed.timings
+    assert prompted == first.unknown_folders
+    assert resumed.include_file_path and os.path.exists(resumed.include_file_path)
+    assert not os.path.exists(checkpoint_file)
+
+
+def test_checkpoint_is_rejected_when_a_listed_folder_changed(tmp_path, headless, monkeypatch):
+    project = make_project(tmp_path, unknown_count=2)
+    first, _commands = relaunch_build(project, monkeypatch)
+    assert first.relaunched
+
+    # A folder created after the checkpoint: its unknown-folder list is out of date
+    os.mkdir(os.path.join(project, "N0", "AddedLater"))
+
+    resumed, prompted = resume_build(project, monkeypatch)
+    assert "resume" not in resumed.timings
+    assert "unknown_scan" in resumed.timings
+    assert os.path.join("N0", "AddedLater") in prompted
+    assert not os.path.exists(os.path.join(project, ".config", main.BUILD_CHECKPOINT_FILE))
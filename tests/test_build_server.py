@@ -0,0 +1,58 @@
+"""
+Build server over a Unix socket: ping, build (twice) and stop.
+"""
+import sys
+import threading
+import time
+
+import pytest
+
+import main
+import benchmark
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="Unix socket server")
+
+
+def wait_for_server(project_root, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        reply = main.request_build_server(project_root, {"command": "ping"})
+        if reply:
+            return reply
+        time.sleep(0.02)
+    raise AssertionError("The build server did not start")
+
+
+def test_ping_build_and_stop(project, monkeypatch):
+    # Entries written by the first build must be trusted by the second one
+    monkeypatch.setattr(main, "BUILD_CACHE_RACY_SECONDS", 0)
+
+    server = threading.Thread(
+        target=main.run_build_server,
+        args=(project, benchmark.BENCH_PATHFILE, benchmark.BENCH_INCLUDE_OUTPUT),
+        daemon=True,
+    )
+    server.start()
+    try:
+        ping = wait_for_server(project)
+        assert ping["status"] == "ok"
+        assert ping["builds"] == 0
+
+        first = main.request_build_server(project, {"command": "build", "launch": False})
+        assert first["status"] == "ok"
+        assert first["cache_hit"] is False
+        assert any(path.endswith(benchmark.BENCH_INCLUDE_OUTPUT) for path in first["changed_outputs"])
+
+        second = main.request_build_server(project, {"command": "build", "launch": False})
+        assert second["status"] == "ok"
+        assert second["cache_hit"] is True
+        assert second["changed_outputs"] == []
+
+        assert main.request_build_server(project, {"command": "ping"})["builds"] == 2
+    finally:
+        stopped = main.request_build_server(project, {"command": "stop"})
+        server.join(timeout=10)
+
+    assert stopped["status"] == "stopped"
+    assert not server.is_alive()
+    assert main.request_build_server(project, {"command": "ping"}) is None
@@ -0,0 +1,47 @@
+"""
+'bundle' include mode: the markers give the include file lines of each module.
+"""
+import json
+import os
+import re
+
+import main
+import benchmark
+
+MARKER = re.compile(r'^; >>> Bundled: (.+) \(include lines (\d+)-(\d+)\)$')
+
+
+def test_bundle_markers_map_include_lines_to_module_lines(project):
+    settings_path = os.path.join(project, ".config", main.SETTINGS_FILE)
+    with open(settings_path, encoding='utf-8') as f:
+        settings = json.load(f)
+    settings["include_mode"] = "bundle"
+    with open(settings_path, 'w', encoding='utf-8') as f:
+        json.dump(settings, f, indent=4)
+
+    # Modules of different lengths, so every offset depends on the modules before it
+    for index, (dir_path, _dirs, files) in enumerate(sorted(os.walk(os.path.join(project, "N0")))):
+        for name in files:
+            with open(os.path.join(dir_path, name), 'a', encoding='utf-8') as f:
+                f.write("".join(f"; {name} extra line {line}\n" for line in range(index)))
+
+    options = main.BuildOptions(interactive=False, launch=False)
+    result = main.build(project, benchmark.BENCH_PATHFILE, benchmark.BENCH_INCLUDE_OUTPUT, options)
+    with open(result.include_file_path, encoding='utf-8') as f:
+        include_lines = f.read().split("\n")
+
+    markers = 0
+    include_dir = os.path.dirname(result.include_file_path)
+    for line in include_lines:
+        match = MARKER.match(line)
+        if not match:
+            continue
+        markers += 1
+        include_path, first_line, last_line = match.group(1), int(match.group(2)), int(match.group(3))
+        with open(os.path.join(include_dir, include_path.replace("\\", os.sep)), encoding='utf-8') as f:
+            module_lines = f.read().rstrip("\n").split("\n")
+        # Line N of the module is at include line first_line + N - 1
+        assert include_lines[first_line - 1:last_line] == module_lines
+        assert include_lines[last_line] == f"; <<< End: {include_path}"
+
+    assert markers == 24
@@ -0,0 +1,20 @@
+"""
+SettingsPathIndex: lookups by relative path into the settings.json structure.
+"""
+import os
+
+import main
+
+
+def test_first_node_in_settings_order_wins_on_duplicate_paths():
+    first = {"name": "C", "type": "First"}
+    second = {"name": "C", "type": "Second"}
+    structure = [
+        {"name": "A", "type": "A", "children": [{"name": "B", "type": "B", "children": [first]}]},
+        {"name": "A", "type": "A2", "children": [{"name": "B", "type": "B2", "children": [second]}]},
+    ]
+    index = main.SettingsPathIndex(structure)
+
+    assert index.get(os.path.join("A", "B", "C")) is first
+    assert index.get("A")["type"] == "A"
+    assert index.get("missing") is None
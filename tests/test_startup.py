@@ -0,0 +1,14 @@
+"""
+Start-up regression test: 'import main' must stay headless and fast.
+"""
+import benchmark
+
+
+def test_import_main_loads_no_gui_and_fits_the_budget():
+    # Best of a few runs, so one slow interpreter start does not fail the test
+    runs = [benchmark.measure_import_time() for _ in range(3)]
+    main_us, _top_level, imported = min(runs, key=lambda run: run[0])
+
+    forbidden = sorted(m for m in imported if m.split(".")[0] in benchmark.STARTUP_FORBIDDEN_MODULES)
+    assert forbidden == []
+    assert main_us / 1000 <= benchmark.STARTUP_BUDGET_MS